@@ -25,19 +25,45 @@ def create_app(config_name=None):
     # Create database tables
     with app.app_context():
         from . import models
-        db.create_all()
+        from .services import excel_reader, glossary_snapshot, startup_coordinator
 
-        # Load glossary data on startup
-        from .services import excel_reader
-        excel_reader.load_all_glossaries(app)
+        def initialise_database():
+            db.create_all()
+            _add_missing_columns()
+            _add_missing_indexes()
+
+            # Load glossary data on startup
+            excel_reader.load_all_glossaries(app)
+
+        # Only one worker creates tables and loads glossaries; the rest wait
+        startup_coordinator.run_startup_once(app, initialise_database)
+
+        # Warm this process's glossary snapshots (inherited by forked workers under --preload)
+        for glossary_type in app.config['GLOSSARY_FILES']:
+            glossary_snapshot.get_snapshot(glossary_type)
+        db.session.remove()
+
+        # Never share pooled connections with processes forked after startup
+        db.engine.dispose()
 
     # Register routes
     from . import routes
     app.register_blueprint(routes.bp)
 
+    # Sweep OUTPUT_DIR in the background; started lazily so forked workers get their own thread
+    @app.after_request
+    def start_output_sweeper(response):
+        from .services import output_retention
+        output_retention.start_sweeper(app, response)
+        return response
+
     # Add no-cache headers for development
     @app.after_request
     def add_no_cache_headers(response):
+        # Responses with an ETag may be cached but must always be revalidated
+        if response.get_etag()[0]:
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
         response.headers['Cache-Control'] = 'no-store, no-cache, must-revalidate, post-check=0, pre-check=0, max-age=0'
         response.headers['Pragma'] = 'no-cache'
         response.headers['Expires'] = '-1'
@@ -50,3 +76,50 @@ def create_app(config_name=None):
         return {'current_year': datetime.now().year}
 
     return app
+
+def _add_missing_columns():
+    """
+    Add columns introduced after a table was first created.
+
+    db.create_all() only creates missing tables, so existing databases would
+    otherwise never pick up new (nullable) columns on existing tables.
+    """
+    from sqlalchemy import inspect, text
+
+    inspector = inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+
+    with db.engine.begin() as conn:
+        for table in db.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing_columns = {col['name'] for col in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing_columns:
+                    continue
+                column_type = column.type.compile(dialect=db.engine.dialect)
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+                print(f"Added column {table.name}.{column.name}")
+
+def _add_missing_indexes():
+    """
+    Create indexes introduced after a table was first created.
+
+    Like columns, db.create_all() only creates the indexes of new tables.
+    Building an index on a large existing table takes a while, once.
+    """
+    from sqlalchemy import inspect
+
+    inspector = inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+
+    with db.engine.begin() as conn:
+        for table in db.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing_indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name in existing_indexes:
+                    continue
+                index.create(conn)
+                print(f"Added index {index.name} on {table.name}")
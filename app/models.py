@@ -34,6 +34,41 @@ class GlossaryMeta(db.Model):
     entry_count = db.Column(db.Integer, default=0)
     last_uploaded_at = db.Column(db.DateTime, nullable=True)
     original_filename = db.Column(db.String(255), nullable=True)
+    version = db.Column(db.Integer, default=0)  # Bumped on every reload, shared across workers
+    # Fingerprint of the file last loaded into the cache (size/mtime are a fast pre-check)
+    file_size = db.Column(db.BigInteger, nullable=True)
+    file_mtime = db.Column(db.Float, nullable=True)
+    content_hash = db.Column(db.String(64), nullable=True)
+    # Oldest revision from which GlossaryChange holds a complete delta
+    changes_since = db.Column(db.Integer, default=0)
+
+class GlossaryChange(db.Model):
+    __tablename__ = 'glossary_changes'
+
+    id = db.Column(db.Integer, primary_key=True)
+    glossary_type = db.Column(db.String(50), nullable=False)
+    revision = db.Column(db.Integer, nullable=False)  # GlossaryMeta.version that introduced the change
+    code = db.Column(db.String(100), nullable=False)
+    removed = db.Column(db.Boolean, nullable=False, default=False)
+
+    __table_args__ = (
+        db.Index('ix_glossary_changes_type_revision', 'glossary_type', 'revision'),
+    )
+
+class IdSequence(db.Model):
+    __tablename__ = 'id_sequences'
+
+    # 'form' for FormIDs, 'row:<YYYYMMDD-HHMM>' for row running numbers
+    name = db.Column(db.String(50), primary_key=True)
+    last_value = db.Column(db.BigInteger, nullable=False)
+
+class StartupState(db.Model):
+    __tablename__ = 'startup_state'
+
+    # A single row, bumped by startup_coordinator each time startup completes
+    id = db.Column(db.Integer, primary_key=True)
+    completed_count = db.Column(db.Integer, nullable=False, default=0)
+    completed_at = db.Column(db.DateTime, nullable=True)
 
 class FormSubmission(db.Model):
     __tablename__ = 'form_submissions'
@@ -44,9 +79,19 @@ class FormSubmission(db.Model):
     programme_code = db.Column(db.String(50), nullable=False)
     generated_file_path = db.Column(db.String(500))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # SHA-256 of the normalised request (output_dedup.payload_hash), shared by its submissions
+    payload_hash = db.Column(db.String(64), nullable=True)
+    # Size of the generated file when it was saved to OUTPUT_DIR. Only set since
+    # rows are stored completely, so it also marks files that can be rebuilt.
+    file_size = db.Column(db.BigInteger, nullable=True)
+    last_downloaded_at = db.Column(db.DateTime, nullable=True)
 
     rows = db.relationship('GeneratedRow', backref='submission', lazy=True, cascade='all, delete-orphan')
 
+    __table_args__ = (
+        db.Index('ix_form_submissions_payload_hash', 'payload_hash'),
+    )
+
 class GeneratedRow(db.Model):
     __tablename__ = 'generated_rows'
 
@@ -65,6 +110,32 @@ class GeneratedRow(db.Model):
     faculty_code = db.Column(db.String(50))
     request_special_room_code = db.Column(db.String(50))
     recurring_until_week = db.Column(db.Integer)
+    # Booking details, used to detect faculty/room clashes with later submissions
+    scheduled_date = db.Column(db.String(20))  # YYYY-MM-DD
+    start_time = db.Column(db.String(10))
+    end_time = db.Column(db.String(10))
+    faculty_code2 = db.Column(db.String(50))
+    # Remaining generated columns, so the file can be rebuilt from the database
+    course_name = db.Column(db.String(500))
+    group_code_capacity = db.Column(db.Integer)
+    course_group_seq = db.Column(db.Integer)
+
+    __table_args__ = (
+        db.Index('ix_generated_rows_scheduled_date', 'scheduled_date'),
+        db.Index('ix_generated_rows_form_id', 'form_id'),
+        db.Index('ix_generated_rows_submission_id', 'submission_id'),
+    )
+
+class AcademicCalendar(db.Model):
+    __tablename__ = 'academic_calendars'
+
+    id = db.Column(db.Integer, primary_key=True)
+    academic_session_code = db.Column(db.String(100), unique=True, nullable=False)
+    # Holiday/replacement rules shared by every entry of the session:
+    # [{"date": "YYYY-MM-DD", "replacement": "YYYY-MM-DD" or null, "description": "..."}]
+    rules_json = db.Column(db.Text, nullable=False, default='[]')
+    version = db.Column(db.Integer, nullable=False, default=0)  # Bumped on every change, shared across workers
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 class SavedSession(db.Model):
     __tablename__ = 'saved_sessions'
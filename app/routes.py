@@ -1,11 +1,12 @@
 import json
 import os
+import tempfile
 from datetime import datetime
 from flask import Blueprint, render_template, jsonify, request, send_file, send_from_directory, current_app
 from werkzeug.utils import secure_filename
 from app import db
 from app.models import SavedSession, GlossaryMeta, GlossaryCache
-from app.services import excel_reader
+from app.services import academic_calendar, excel_reader, glossary_changes, glossary_snapshot, output_formats
 
 bp = Blueprint('main', __name__)
 
@@ -22,132 +23,606 @@ def get_glossary(glossary_type):
     if glossary_type not in valid_types:
         return jsonify({'error': 'Invalid glossary type'}), 400
 
-    data = excel_reader.get_glossary_data(glossary_type)
-    return jsonify(data)
+    # Serve the pre-serialised snapshot; unchanged glossaries answer 304
+    snapshot = glossary_snapshot.get_snapshot(glossary_type)
+    response = current_app.response_class(snapshot.body, mimetype='application/json')
+    response.headers['X-Glossary-Revision'] = str(snapshot.version)
+    response.set_etag(snapshot.etag)
+    return response.make_conditional(request)
+
+@bp.route('/api/glossary/<glossary_type>/changes')
+def get_glossary_changes(glossary_type):
+    """Get the entries changed since a client's revision (delta sync)"""
+    glossary_files = current_app.config.get('GLOSSARY_FILES', {})
+
+    if glossary_type not in glossary_files:
+        return jsonify({'error': 'Invalid glossary type'}), 400
+
+    since = request.args.get('since', type=int)
+    return jsonify(glossary_changes.get_changes(glossary_type, since))
+
+@bp.route('/api/glossaries/changes')
+def get_glossaries_changes():
+    """Get deltas for several glossaries at once (since=type:rev,type:rev)"""
+    glossary_files = current_app.config.get('GLOSSARY_FILES', {})
+
+    result = {}
+    for pair in request.args.get('since', '').split(','):
+        glossary_type, _, revision = pair.strip().partition(':')
+        if not glossary_type:
+            continue
+        if glossary_type not in glossary_files:
+            return jsonify({'error': f'Invalid glossary type: {glossary_type}'}), 400
+        since = int(revision) if revision.isdigit() else None
+        result[glossary_type] = glossary_changes.get_changes(glossary_type, since)
+
+    return jsonify(result)
+
+@bp.route('/api/glossaries/bundle')
+def get_glossary_bundle():
+    """Get several glossaries in one (gzip-compressed) response for page load"""
+    glossary_files = current_app.config.get('GLOSSARY_FILES', {})
+
+    requested = [t.strip() for t in request.args.get('types', '').split(',') if t.strip()]
+    glossary_types = list(dict.fromkeys(requested)) or list(glossary_files)
+
+    invalid = [t for t in glossary_types if t not in glossary_files]
+    if invalid:
+        return jsonify({'error': f"Invalid glossary type: {', '.join(invalid)}"}), 400
+
+    bundle = glossary_snapshot.get_bundle(glossary_types)
+
+    # Each encoding is a distinct representation, so it gets its own strong ETag
+    if request.accept_encodings['gzip']:
+        response = current_app.response_class(bundle.gzip_body, mimetype='application/json')
+        response.headers['Content-Encoding'] = 'gzip'
+        response.set_etag(f'{bundle.etag}-gzip')
+    else:
+        response = current_app.response_class(bundle.body, mimetype='application/json')
+        response.set_etag(bundle.etag)
+    response.headers['X-Glossary-Revisions'] = bundle.revisions
+    response.vary.add('Accept-Encoding')
+    return response.make_conditional(request)
+
+@bp.route('/api/glossary/<glossary_type>/search')
+def search_glossary(glossary_type):
+    """Search a glossary and return one page in Select2's AJAX format"""
+    glossary_files = current_app.config.get('GLOSSARY_FILES', {})
+
+    if glossary_type not in glossary_files:
+        return jsonify({'error': 'Invalid glossary type'}), 400
+
+    query = request.args.get('q', '')
+    page = request.args.get('page', 1, type=int) or 1
+    page_size = current_app.config.get('GLOSSARY_SEARCH_PAGE_SIZE', 50)
+
+    snapshot = glossary_snapshot.get_snapshot(glossary_type)
+    items, more = snapshot.search_index.search(query, page=page, page_size=page_size)
+
+    return jsonify({
+        'results': [
+            {
+                'id': item['code'],
+                'text': f"{item['code']} - {item['description']}" if item['description'] else item['code']
+            }
+            for item in items
+        ],
+        'pagination': {'more': more}
+    })
+
+def _validate_entry(entry):
+    """
+    Validate one generate entry, normalising the legacy capacity field in place
+
+    Returns:
+        Error message, or None if the entry is valid
+    """
+    # Support legacy single capacity field for backwards compatibility
+    if 'capacity' in entry and 'group_capacities' not in entry:
+        single_capacity = entry['capacity']
+        group_codes = entry.get('group_codes', [])
+        entry['group_capacities'] = {group: single_capacity for group in group_codes}
+
+    # V4: Validate required fields (removed programme_code and faculty_code)
+    required_fields = ['academic_session_code', 'class_commencement',
+                      'duration', 'activity_code', 'group_capacities', 'course_codes',
+                      'group_codes', 'recurring_until_week']
+
+    for field in required_fields:
+        if field not in entry or entry[field] is None or entry[field] == '':
+            if field in ['course_codes', 'group_codes']:
+                if not entry.get(field) or len(entry.get(field, [])) == 0:
+                    return f'Entry is missing required field: {field}'
+            else:
+                return f'Entry is missing required field: {field}'
+
+    # V4: Validate week_venue_details
+    week_venue_details = entry.get('week_venue_details', {})
+    if not week_venue_details or len(week_venue_details) == 0:
+        return 'Week venue and lecturer details are required'
+
+    # Validate each week has a faculty code (supports both old and new format)
+    for date_key, detail in week_venue_details.items():
+        if 'sessions' in detail:
+            for session in detail['sessions']:
+                for venue in session.get('venues', []):
+                    if not venue.get('faculty_code'):
+                        return f'Faculty code missing for date: {date_key}'
+        else:
+            if not detail.get('faculty_code'):
+                return f'Faculty code missing for date: {date_key}'
+
+    # Validate group_capacities structure
+    group_capacities = entry.get('group_capacities', {})
+    group_codes = entry.get('group_codes', [])
+
+    if not isinstance(group_capacities, dict):
+        return 'group_capacities must be an object'
+
+    # Verify all selected groups have capacity values
+    for group_code in group_codes:
+        if group_code not in group_capacities:
+            return f'Missing capacity for group: {group_code}'
+
+        capacity_value = group_capacities[group_code]
+        if not isinstance(capacity_value, int) or capacity_value < 0:
+            return f'Invalid capacity value for group {group_code}'
+
+    # Verify no extra groups in capacities
+    for group_code in group_capacities.keys():
+        if group_code not in group_codes:
+            return f'Capacity specified for unselected group: {group_code}'
+
+    return None
+
+def _check_entry(entry):
+    """
+    Validate one generate entry and count its rows; used as an entry pool task
+
+    Returns:
+        Tuple of (error message or None, the normalised entry, row count)
+    """
+    from app.services import form_processor
+
+    error = _validate_entry(entry)
+    if error:
+        return error, entry, 0
+    return None, entry, form_processor.count_rows(entry)
+
+def _generation_limit_error(row_count, estimate):
+    """
+    Check a generation against GENERATE_MAX_ROWS / GENERATE_MAX_FILE_BYTES
+
+    Returns:
+        Error message, or None if the generation is within the limits (0 = no limit)
+    """
+    max_rows = current_app.config.get('GENERATE_MAX_ROWS', 0)
+    max_file_bytes = current_app.config.get('GENERATE_MAX_FILE_BYTES', 0)
+
+    if max_rows and row_count > max_rows:
+        return f'This would generate {row_count:,} rows; the limit is {max_rows:,}. Reduce the entries and try again.'
+    if max_file_bytes and estimate['file_bytes'] > max_file_bytes:
+        return (f"This would generate a file of about {estimate['file_bytes'] / 1048576:.1f} MB; "
+                f"the limit is {max_file_bytes / 1048576:.1f} MB. Reduce the entries and try again.")
+    return None
+
+@bp.route('/api/generate-multiple/preview', methods=['POST'])
+def preview_generate_multiple():
+    """
+    Size a generation without expanding any rows or reserving IDs
+
+    Row counts come from courses x groups x dates x sessions x venues; file
+    size and time are estimated from them. Entries that fail validation are
+    reported individually and left out of the totals; codes missing from the
+    glossaries are listed in 'code_errors'.
+    """
+    try:
+        request_data = request.get_json() or {}
+        entries = request_data.get('entries', [])
+
+        if not entries or len(entries) == 0:
+            return jsonify({'error': 'No entries provided'}), 400
+
+        output_format = request_data.get('format', 'xlsx')
+        if output_format not in output_formats.available_formats():
+            return jsonify({'error': f'Unsupported output format: {output_format}'}), 400
+
+        from app.services import code_validation, form_processor, excel_generator
+
+        previews = []
+        total_rows = 0
+        for index, entry in enumerate(entries):
+            error = _validate_entry(entry)
+            if not error:
+                try:
+                    size = form_processor.measure_expansion(entry)
+                except (KeyError, TypeError, ValueError) as e:
+                    error = f'Invalid entry: {e}'
+            if error:
+                previews.append({'index': index, 'error': error})
+                continue
+            total_rows += size['rows']
+            previews.append({'index': index, **size})
+
+        estimate = excel_generator.estimate_output(total_rows, len(entries), output_format)
+        limit_error = _generation_limit_error(total_rows, estimate)
+        code_errors = code_validation.validate_entries(entries)
+
+        return jsonify({
+            'entries': previews,
+            'total_rows': total_rows,
+            'form_id_count': len(entries),
+            'estimated_file_bytes': estimate['file_bytes'],
+            'estimated_seconds': estimate['seconds'],
+            'limits': {
+                'max_rows': current_app.config.get('GENERATE_MAX_ROWS', 0),
+                'max_file_bytes': current_app.config.get('GENERATE_MAX_FILE_BYTES', 0)
+            },
+            'within_limits': limit_error is None,
+            'limit_error': limit_error,
+            'code_errors': code_errors
+        })
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
 @bp.route('/api/generate-multiple', methods=['POST'])
 def generate_multiple_excel():
-    """Process multiple entries and generate single Excel file"""
+    """
+    Process multiple entries and generate single Excel file
+
+    "format" in the request body selects the output format: xlsx (default),
+    csv, csv.gz, jsonl, or parquet when pyarrow is installed.
+
+    By default the file is saved to OUTPUT_DIR and its name returned as JSON
+    for /download. With "stream": true in the request body the file is
+    returned directly as the response body instead (the FormIDs and counts
+    go in X-Form-IDs, X-Row-Count and X-Entry-Count headers) and is not kept
+    on disk.
+
+    Every course, group, faculty, activity, special room, session and
+    programme code must exist in its glossary; otherwise nothing is generated
+    and all unknown codes are returned in 'errors' with their paths.
+
+    Faculty/room double bookings (within the batch or against earlier
+    submissions) are reported in 'clashes' (X-Clash-Count when streamed),
+    or refused with 409 when GENERATE_CLASH_CHECK is 'block'.
+
+    Large requests (see entry_pool.worker_count) validate and expand their
+    entries in worker processes; results merge back in entry order, so the
+    output is the same as a serial run. The timings and speedup are returned
+    as 'metrics' (X-Generate-Metrics when streamed).
+
+    A request identical to one generated within GENERATE_DEDUP_WINDOW_SECONDS
+    (same normalised entries and format, see output_dedup) returns that
+    generation's file, FormIDs and row count with 'deduplicated' true
+    (X-Deduplicated when streamed) instead of generating again. Send
+    "force": true to always generate.
+    """
     try:
         request_data = request.get_json()
         entries = request_data.get('entries', [])
+        stream = bool(request_data.get('stream'))
+        output_format = request_data.get('format', 'xlsx')
+        force = bool(request_data.get('force'))
 
         if not entries or len(entries) == 0:
             return jsonify({'error': 'No entries provided'}), 400
+        if output_format not in output_formats.available_formats():
+            return jsonify({'error': f'Unsupported output format: {output_format}'}), 400
 
         # Import services when needed
-        from app.services import form_processor, excel_generator
-
-        all_rows = []
-        form_ids = []
-        programme_code = None
-
-        # Generate all FormIDs upfront to avoid duplicates
-        from app.services import id_generator
-        start_form_id = id_generator.get_last_form_id() + 1
-
-        for idx in range(len(entries)):
-            form_ids.append(f"{start_form_id + idx:06d}")
-
-        # Process each entry
-        for idx, entry in enumerate(entries):
-            # Support legacy single capacity field for backwards compatibility
-            if 'capacity' in entry and 'group_capacities' not in entry:
-                single_capacity = entry['capacity']
-                group_codes = entry.get('group_codes', [])
-                entry['group_capacities'] = {group: single_capacity for group in group_codes}
-
-            # V4: Validate required fields (removed programme_code and faculty_code)
-            required_fields = ['academic_session_code', 'class_commencement',
-                              'duration', 'activity_code', 'group_capacities', 'course_codes',
-                              'group_codes', 'recurring_until_week']
-
-            for field in required_fields:
-                if field not in entry or entry[field] is None or entry[field] == '':
-                    if field in ['course_codes', 'group_codes']:
-                        if not entry.get(field) or len(entry.get(field, [])) == 0:
-                            return jsonify({'error': f'Entry is missing required field: {field}'}), 400
-                    else:
-                        return jsonify({'error': f'Entry is missing required field: {field}'}), 400
-
-            # V4: Validate week_venue_details
-            week_venue_details = entry.get('week_venue_details', {})
-            if not week_venue_details or len(week_venue_details) == 0:
-                return jsonify({'error': 'Week venue and lecturer details are required'}), 400
-
-            # Validate each week has a faculty code (supports both old and new format)
-            for date_key, detail in week_venue_details.items():
-                if 'sessions' in detail:
-                    for session in detail['sessions']:
-                        for venue in session.get('venues', []):
-                            if not venue.get('faculty_code'):
-                                return jsonify({'error': f'Faculty code missing for date: {date_key}'}), 400
-                else:
-                    if not detail.get('faculty_code'):
-                        return jsonify({'error': f'Faculty code missing for date: {date_key}'}), 400
-
-            # Validate group_capacities structure
-            group_capacities = entry.get('group_capacities', {})
-            group_codes = entry.get('group_codes', [])
-
-            if not isinstance(group_capacities, dict):
-                return jsonify({'error': 'group_capacities must be an object'}), 400
-
-            # Verify all selected groups have capacity values
-            for group_code in group_codes:
-                if group_code not in group_capacities:
-                    return jsonify({'error': f'Missing capacity for group: {group_code}'}), 400
-
-                capacity_value = group_capacities[group_code]
-                if not isinstance(capacity_value, int) or capacity_value < 0:
-                    return jsonify({'error': f'Invalid capacity value for group {group_code}'}), 400
-
-            # Verify no extra groups in capacities
-            for group_code in group_capacities.keys():
-                if group_code not in group_codes:
-                    return jsonify({'error': f'Capacity specified for unselected group: {group_code}'}), 400
-
-            # Store first programme code for filename (V4: may be empty)
-            if programme_code is None:
-                programme_code = entry.get('programme_code', '') or 'GENERAL'
-
-            # Process and expand rows for this entry
-            expanded_rows = form_processor.process_form(entry)
-
-            # Get pre-generated FormID for this entry
-            form_id = form_ids[idx]
-
-            # Add FormID to each row
-            for row in expanded_rows:
-                row['form_id_temp'] = form_id
-                all_rows.append(row)
-
-        # Generate single Excel file with all entries
-        file_path = excel_generator.generate_excel_file_multiple(all_rows, programme_code, form_ids)
+        from app.services import (clash_detector, code_validation, entry_pool, excel_generator, form_processor,
+                                  id_generator, output_dedup)
+
+        config = current_app.config
+        with entry_pool.EntryPool(config.get('GENERATE_PARALLEL_WORKERS', 0)) as pool:
+            row_count = 0
+            programme_code = None
+
+            # Validate and count each entry, in worker processes for large requests
+            checked = pool.map(_check_entry, entries, entry_pool.worker_count(config, len(entries)))
+            for index, (error, entry, entry_rows) in enumerate(checked):
+                if error:
+                    return jsonify({'error': error}), 400
+
+                # Validation normalises entries; workers hand back their own copy
+                entries[index] = entry
+
+                # Store first programme code for filename (V4: may be empty)
+                if programme_code is None:
+                    programme_code = entry.get('programme_code', '') or 'GENERAL'
+
+                # Count this entry's rows; its RowBatch is built lazily while writing
+                row_count += entry_rows
+
+            # Check every submitted code against the glossaries, reporting all unknown ones
+            code_errors = code_validation.validate_entries(entries)
+            if code_errors:
+                return jsonify({'error': code_validation.summarise(code_errors), 'errors': code_errors}), 400
+
+            # Hand back the earlier file of an identical request instead of generating it again
+            payload_hash = output_dedup.payload_hash(entries, output_format)
+            dedup_window = config.get('GENERATE_DEDUP_WINDOW_SECONDS', 0)
+            previous = None
+            if dedup_window and not force:
+                previous = output_dedup.find_previous(payload_hash, len(entries), dedup_window)
+            if previous:
+                return _deduplicated_response(previous, len(entries), stream, output_format)
+
+            # Refuse oversized generations before reserving IDs or writing anything
+            limit_error = _generation_limit_error(
+                row_count, excel_generator.estimate_output(row_count, len(entries), output_format)
+            )
+            if limit_error:
+                return jsonify({'error': limit_error}), 413
+
+            # Look for faculty/room double bookings within the batch and against history
+            clash_check = config.get('GENERATE_CLASH_CHECK', 'warn')
+            clashes = None
+            if clash_check in ('warn', 'block'):
+                clashes = clash_detector.find_clashes(entries, payload_hash=payload_hash)
+            if clash_check == 'block' and clashes['count']:
+                return jsonify({'error': clash_detector.summarise(clashes), 'clashes': clashes}), 409
+
+            # Reserve one FormID per entry once every entry is valid
+            form_ids = id_generator.generate_form_ids(len(entries))
+
+            # Batches come back in entry order however they are built, so rows
+            # pair with the same FormIDs and row IDs as a serial run
+            entry_batches = pool.map(
+                form_processor.expand_batch, entries, entry_pool.worker_count(config, len(entries), row_count)
+            )
+
+            # Generate single file with all entries
+            if stream:
+                output = tempfile.SpooledTemporaryFile(max_size=config.get('GENERATE_STREAM_SPOOL_BYTES', 0))
+                filename = excel_generator.generate_excel_file_from_batches(
+                    entry_batches, row_count, programme_code, form_ids, output=output, output_format=output_format,
+                    payload_hash=payload_hash
+                )
+                output.seek(0)
+            else:
+                file_path = excel_generator.generate_excel_file_from_batches(
+                    entry_batches, row_count, programme_code, form_ids, output_format=output_format,
+                    payload_hash=payload_hash
+                )
+
+        metrics = pool.metrics()
+        print(f"Generated {row_count} rows from {len(entries)} entries in {metrics['wall_seconds']:.2f}s "
+              f"({metrics['mode']}, {metrics['workers']} workers; {metrics['task_seconds']:.2f}s entry work, "
+              f"speedup {metrics['speedup']:.2f}x)")
+
+        if stream:
+            response = send_file(
+                output,
+                mimetype=output_formats.get_format(output_format).mimetype,
+                as_attachment=True,
+                download_name=filename
+            )
+            response.headers['X-Form-IDs'] = ','.join(form_ids)
+            response.headers['X-Row-Count'] = str(row_count)
+            response.headers['X-Entry-Count'] = str(len(entries))
+            response.headers['X-Generate-Metrics'] = json.dumps(metrics, separators=(',', ':'))
+            if clashes is not None:
+                response.headers['X-Clash-Count'] = str(clashes['count'])
+            return response
 
         return jsonify({
             'success': True,
             'file_path': file_path,
             'form_ids': form_ids,
-            'row_count': len(all_rows),
-            'entry_count': len(entries)
+            'row_count': row_count,
+            'entry_count': len(entries),
+            'metrics': metrics,
+            'clashes': clashes,
+            'deduplicated': False
+        })
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def _deduplicated_response(previous, entry_count, stream, output_format):
+    """
+    Respond to a generate request with the file of an identical earlier request
+
+    Args:
+        previous: Generation found by output_dedup.find_previous
+        entry_count: Number of entries in the request
+        stream: Send the file itself rather than its name
+        output_format: Output format name
+    """
+    print(f"Reused {previous['file_path']} for an identical request ({previous['row_count']} rows)")
+
+    if stream:
+        from app.services import output_retention
+        file = output_retention.open_file(previous['path'])
+        if file is None:
+            return jsonify({'error': 'File not found'}), 404
+        # Serving the file is a use, like a download, for the retention sweeper
+        output_retention.record_download(previous['path'])
+        db.session.commit()
+        response = send_file(
+            file,
+            mimetype=output_formats.get_format(output_format).mimetype,
+            as_attachment=True,
+            download_name=previous['file_path']
+        )
+        response.headers['X-Form-IDs'] = ','.join(previous['form_ids'])
+        response.headers['X-Row-Count'] = str(previous['row_count'])
+        response.headers['X-Entry-Count'] = str(entry_count)
+        response.headers['X-Deduplicated'] = '1'
+        return response
+
+    return jsonify({
+        'success': True,
+        'file_path': previous['file_path'],
+        'form_ids': previous['form_ids'],
+        'row_count': previous['row_count'],
+        'entry_count': entry_count,
+        'metrics': None,
+        'clashes': None,
+        'deduplicated': True,
+        'generated_at': previous['created_at'].strftime('%Y-%m-%d %H:%M')
+    })
+
+@bp.route('/api/clashes/check', methods=['POST'])
+def check_clashes():
+    """
+    Check generate entries for faculty/room double bookings without generating
+
+    Takes the same body as /api/generate-multiple. Clashes are looked for
+    between the entries and, unless "include_history" is false, against the
+    bookings of earlier submissions.
+    """
+    try:
+        request_data = request.get_json() or {}
+        entries = request_data.get('entries', [])
+
+        if not entries or len(entries) == 0:
+            return jsonify({'error': 'No entries provided'}), 400
+
+        from app.services import clash_detector
+
+        for index, entry in enumerate(entries):
+            error = _validate_entry(entry)
+            if error:
+                return jsonify({'error': f'Entry {index + 1}: {error}'}), 400
+
+        return jsonify(clash_detector.find_clashes(entries, bool(request_data.get('include_history', True))))
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/api/calendar/<session_code>')
+def get_calendar(session_code):
+    """Get an academic session's commencement dates and shared holiday/replacement rules"""
+    try:
+        calendar = academic_calendar.get_calendar(session_code)
+        if calendar is None:
+            return jsonify({'error': f'Unknown academic session: {session_code}'}), 404
+
+        return jsonify({
+            'academic_session_code': calendar.code,
+            'commencement_weeks': calendar.commencement_weeks,
+            'commencement_dates': calendar.commencement_dates,
+            'rules': list(calendar.rules.values())
         })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/api/calendar/<session_code>/rules', methods=['PUT'])
+def save_calendar_rules(session_code):
+    """Replace an academic session's holiday/replacement rules"""
+    try:
+        if academic_calendar.get_calendar(session_code) is None:
+            return jsonify({'error': f'Unknown academic session: {session_code}'}), 404
+
+        data = request.get_json() or {}
+        try:
+            rules = academic_calendar.save_rules(session_code, data.get('rules'))
+        except ValueError as e:
+            db.session.rollback()
+            return jsonify({'error': str(e)}), 400
+
+        db.session.commit()
+        return jsonify({'success': True, 'rules': rules})
 
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/api/calendar/<session_code>/weeks')
+def get_teaching_weeks(session_code):
+    """
+    Get the teaching weeks of a class starting on a date of an academic session
+
+    Query parameters: start (YYYY-MM-DD) and weeks (count). Each week comes
+    with the session rule that applies to it, and 'dates' lists the teaching
+    dates once the rules are applied.
+    """
+    try:
+        calendar = academic_calendar.get_calendar(session_code)
+        if calendar is None:
+            return jsonify({'error': f'Unknown academic session: {session_code}'}), 404
+
+        start = request.args.get('start', '')
+        weeks = request.args.get('weeks', type=int)
+        max_weeks = current_app.config.get('CALENDAR_MAX_WEEKS', 104)
+        try:
+            datetime.strptime(start, '%Y-%m-%d')
+        except ValueError:
+            return jsonify({'error': 'start must be a date in YYYY-MM-DD format'}), 400
+        if weeks is None or weeks < 1 or weeks > max_weeks:
+            return jsonify({'error': f'weeks must be a number from 1 to {max_weeks}'}), 400
+
+        return jsonify({
+            'academic_session_code': calendar.code,
+            'start': start,
+            'weeks': calendar.teaching_weeks(start, weeks),
+            'dates': calendar.recurring_dates(start, weeks)
+        })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @bp.route('/download/<path:filename>')
 def download_file(filename):
-    """Download generated Excel file"""
+    """
+    Download generated Excel file
+
+    Files evicted from OUTPUT_DIR by the retention sweeper are rebuilt from
+    the database first; every download refreshes the file's last use.
+    """
     import os
     from flask import current_app
+    from app.services import output_retention
 
     file_path = os.path.join(current_app.config['OUTPUT_DIR'], filename)
-    if os.path.exists(file_path):
-        return send_file(file_path, as_attachment=True)
+    file = output_retention.open_file(file_path)
+    if file is not None:
+        output_retention.record_download(file_path)
+        db.session.commit()
+        return send_file(file, as_attachment=True, download_name=os.path.basename(filename))
     else:
         return jsonify({'error': 'File not found'}), 404
 
+@bp.route('/api/submissions/<form_id>/export')
+def export_submission(form_id):
+    """
+    Rebuild a submission's generated file from the database
+
+    Query parameters: format (default xlsx). The file of the submission's
+    generation is written from the stored rows, so it does not need to be
+    on disk; any output format can be requested.
+    """
+    try:
+        output_format = request.args.get('format', 'xlsx')
+        if output_format not in output_formats.available_formats():
+            return jsonify({'error': f'Unsupported output format: {output_format}'}), 400
+
+        from app.services import excel_generator
+
+        output = tempfile.SpooledTemporaryFile(max_size=current_app.config.get('GENERATE_STREAM_SPOOL_BYTES', 0))
+        try:
+            filename = excel_generator.export_submission(form_id, output, output_format)
+        except ValueError as e:
+            output.close()
+            return jsonify({'error': str(e)}), 409
+        if filename is None:
+            output.close()
+            return jsonify({'error': f'FormID {form_id} not found'}), 404
+
+        output.seek(0)
+        return send_file(
+            output,
+            mimetype=output_formats.get_format(output_format).mimetype,
+            as_attachment=True,
+            download_name=filename
+        )
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @bp.route('/api/sessions', methods=['POST'])
 def save_session():
     """Save or overwrite a named session"""
@@ -254,12 +729,11 @@ def glossaries():
 
 def _allowed_file(filename):
     """Check if uploaded file has an allowed extension"""
-    return '.' in filename and \
-        filename.rsplit('.', 1)[1].lower() in current_app.config.get('ALLOWED_EXTENSIONS', set())
+    return excel_reader.glossary_file_extension(filename) in current_app.config.get('ALLOWED_EXTENSIONS', set())
 
 @bp.route('/api/glossary/<glossary_type>/upload', methods=['POST'])
 def upload_glossary(glossary_type):
-    """Upload a new glossary Excel file for a given type"""
+    """Upload a new glossary file (Excel, CSV or TSV) for a given type"""
     glossary_files = current_app.config.get('GLOSSARY_FILES', {})
 
     if glossary_type not in glossary_files:
@@ -272,12 +746,14 @@ def upload_glossary(glossary_type):
     if file.filename == '':
         return jsonify({'error': 'No file selected'}), 400
 
+    allowed_extensions = current_app.config.get('ALLOWED_EXTENSIONS', set())
     if not _allowed_file(file.filename):
-        allowed = ', '.join(current_app.config.get('ALLOWED_EXTENSIONS', set()))
+        allowed = ', '.join(sorted(allowed_extensions))
         return jsonify({'error': f'Invalid file type. Allowed: {allowed}'}), 400
 
-    # Save file using the configured glossary filename (overwrites existing)
-    target_filename = glossary_files[glossary_type]
+    # Save file under the configured glossary filename, keeping the upload's format
+    extension = excel_reader.glossary_file_extension(file.filename)
+    target_filename = f"{excel_reader.glossary_file_stem(glossary_files[glossary_type])}.{extension}"
     glossary_dir = current_app.config['GLOSSARY_DIR']
     target_path = os.path.join(glossary_dir, target_filename)
 
@@ -294,6 +770,11 @@ def upload_glossary(glossary_type):
     if not result['success']:
         return jsonify({'error': result.get('error', 'Failed to reload glossary')}), 500
 
+    # Remove copies of this glossary in other formats so startup loads the upload
+    for path in excel_reader.find_glossary_files(glossary_dir, target_filename, allowed_extensions):
+        if path != target_path:
+            os.remove(path)
+
     # Update metadata
     meta = GlossaryMeta.query.filter_by(glossary_type=glossary_type).first()
     if not meta:
@@ -312,23 +793,27 @@ def upload_glossary(glossary_type):
     return jsonify({
         'success': True,
         'count': result['count'],
+        'inserted': result['inserted'],
+        'updated': result['updated'],
+        'deleted': result['deleted'],
         'last_uploaded_at': meta.last_uploaded_at.strftime('%d %b %Y, %H:%M'),
         'original_filename': original_filename
     })
 
 @bp.route('/api/glossary/<glossary_type>/download')
 def download_glossary(glossary_type):
-    """Download the current glossary Excel file for a given type"""
+    """Download the current glossary file for a given type, in the format it was saved in"""
     glossary_files = current_app.config.get('GLOSSARY_FILES', {})
 
     if glossary_type not in glossary_files:
         return jsonify({'error': 'Invalid glossary type'}), 400
 
     glossary_dir = current_app.config['GLOSSARY_DIR']
-    filename = glossary_files[glossary_type]
-    file_path = os.path.join(glossary_dir, filename)
+    candidates = excel_reader.find_glossary_files(
+        glossary_dir, glossary_files[glossary_type], current_app.config.get('ALLOWED_EXTENSIONS', set())
+    )
 
-    if not os.path.exists(file_path):
+    if not candidates:
         return jsonify({'error': 'Glossary file not found'}), 404
 
-    return send_from_directory(glossary_dir, filename, as_attachment=True)
+    return send_from_directory(glossary_dir, os.path.basename(candidates[0]), as_attachment=True)
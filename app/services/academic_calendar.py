@@ -0,0 +1,296 @@
+import json
+import threading
+from datetime import datetime, timedelta
+from functools import lru_cache
+from app import db
+from app.models import AcademicCalendar
+from app.services import glossary_snapshot
+
+# Number of distinct (start date, week count, exclusions) lookups memoised
+_RECURRING_CACHE_SIZE = 4096
+
+# Process-local calendars keyed by academic session code. Each remembers the
+# academicsession glossary version and AcademicCalendar.version it was built
+# from, so a glossary reload or a rules change in any worker invalidates it.
+_calendars = {}
+_calendars_lock = threading.Lock()
+
+
+def _parse_date(value):
+    """Parse a YYYY-MM-DD string, or return None if it is not one"""
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_commencement(value):
+    """Parse a DD.MM.YYYY commencement week, or return None if it is not one"""
+    try:
+        return datetime.strptime(value, '%d.%m.%Y').date()
+    except (TypeError, ValueError):
+        return None
+
+
+def exclusion_key(excluded_dates):
+    """
+    Normalise excluded dates into a hashable recurring_dates key
+
+    Supports both the old format (list of date strings) and the new format
+    (list of objects with 'date' and 'replacement' keys); a later exclusion
+    of the same date wins.
+
+    Args:
+        excluded_dates: List of date strings or exclusion objects
+
+    Returns:
+        Tuple of (date, replacement or None) pairs, sorted by date
+    """
+    excluded_map = {}
+    for item in (excluded_dates or []):
+        if isinstance(item, str):
+            excluded_map[item] = None
+        elif isinstance(item, dict) and 'date' in item:
+            excluded_map[item['date']] = item.get('replacement') or None
+    return tuple(sorted(excluded_map.items(), key=lambda pair: str(pair[0])))
+
+
+@lru_cache(maxsize=_RECURRING_CACHE_SIZE)
+def week_dates(start_date_str, week_count):
+    """
+    Get the date of each week from a start date, before any exclusions
+
+    Args:
+        start_date_str: Start date in YYYY-MM-DD format
+        week_count: Number of weeks
+
+    Returns:
+        Tuple of date strings in YYYY-MM-DD format
+    """
+    if not start_date_str or week_count < 1:
+        return ()
+
+    start_date = datetime.strptime(start_date_str, '%Y-%m-%d')
+    return tuple(
+        (start_date + timedelta(days=7 * week)).strftime('%Y-%m-%d')
+        for week in range(week_count)
+    )
+
+
+@lru_cache(maxsize=_RECURRING_CACHE_SIZE)
+def recurring_dates(start_date_str, week_count, exclusions=()):
+    """
+    Get the teaching dates of a class, memoised
+
+    An excluded week with a replacement is taught on the replacement date;
+    one without is skipped (no week is added to compensate).
+
+    Args:
+        start_date_str: Start date in YYYY-MM-DD format
+        week_count: Number of weeks to iterate through
+        exclusions: Exclusions as returned by exclusion_key
+
+    Returns:
+        Tuple of date strings in YYYY-MM-DD format
+    """
+    excluded_map = dict(exclusions)
+    result = []
+    for date_str in week_dates(start_date_str, week_count):
+        if date_str in excluded_map:
+            replacement = excluded_map[date_str]
+            if replacement:
+                result.append(replacement)
+        else:
+            result.append(date_str)
+    return tuple(result)
+
+
+def normalise_rules(rules):
+    """
+    Validate holiday/replacement rules and put them in their stored form
+
+    Args:
+        rules: List of objects with 'date', optional 'replacement' and
+            optional 'description'
+
+    Returns:
+        List of rule dicts sorted by date
+
+    Raises:
+        ValueError: If a rule is malformed, with a message for the user
+    """
+    if not isinstance(rules, list):
+        raise ValueError('rules must be a list')
+
+    normalised = {}
+    for rule in rules:
+        if not isinstance(rule, dict) or _parse_date(rule.get('date')) is None:
+            raise ValueError(f'Invalid rule date: {rule!r}')
+        date_str = rule['date']
+        replacement = rule.get('replacement') or None
+        if replacement is not None and _parse_date(replacement) is None:
+            raise ValueError(f'Invalid replacement date for {date_str}: {replacement!r}')
+        if replacement == date_str:
+            raise ValueError(f'Replacement date for {date_str} cannot be the same date')
+        if date_str in normalised:
+            raise ValueError(f'Duplicate rule for {date_str}')
+        normalised[date_str] = {
+            'date': date_str,
+            'replacement': replacement,
+            'description': str(rule.get('description') or '')[:200]
+        }
+
+    return [normalised[date_str] for date_str in sorted(normalised)]
+
+
+class SessionCalendar:
+    """Immutable calendar of one academic session: commencement weeks and shared rules"""
+
+    __slots__ = ('code', 'key', 'commencement_weeks', 'commencement_dates', 'rules', 'exclusions')
+
+    def __init__(self, code, key, commencement_weeks, rules):
+        """
+        Args:
+            code: Academic session code
+            key: (glossary version, calendar version) the calendar was built from
+            commencement_weeks: Commencement week start dates in DD.MM.YYYY format
+            rules: Normalised holiday/replacement rules
+        """
+        self.code = code
+        self.key = key
+
+        week_starts = [week for week in map(_parse_commencement, commencement_weeks) if week]
+        self.commencement_weeks = [week.isoformat() for week in week_starts]
+        # Classes may start on any day of a commencement week
+        self.commencement_dates = [
+            (week + timedelta(days=day)).isoformat()
+            for week in week_starts
+            for day in range(7)
+        ]
+
+        self.rules = {rule['date']: rule for rule in rules}
+        self.exclusions = exclusion_key(rules)
+
+    def exclusions_with(self, excluded_dates):
+        """
+        Session rules overridden by a class's own exclusions
+
+        Args:
+            excluded_dates: The class's excluded dates (either format), or None
+
+        Returns:
+            Exclusions key for recurring_dates
+        """
+        if not excluded_dates:
+            return self.exclusions
+        merged = dict(self.exclusions)
+        merged.update(exclusion_key(excluded_dates))
+        return tuple(sorted(merged.items(), key=lambda pair: str(pair[0])))
+
+    def teaching_weeks(self, start_date_str, week_count, excluded_dates=None):
+        """
+        Describe each week of a class with the rules that apply to it
+
+        Args:
+            start_date_str: Start date in YYYY-MM-DD format
+            week_count: Number of weeks
+            excluded_dates: The class's own excluded dates, overriding session rules
+
+        Returns:
+            List of dicts with 'week', 'date', 'excluded', 'replacement',
+            'holiday' (description of the session rule, or '') and 'teaching_date'
+            (None if the week is skipped)
+        """
+        excluded_map = dict(self.exclusions_with(excluded_dates))
+        weeks = []
+        for week, date_str in enumerate(week_dates(start_date_str, week_count), start=1):
+            excluded = date_str in excluded_map
+            replacement = excluded_map.get(date_str)
+            rule = self.rules.get(date_str)
+            weeks.append({
+                'week': week,
+                'date': date_str,
+                'excluded': excluded,
+                'replacement': replacement,
+                'holiday': (rule['description'] or 'Session holiday') if rule else '',
+                'teaching_date': (replacement if excluded else date_str) or None
+            })
+        return weeks
+
+    def recurring_dates(self, start_date_str, week_count, excluded_dates=None):
+        """Teaching dates of a class under the session rules and its own exclusions"""
+        return list(recurring_dates(start_date_str, week_count, self.exclusions_with(excluded_dates)))
+
+
+def _calendar_version(code):
+    """Get the shared AcademicCalendar.version of a session (0 if it has no rules)"""
+    version = db.session.query(AcademicCalendar.version).filter_by(
+        academic_session_code=code
+    ).scalar()
+    return version or 0
+
+
+def get_calendar(code):
+    """
+    Get the calendar of an academic session, rebuilding it if it moved
+
+    Args:
+        code: Academic session code
+
+    Returns:
+        SessionCalendar, or None if the code is not in the academicsession glossary
+    """
+    snapshot = glossary_snapshot.get_snapshot('academicsession')
+    entry = snapshot.entries_by_code.get(code)
+    if entry is None:
+        return None
+
+    key = (snapshot.version, _calendar_version(code))
+    calendar = _calendars.get(code)
+    if calendar is not None and calendar.key == key:
+        return calendar
+
+    with _calendars_lock:
+        calendar = _calendars.get(code)
+        if calendar is None or calendar.key != key:
+            row = AcademicCalendar.query.filter_by(academic_session_code=code).first()
+            rules = json.loads(row.rules_json) if row else []
+            calendar = SessionCalendar(
+                code,
+                key,
+                [entry.get('commencement_week_1'), entry.get('commencement_week_2')],
+                rules
+            )
+            _calendars[code] = calendar
+    return calendar
+
+
+def save_rules(code, rules):
+    """
+    Replace the holiday/replacement rules of an academic session
+
+    Bumps the session's shared calendar version; the caller is responsible
+    for committing.
+
+    Args:
+        code: Academic session code
+        rules: Rules as accepted by normalise_rules
+
+    Returns:
+        List of the stored (normalised) rules
+
+    Raises:
+        ValueError: If a rule is malformed
+    """
+    rules = normalise_rules(rules)
+
+    row = AcademicCalendar.query.filter_by(academic_session_code=code).first()
+    if not row:
+        row = AcademicCalendar(academic_session_code=code, version=0)
+        db.session.add(row)
+    row.rules_json = json.dumps(rules)
+    row.version = (row.version or 0) + 1
+
+    # Drop the local calendar straight away; other workers notice the new version
+    _calendars.pop(code, None)
+    return rules
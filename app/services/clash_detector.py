@@ -0,0 +1,203 @@
+import heapq
+from sqlalchemy import or_, select
+from app import db
+from app.models import FormSubmission, GeneratedRow
+from app.services import form_processor
+
+# Dates per history query (keeps each IN (...) list well under SQLite's limit)
+_HISTORY_CHUNK_SIZE = 500
+
+# Clashes listed in a report; the total is always counted
+_REPORT_LIMIT = 200
+
+# Booking fields holding the resources a booking occupies, by resource kind
+_RESOURCE_FIELDS = (
+    ('faculty', ('faculty_code', 'faculty_code2')),
+    ('room', ('special_room_code',)),
+)
+
+
+def _minutes(value):
+    """Convert an HH:MM (or HH:MM:SS) time to minutes after midnight, or None"""
+    try:
+        parts = str(value).split(':')
+        hours, minutes = int(parts[0]), int(parts[1])
+    except (IndexError, ValueError):
+        return None
+    if not (0 <= hours <= 24 and 0 <= minutes < 60):
+        return None
+    return hours * 60 + minutes
+
+
+class IntervalIndex:
+    """
+    Bookings of one resource (a faculty or a room) on one date.
+
+    Intervals are collected unsorted and swept once in start order: a heap of
+    the intervals still open at each start point holds exactly those that
+    overlap it, so finding every overlapping pair costs O(n log n + clashes).
+    """
+
+    __slots__ = ('intervals',)
+
+    def __init__(self):
+        self.intervals = []
+
+    def add(self, start, end, booking):
+        """Add a booking occupying [start, end) minutes"""
+        self.intervals.append((start, end, booking))
+
+    def overlaps(self):
+        """
+        Yield every pair of overlapping bookings that involves a new booking
+
+        Back-to-back bookings (one ends when the other starts) do not overlap.
+        Pairs of history bookings are existing clashes and are not reported.
+
+        Yields:
+            Tuple of (earlier booking, later booking)
+        """
+        self.intervals.sort(key=lambda interval: (interval[0], interval[1]))
+        active = []
+        for seq, (start, end, booking) in enumerate(self.intervals):
+            while active and active[0][0] <= start:
+                heapq.heappop(active)
+            for _, _, other in active:
+                if booking['entry'] is not None or other['entry'] is not None:
+                    yield other, booking
+            heapq.heappush(active, (end, seq, booking))
+
+
+def _add_booking(indexes, booking, start, end):
+    """Add a booking to the interval index of each resource it occupies"""
+    for kind, fields in _RESOURCE_FIELDS:
+        codes = {booking.get(field) for field in fields} - {None, ''}
+        for code in codes:
+            key = (kind, code, booking['date'])
+            index = indexes.get(key)
+            if index is None:
+                index = indexes[key] = IntervalIndex()
+            index.add(start, end, booking)
+
+
+def _history_bookings(dates, payload_hash=None):
+    """
+    Load the persisted bookings on the given dates
+
+    Rows of one submission's class share a booking, so distinct
+    (FormID, date, times, resources) combinations are loaded, not rows.
+    Rows saved before booking details were stored have no date and are
+    never returned, nor are rows of earlier generations of payload_hash:
+    regenerating a request books the same class again, not a second one.
+
+    Yields:
+        Booking dicts (with 'entry' None and the history 'form_id')
+    """
+    table = GeneratedRow.__table__
+    submissions = FormSubmission.__table__
+    columns = (
+        table.c.form_id, table.c.scheduled_date, table.c.start_time, table.c.end_time,
+        table.c.faculty_code, table.c.faculty_code2, table.c.request_special_room_code
+    )
+    dates = sorted(dates)
+    for i in range(0, len(dates), _HISTORY_CHUNK_SIZE):
+        chunk = dates[i:i + _HISTORY_CHUNK_SIZE]
+        statement = select(*columns).distinct().where(table.c.scheduled_date.in_(chunk))
+        if payload_hash:
+            statement = statement.outerjoin(submissions, submissions.c.id == table.c.submission_id).where(
+                or_(submissions.c.payload_hash.is_(None), submissions.c.payload_hash != payload_hash)
+            )
+        for form_id, date, start_time, end_time, faculty_code, faculty_code2, room in db.session.execute(statement):
+            yield {
+                'entry': None,
+                'form_id': form_id,
+                'date': date,
+                'start_time': start_time,
+                'end_time': end_time,
+                'faculty_code': faculty_code,
+                'faculty_code2': faculty_code2,
+                'special_room_code': room,
+                'path': None
+            }
+
+
+def _describe(booking):
+    """The public fields of a booking in a clash report"""
+    return {
+        'entry': booking['entry'],
+        'form_id': booking.get('form_id'),
+        'path': booking['path'],
+        'start_time': booking['start_time'],
+        'end_time': booking['end_time']
+    }
+
+
+def find_clashes(entries, include_history=True, payload_hash=None):
+    """
+    Find faculty and room double bookings in a batch of generate entries
+
+    Each entry's bookings (one per session venue of each date) are indexed
+    per (resource, date) together with the persisted bookings on the same
+    dates, then every index is swept for overlapping times. Bookings without
+    valid start and end times cannot be placed and are skipped.
+
+    Args:
+        entries: List of validated generate entry dicts
+        include_history: Also check against rows saved by earlier submissions
+        payload_hash: output_dedup.payload_hash of the request; earlier
+            generations of the same request are not counted as history
+
+    Returns:
+        Dict with 'count' (total clashes) and 'clashes' (at most
+        _REPORT_LIMIT dicts with 'resource', 'code', 'date' and the two
+        'bookings'), ordered by date, resource and code
+    """
+    indexes = {}
+    dates = set()
+
+    for index, entry in enumerate(entries):
+        for booking in form_processor.iter_bookings(entry):
+            start, end = _minutes(booking['start_time']), _minutes(booking['end_time'])
+            if start is None or end is None or end <= start:
+                continue
+            booking['entry'] = index
+            _add_booking(indexes, booking, start, end)
+            dates.add(booking['date'])
+
+    if include_history and dates:
+        for booking in _history_bookings(dates, payload_hash):
+            start, end = _minutes(booking['start_time']), _minutes(booking['end_time'])
+            if start is None or end is None or end <= start:
+                continue
+            _add_booking(indexes, booking, start, end)
+
+    clashes = []
+    count = 0
+    for kind, code, date in sorted(indexes):
+        for first, second in indexes[(kind, code, date)].overlaps():
+            count += 1
+            if len(clashes) < _REPORT_LIMIT:
+                clashes.append({
+                    'resource': kind,
+                    'code': code,
+                    'date': date,
+                    'bookings': [_describe(first), _describe(second)]
+                })
+
+    return {'count': count, 'clashes': clashes}
+
+
+def summarise(report):
+    """
+    Build one user-facing message from a clash report
+
+    Returns:
+        String describing the first clash and how many there are
+    """
+    first = report['clashes'][0]
+    where = ' and '.join(
+        f"entry {booking['entry'] + 1}" if booking['entry'] is not None else f"FormID {booking['form_id']}"
+        for booking in first['bookings']
+    )
+    return (f"{report['count']} faculty/room clash(es) found, e.g. {first['resource']} {first['code']} "
+            f"on {first['date']} is booked by {where} at overlapping times")
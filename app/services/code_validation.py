@@ -0,0 +1,125 @@
+from app.services import glossary_snapshot
+
+# Entry fields holding glossary codes (a single code or a list of codes)
+_ENTRY_FIELDS = (
+    ('academic_session_code', 'academicsession'),
+    ('programme_code', 'programme'),
+    ('activity_code', 'activity'),
+    ('course_codes', 'course'),
+    ('group_codes', 'group'),
+)
+
+# Venue fields holding glossary codes
+_VENUE_FIELDS = (
+    ('faculty_code', 'faculty'),
+    ('faculty_code2', 'faculty'),
+    ('special_room_code', 'specialroom'),
+)
+
+# Number of errors spelled out in the summary message
+_SUMMARY_ERRORS = 5
+
+
+def _code_indexes():
+    """
+    Get the code set of every glossary type the entries refer to
+
+    Types whose glossary has never been loaded (or is empty) are left out,
+    so a missing glossary file does not reject every code of its type.
+
+    Returns:
+        Dict of glossary_type -> frozenset of codes
+    """
+    glossary_types = {glossary_type for _, glossary_type in _ENTRY_FIELDS + _VENUE_FIELDS}
+    versions = glossary_snapshot.get_versions(glossary_types)
+    indexes = {}
+    for glossary_type in glossary_types:
+        codes = glossary_snapshot.get_snapshot(glossary_type, versions[glossary_type]).codes
+        if codes:
+            indexes[glossary_type] = codes
+    return indexes
+
+
+def _iter_venues(week_venue_details):
+    """
+    Yield every venue of an entry's week venue details with its path
+
+    Supports both the old flat format (the date's details are the venue)
+    and the new sessions/venues format.
+
+    Yields:
+        Tuple of (path, venue dict)
+    """
+    if not isinstance(week_venue_details, dict):
+        return
+    for date_key, detail in week_venue_details.items():
+        if not isinstance(detail, dict):
+            continue
+        if 'sessions' not in detail:
+            yield f'week_venue_details[{date_key}]', detail
+            continue
+        for s_idx, session in enumerate(detail['sessions'] or []):
+            for v_idx, venue in enumerate(session.get('venues') or []):
+                if isinstance(venue, dict):
+                    yield f'week_venue_details[{date_key}].sessions[{s_idx}].venues[{v_idx}]', venue
+
+
+def validate_entries(entries):
+    """
+    Check every glossary code in a batch of generate entries
+
+    Each code is one lookup in its glossary's frozenset, so the cost is
+    linear in the number of codes submitted. Empty optional codes
+    (programme, second faculty, special room) are not checked; required
+    fields are _validate_entry's job.
+
+    Args:
+        entries: List of generate entry dicts
+
+    Returns:
+        List of error dicts with 'entry' (index), 'path', 'glossary', 'code'
+        and 'message', in entry order; empty if every code exists
+    """
+    indexes = _code_indexes()
+    errors = []
+
+    def check(index, path, glossary_type, code):
+        codes = indexes.get(glossary_type)
+        if codes is None or not code or (isinstance(code, str) and code in codes):
+            return
+        errors.append({
+            'entry': index,
+            'path': f'entries[{index}].{path}',
+            'glossary': glossary_type,
+            'code': code,
+            'message': f'Entry {index + 1}: {glossary_type} code {code!r} does not exist ({path})'
+        })
+
+    for index, entry in enumerate(entries):
+        for field, glossary_type in _ENTRY_FIELDS:
+            value = entry.get(field)
+            if isinstance(value, list):
+                for c_idx, code in enumerate(value):
+                    check(index, f'{field}[{c_idx}]', glossary_type, code)
+            else:
+                check(index, field, glossary_type, value)
+
+        for path, venue in _iter_venues(entry.get('week_venue_details')):
+            for field, glossary_type in _VENUE_FIELDS:
+                check(index, f'{path}.{field}', glossary_type, venue.get(field))
+
+    return errors
+
+
+def summarise(errors):
+    """
+    Build one user-facing message from a list of code errors
+
+    Returns:
+        String naming the first few unknown codes and how many more there are
+    """
+    shown = '; '.join(error['message'] for error in errors[:_SUMMARY_ERRORS])
+    more = len(errors) - _SUMMARY_ERRORS
+    if more > 0:
+        shown += f'; and {more} more'
+    return f'{len(errors)} code(s) were not found in the glossaries: {shown}'
@@ -0,0 +1,180 @@
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+
+def _timed_call(fn, entry):
+    """
+    Call fn(entry) and return (result, CPU seconds); used as a pool task
+
+    CPU time rather than wall time, so tasks sharing a CPU with other
+    workers are not counted as slower than they would run serially.
+    """
+    started = time.process_time()
+    result = fn(entry)
+    return result, time.process_time() - started
+
+
+def worker_count(config, entry_count, row_count=0):
+    """
+    Number of worker processes to run a generate request's entries in
+
+    Entries are only fanned out when GENERATE_PARALLEL_WORKERS is at least 2
+    and the request reaches GENERATE_PARALLEL_MIN_ENTRIES entries or
+    GENERATE_PARALLEL_MIN_ROWS rows; small requests are cheaper to run serially
+    than to ship to another process.
+
+    Args:
+        config: Flask app config
+        entry_count: Number of entries in the request
+        row_count: Total rows of the entries, if known yet
+
+    Returns:
+        Integer worker count, or 0 to run serially
+    """
+    workers = config.get('GENERATE_PARALLEL_WORKERS', 0)
+    # PyInstaller builds cannot safely spawn child interpreters
+    if getattr(sys, 'frozen', False) or workers < 2 or entry_count < 2:
+        return 0
+
+    min_entries = config.get('GENERATE_PARALLEL_MIN_ENTRIES', 0)
+    min_rows = config.get('GENERATE_PARALLEL_MIN_ROWS', 0)
+    if (min_entries and entry_count >= min_entries) or (min_rows and row_count >= min_rows):
+        return min(workers, entry_count)
+    return 0
+
+
+def forks_workers(config):
+    """
+    Whether requests in this process may fork worker process pools
+
+    Either the entry pool or the parallel xlsx writer, when configured with
+    at least 2 workers. Such a process must not run background threads: a
+    forked worker gets a copy of whatever locks they hold.
+
+    Args:
+        config: Flask app config
+
+    Returns:
+        True if GENERATE_PARALLEL_WORKERS or XLSX_WRITER_WORKERS is 2 or more
+    """
+    if getattr(sys, 'frozen', False):
+        return False
+    return config.get('GENERATE_PARALLEL_WORKERS', 0) >= 2 or config.get('XLSX_WRITER_WORKERS', 0) >= 2
+
+
+class EntryPool:
+    """
+    Runs per-entry work of one request, serially or in worker processes.
+
+    Results always come back in entry order, so everything downstream (FormID
+    pairing, row IDs, the output file) is identical whichever way they were
+    produced. The pool keeps the time spent inside the tasks and the time the
+    request spent waiting for them, which gives the speedup over running the
+    same tasks serially.
+    """
+
+    def __init__(self, workers):
+        """
+        Args:
+            workers: Maximum number of worker processes (started on first parallel map)
+        """
+        self.max_workers = workers
+        self.workers = 0
+        self.tasks = 0
+        self.task_seconds = 0.0
+        self.wait_seconds = 0.0
+        self._executor = None
+        self._started = time.perf_counter()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        """Shut the worker processes down, cancelling any unstarted tasks"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def map(self, fn, entries, workers=None):
+        """
+        Yield fn(entry) for each entry, in order
+
+        With workers, at most twice that many entries are in flight at once,
+        so results are produced ahead of the consumer without all of them
+        being held in memory.
+
+        Args:
+            fn: Module-level function taking one entry (it must be picklable)
+            entries: Iterable of entries
+            workers: Worker processes to use, capped at the pool's maximum;
+                0 or None runs fn in this process as results are consumed
+
+        Yields:
+            Result of fn for each entry
+        """
+        workers = min(workers or 0, self.max_workers)
+        if workers < 2:
+            results = (_timed_call(fn, entry) for entry in entries)
+        else:
+            results = self._parallel_results(fn, entries, workers)
+
+        while True:
+            started = time.perf_counter()
+            try:
+                result, seconds = next(results)
+            except StopIteration:
+                return
+            finally:
+                self.wait_seconds += time.perf_counter() - started
+            self.tasks += 1
+            self.task_seconds += seconds
+            yield result
+
+    def _parallel_results(self, fn, entries, workers):
+        """Yield (result, seconds) of fn over entries computed in worker processes, in order"""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=workers)
+            self.workers = workers
+
+        entries = iter(entries)
+        pending = deque()
+        for entry in entries:
+            pending.append(self._executor.submit(_timed_call, fn, entry))
+            if len(pending) >= workers * 2:
+                break
+
+        while pending:
+            result = pending.popleft().result()
+            for entry in entries:
+                pending.append(self._executor.submit(_timed_call, fn, entry))
+                break
+            yield result
+
+    def metrics(self):
+        """
+        Timing of the work run through the pool
+
+        The serial time is what the request would have taken running every
+        task in-line: its wall time with the time spent waiting on tasks
+        replaced by the time spent inside them.
+
+        Returns:
+            Dict with 'mode', 'workers', 'entry_tasks', 'task_seconds',
+            'wait_seconds', 'wall_seconds' and 'speedup'
+        """
+        wall_seconds = time.perf_counter() - self._started
+        serial_seconds = wall_seconds - self.wait_seconds + self.task_seconds
+        return {
+            'mode': 'parallel' if self.workers else 'serial',
+            'workers': self.workers,
+            'entry_tasks': self.tasks,
+            'task_seconds': round(self.task_seconds, 3),
+            'wait_seconds': round(self.wait_seconds, 3),
+            'wall_seconds': round(wall_seconds, 3),
+            'speedup': round(serial_seconds / wall_seconds, 2) if wall_seconds > 0 else 1.0
+        }
@@ -1,227 +1,414 @@
 import os
+import tempfile
 from datetime import datetime
-from openpyxl import Workbook
+from flask import current_app
+from sqlalchemy import delete, insert, select, update
 from app import db
 from app.models import FormSubmission, GeneratedRow
-from app.services import id_generator
+from app.services import id_generator, output_formats
 
-def generate_excel_file(rows, programme_code):
+def _sheet_values(row_id, form_id, record):
+    """Values of one generated row (a row_batch.FIELDS record), in output_formats.HEADERS order"""
+    (academic_session_code, programme_code, class_commencement, scheduled_date,
+     start_time, end_time, duration, activity_code, group_code_capacity,
+     total_capacity, course_code, course_name, group_code, faculty_code,
+     faculty_code2, special_room_code, recurring_until_week, course_group_seq) = record
+
+    return [
+        row_id,
+        form_id,
+        # Generate CourseGroupID from FormID and sequential number
+        f"{form_id}-{course_group_seq:02d}",
+        academic_session_code,
+        programme_code,
+        class_commencement,
+        scheduled_date,
+        start_time,
+        end_time,
+        duration,
+        activity_code,
+        group_code_capacity,
+        total_capacity,
+        course_code,
+        course_name,
+        group_code,
+        faculty_code,
+        faculty_code2,
+        special_room_code or '',
+        recurring_until_week
+    ]
+
+def _row_params(submission_id, row_id, form_id, record):
+    """Column values of one generated_rows record"""
+    return {
+        'submission_id': submission_id,
+        'row_id': row_id,
+        'form_id': form_id,
+        'academic_session_code': record[0],
+        'programme_code': record[1],
+        'class_commencement': record[2],
+        'duration': record[6],
+        'activity_code': record[7],
+        'capacity': record[9],
+        'course_code': record[10],
+        'group_code': record[12],
+        'faculty_code': record[13],
+        'request_special_room_code': record[15],
+        'recurring_until_week': record[16],
+        'scheduled_date': record[3],
+        'start_time': record[4],
+        'end_time': record[5],
+        'faculty_code2': record[14],
+        'course_name': record[11],
+        'group_code_capacity': record[8],
+        'course_group_seq': record[17]
+    }
+
+def _insert_submissions(form_ids, programme_code, timestamp, file_path, payload_hash=None):
+    """
+    Insert one FormSubmission per FormID, all carrying the request's payload hash
+
+    The submissions go in as a single executemany insert, returning the new
+    ids, which SQLAlchemy batches into multi-row INSERT ... RETURNING.
+
+    Returns:
+        Dict of FormID -> submission id
+    """
+    if not form_ids:
+        return {}
+
+    submissions = FormSubmission.__table__
+    result = db.session.execute(
+        insert(submissions).returning(submissions.c.id, submissions.c.form_id),
+        [
+            {
+                'form_id': form_id,
+                'timestamp': timestamp,
+                'programme_code': programme_code,
+                'generated_file_path': file_path,
+                'payload_hash': payload_hash
+            }
+            for form_id in form_ids
+        ]
+    )
+    return {form_id: submission_id for submission_id, form_id in result}
+
+def _iter_with_ids(tagged_records, row_count, prefix, start_num):
+    """
+    Give each (form_id, record) pair its row ID
+
+    Yields:
+        Tuple of (row_id, form_id, record)
+    """
+    for offset, (form_id, record) in enumerate(tagged_records):
+        if offset >= row_count:
+            raise ValueError(f'More rows were generated than the {row_count} counted')
+        yield f"{prefix}-{start_num + offset:06d}", form_id, record
+
+def _iter_persisted(identified_rows, submission_ids, batch_size):
     """
-    Generate Excel file from expanded row data
+    Pass rows through unchanged, inserting them into generated_rows as they go
+
+    Rows are sent as Core executemany inserts of at most batch_size rows, so
+    only one batch of parameters is held at a time. Each batch is committed
+    straight away, so the database write lock is never held while rows are
+    expanded or the output is written. Rows whose FormID has no submission
+    are written to the sheet but not saved.
+    """
+    table = GeneratedRow.__table__
+    batch = []
+
+    for row_id, form_id, record in identified_rows:
+        submission_id = submission_ids.get(form_id)
+        if submission_id is not None:
+            batch.append(_row_params(submission_id, row_id, form_id, record))
+            if len(batch) >= batch_size:
+                db.session.execute(insert(table), batch)
+                db.session.commit()
+                batch = []
+        yield row_id, form_id, record
+
+    if batch:
+        db.session.execute(insert(table), batch)
+        db.session.commit()
+
+def _delete_submissions(submission_ids):
+    """Delete submissions and their saved rows, after a generation failed part-way"""
+    ids = list(submission_ids)
+    db.session.execute(delete(GeneratedRow.__table__).where(GeneratedRow.__table__.c.submission_id.in_(ids)))
+    db.session.execute(delete(FormSubmission.__table__).where(FormSubmission.__table__.c.id.in_(ids)))
+    db.session.commit()
+
+def _generate(tagged_records, row_count, form_ids, programme_code, timestamp, target, file_path, output_format,
+              payload_hash=None):
+    """
+    Run the generation pipeline: assign IDs, persist and write each row in one pass
+
+    Rows are consumed lazily and never collected, so memory stays bounded by
+    the persistence batch size whatever the row count. Row IDs are reserved
+    before the session writes anything: on SQLite, reserving them afterwards
+    would wait on this session's own write lock.
+
+    The submissions and each batch of rows are committed as they are
+    written, so a long generation never blocks other requests' writes. A
+    saved file's submissions get their file size last, which marks the
+    generation complete (see output_dedup and output_retention); if
+    anything fails, the submissions and rows saved so far are deleted.
 
     Args:
-        rows: List of row dictionaries with form data
-        programme_code: Programme code for filename
+        tagged_records: Iterable of (form_id, record) pairs, records in row_batch.FIELDS order
+        row_count: Exact number of rows the iterable yields
+        form_ids: FormIDs to create submissions for
+        programme_code: Programme code of the submission
+        timestamp: Generation timestamp (YYYYmmdd-HHMMSS)
+        target: File path or writable binary file object for the output
+        file_path: Path stored on the submissions (None if not kept on disk)
+        output_format: output_formats.OutputFormat to write
+        payload_hash: output_dedup.payload_hash of the request, stored on the submissions
+    """
+    prefix, start_num = id_generator.reserve_row_id_range(row_count)
+    submission_ids = _insert_submissions(form_ids, programme_code, timestamp, file_path, payload_hash)
+    db.session.commit()
+
+    try:
+        identified_rows = _iter_persisted(
+            _iter_with_ids(tagged_records, row_count, prefix, start_num),
+            submission_ids,
+            current_app.config.get('GENERATE_BATCH_SIZE', 2000)
+        )
+        output_format.write(target, (_sheet_values(*item) for item in identified_rows))
+
+        # Saved files can now be rebuilt from their rows, and may be evicted
+        if file_path is not None:
+            db.session.execute(
+                update(FormSubmission.__table__)
+                .where(FormSubmission.__table__.c.id.in_(list(submission_ids.values())))
+                .values(file_size=os.path.getsize(file_path))
+            )
+            db.session.commit()
+    except Exception:
+        db.session.rollback()
+        _delete_submissions(submission_ids.values())
+        raise
+
+def _claim_file_path(output_dir, stem, extension):
+    """
+    Create an empty output file with a name no other generation has used
+
+    Names are second-resolution, so a request in the same second as another
+    (or as a since-evicted file still known to the database) gets a numbered
+    suffix. Creating the file exclusively claims the name across workers.
 
     Returns:
-        Tuple of (file_path, form_id)
-    """
-    # Generate FormID (same for all rows)
-    form_id = id_generator.generate_form_id()
-
-    # Generate unique row IDs
-    row_ids = id_generator.generate_row_ids(len(rows))
-
-    # Create Excel workbook
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Pre-DTCT"
-
-    # Write headers
-    headers = [
-        'ID', 'FormID', 'CourseGroupID', 'AcademicSessionCode', 'ProgrammeCode',
-        'ClassCommencement', 'ScheduledDate', 'StartTime', 'EndTime',
-        'Duration', 'ActivityCode', 'GroupCodeCapacity', 'TotalCapacity',
-        'CourseCode', 'CourseName', 'GroupCode', 'FacultyCode', 'FacultyCode2',
-        'RequestSpecialRoomCode', 'RecurringUntilWeek'
-    ]
-    ws.append(headers)
+        Tuple of (filename, file path)
+    """
+    for attempt in range(1, 1000):
+        filename = f"{stem}.{extension}" if attempt == 1 else f"{stem}_{attempt}.{extension}"
+        file_path = os.path.join(output_dir, filename)
+        known = db.session.execute(
+            select(FormSubmission.id).where(FormSubmission.generated_file_path == file_path).limit(1)
+        ).first()
+        if known:
+            continue
+        try:
+            os.close(os.open(file_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        except FileExistsError:
+            continue
+        return filename, file_path
+    raise RuntimeError(f'No free output file name for {stem}')
 
-    # Write data rows
-    for i, row in enumerate(rows):
-        row_id = row_ids[i]
-        # Generate CourseGroupID from FormID and sequential number
-        course_group_id = f"{form_id}-{row['course_group_seq']:02d}"
-        ws.append([
-            row_id,
-            form_id,
-            course_group_id,
-            row['academic_session_code'],
-            row['programme_code'],
-            row['class_commencement'],
-            row['scheduled_date'],
-            row.get('start_time', ''),
-            row.get('end_time', ''),
-            row['duration'],
-            row['activity_code'],
-            row['group_code_capacity'],
-            row['total_capacity'],
-            row['course_code'],
-            row.get('course_name', ''),
-            row['group_code'],
-            row['faculty_code'],
-            row.get('faculty_code2', ''),
-            row['request_special_room_code'] or '',
-            row['recurring_until_week']
-        ])
+def _generate_to_output(tagged_records, row_count, programme_code, form_ids, output, output_format, payload_hash=None):
+    """
+    Generate the file into output, or into a new file in OUTPUT_DIR
+
+    Returns:
+        String filename of generated file
+    """
+    output_format = output_formats.get_format(output_format)
 
     # Generate filename
     timestamp = datetime.now().strftime('%Y%m%d-%H%M%S')
-    filename = f"Pre-DTCT_{programme_code}_{timestamp}.xlsx"
+    stem = f"Pre-DTCT_{programme_code}_{timestamp}"
+    filename = f"{stem}.{output_format.extension}"
 
-    # Ensure output directory exists
-    from flask import current_app
-    output_dir = current_app.config['OUTPUT_DIR']
-    os.makedirs(output_dir, exist_ok=True)
+    # Save the file to the caller's stream, or to the output directory
+    if output is not None:
+        _generate(tagged_records, row_count, form_ids, programme_code, timestamp, output, None, output_format,
+                  payload_hash)
+    else:
+        output_dir = current_app.config['OUTPUT_DIR']
+        os.makedirs(output_dir, exist_ok=True)
 
-    file_path = os.path.join(output_dir, filename)
+        filename, file_path = _claim_file_path(output_dir, stem, output_format.extension)
+        try:
+            _generate(tagged_records, row_count, form_ids, programme_code, timestamp, file_path, file_path,
+                      output_format, payload_hash)
+        except Exception:
+            os.remove(file_path)
+            raise
 
-    # Save Excel file
-    wb.save(file_path)
-    wb.close()
+    return filename
 
-    # Save to database
-    submission = FormSubmission(
-        form_id=form_id,
-        timestamp=timestamp,
-        programme_code=programme_code,
-        generated_file_path=file_path
-    )
-    db.session.add(submission)
-    db.session.flush()
-
-    # Save generated rows
-    for i, row in enumerate(rows):
-        generated_row = GeneratedRow(
-            submission_id=submission.id,
-            row_id=row_ids[i],
-            form_id=form_id,
-            academic_session_code=row['academic_session_code'],
-            programme_code=row['programme_code'],
-            class_commencement=row['class_commencement'],
-            duration=row['duration'],
-            activity_code=row['activity_code'],
-            capacity=row['total_capacity'],
-            course_code=row['course_code'],
-            group_code=row['group_code'],
-            faculty_code=row['faculty_code'],
-            request_special_room_code=row['request_special_room_code'],
-            recurring_until_week=row['recurring_until_week']
-        )
-        db.session.add(generated_row)
+def estimate_output(row_count, form_count, output_format='xlsx'):
+    """
+    Estimate the size of a generated file and how long it takes to produce
 
-    db.session.commit()
+    A linear model calibrated by GENERATE_ESTIMATE_BYTES_PER_ROW and
+    GENERATE_ESTIMATE_ROWS_PER_SECOND for xlsx, scaled by the format's size
+    and speed factors; used by the generate preview and the size limit, so
+    nothing has to be expanded or written to answer.
 
-    return filename, form_id
+    Args:
+        row_count: Total number of generated rows
+        form_count: Number of FormIDs (entries)
+        output_format: Output format name
 
-def generate_excel_file_multiple(all_rows, programme_code, form_ids_list):
+    Returns:
+        Dict with 'file_bytes' and 'seconds'
     """
-    Generate Excel file from multiple entries with different FormIDs
+    bytes_per_row = current_app.config.get('GENERATE_ESTIMATE_BYTES_PER_ROW', 72)
+    rows_per_second = current_app.config.get('GENERATE_ESTIMATE_ROWS_PER_SECOND', 10000)
+    output_format = output_formats.get_format(output_format)
+
+    # An empty workbook is about 5 KB; each submission costs one insert
+    return {
+        'file_bytes': 5000 + int(row_count * bytes_per_row * output_format.size_factor),
+        'seconds': round((row_count / output_format.speed_factor + form_count) / rows_per_second, 1)
+    }
+
+def generate_excel_file_from_batches(entry_batches, row_count, programme_code, form_ids_list, output=None,
+                                     output_format='xlsx', payload_hash=None):
+    """
+    Generate Excel file (or another output format) from the RowBatches of multiple entries
 
     Args:
-        all_rows: List of all row dictionaries from all entries (with form_id_temp)
+        entry_batches: Iterable of RowBatch, one per FormID in form_ids_list;
+            may be a generator that builds each batch as it is reached
+        row_count: Total number of rows across the batches
         programme_code: Programme code for filename
         form_ids_list: List of FormIDs for each entry
+        output: Optional writable binary file object; when given, the file
+            is written there instead of to OUTPUT_DIR
+        output_format: Output format name (see output_formats.available_formats)
+        payload_hash: output_dedup.payload_hash of the request, so an identical
+            request can reuse this file
 
     Returns:
-        String filename of generated Excel file
-    """
-    # Generate unique row IDs for all rows
-    row_ids = id_generator.generate_row_ids(len(all_rows))
-
-    # Create Excel workbook
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Pre-DTCT"
-
-    # Write headers
-    headers = [
-        'ID', 'FormID', 'CourseGroupID', 'AcademicSessionCode', 'ProgrammeCode',
-        'ClassCommencement', 'ScheduledDate', 'StartTime', 'EndTime',
-        'Duration', 'ActivityCode', 'GroupCodeCapacity', 'TotalCapacity',
-        'CourseCode', 'CourseName', 'GroupCode', 'FacultyCode', 'FacultyCode2',
-        'RequestSpecialRoomCode', 'RecurringUntilWeek'
-    ]
-    ws.append(headers)
+        String filename of generated file
+    """
+    tagged_records = (
+        (form_id, record)
+        for form_id, batch in zip(form_ids_list, entry_batches)
+        for record in batch.records()
+    )
+    return _generate_to_output(
+        tagged_records, row_count, programme_code, form_ids_list, output, output_format, payload_hash
+    )
 
-    # Write data rows
-    for i, row in enumerate(all_rows):
-        row_id = row_ids[i]
-        form_id = row.get('form_id_temp', '')  # Get the temporary FormID assigned earlier
-        # Generate CourseGroupID from FormID and sequential number
-        course_group_id = f"{form_id}-{row['course_group_seq']:02d}"
-
-        ws.append([
-            row_id,
-            form_id,
-            course_group_id,
-            row['academic_session_code'],
-            row['programme_code'],
-            row['class_commencement'],
-            row['scheduled_date'],
-            row.get('start_time', ''),
-            row.get('end_time', ''),
-            row['duration'],
-            row['activity_code'],
-            row['group_code_capacity'],
-            row['total_capacity'],
-            row['course_code'],
-            row.get('course_name', ''),
-            row['group_code'],
-            row['faculty_code'],
-            row.get('faculty_code2', ''),
-            row['request_special_room_code'] or '',
-            row['recurring_until_week']
-        ])
+def _stored_records(condition):
+    """
+    Stream the saved rows of the submissions matching condition, in file order
 
-    # Generate filename
-    timestamp = datetime.now().strftime('%Y%m%d-%H%M%S')
-    filename = f"Pre-DTCT_{programme_code}_{timestamp}.xlsx"
-
-    # Ensure output directory exists
-    from flask import current_app
-    output_dir = current_app.config['OUTPUT_DIR']
-    os.makedirs(output_dir, exist_ok=True)
-
-    file_path = os.path.join(output_dir, filename)
-
-    # Save Excel file
-    wb.save(file_path)
-    wb.close()
-
-    # Save to database
-    # Create a submission for each FormID
-    for form_id in form_ids_list:
-        submission = FormSubmission(
-            form_id=form_id,
-            timestamp=timestamp,
-            programme_code=programme_code,
-            generated_file_path=file_path
+    Rows are fetched through a server-side cursor in GENERATE_BATCH_SIZE
+    batches, so memory does not grow with the number of rows.
+
+    Args:
+        condition: SQL condition on form_submissions
+
+    Yields:
+        Tuple of (row_id, form_id, record), records in row_batch.FIELDS order
+    """
+    rows = GeneratedRow.__table__
+    submissions = FormSubmission.__table__
+    statement = (
+        select(
+            rows.c.row_id, rows.c.form_id,
+            rows.c.academic_session_code, rows.c.programme_code, rows.c.class_commencement,
+            rows.c.scheduled_date, rows.c.start_time, rows.c.end_time, rows.c.duration,
+            rows.c.activity_code, rows.c.group_code_capacity, rows.c.capacity, rows.c.course_code,
+            rows.c.course_name, rows.c.group_code, rows.c.faculty_code, rows.c.faculty_code2,
+            rows.c.request_special_room_code, rows.c.recurring_until_week, rows.c.course_group_seq
         )
-        db.session.add(submission)
-        db.session.flush()
-
-        # Save generated rows for this FormID
-        for i, row in enumerate(all_rows):
-            if row.get('form_id_temp') == form_id:
-                generated_row = GeneratedRow(
-                    submission_id=submission.id,
-                    row_id=row_ids[i],
-                    form_id=form_id,
-                    academic_session_code=row['academic_session_code'],
-                    programme_code=row['programme_code'],
-                    class_commencement=row['class_commencement'],
-                    duration=row['duration'],
-                    activity_code=row['activity_code'],
-                    capacity=row['total_capacity'],
-                    course_code=row['course_code'],
-                    group_code=row['group_code'],
-                    faculty_code=row['faculty_code'],
-                    request_special_room_code=row['request_special_room_code'],
-                    recurring_until_week=row['recurring_until_week']
-                )
-                db.session.add(generated_row)
+        .join(submissions, rows.c.submission_id == submissions.c.id)
+        .where(condition)
+        .order_by(rows.c.id)
+    )
+    result = db.session.execute(statement, execution_options={
+        'stream_results': True,
+        'yield_per': current_app.config.get('GENERATE_BATCH_SIZE', 2000)
+    })
+    for row in result:
+        yield row[0], row[1], tuple(row[2:])
 
-    db.session.commit()
+def rebuild_file(file_path):
+    """
+    Write a generated file again from its saved rows
 
-    return filename
+    The rows are written in the order they were generated, with the same
+    IDs, in the format of the file's extension; the file is replaced
+    atomically, so a concurrent download never sees a partial file.
+
+    Args:
+        file_path: Path stored on the generation's submissions
+
+    Raises:
+        ValueError: If the extension is not a known output format
+    """
+    output_format = output_formats.format_for_filename(file_path)
+    condition = FormSubmission.__table__.c.generated_file_path == file_path
+    # A unique temporary file beside the target: os.replace is only atomic within a filesystem
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(file_path), suffix='.tmp')
+    os.close(fd)
+    try:
+        output_format.write(temp_path, (_sheet_values(*item) for item in _stored_records(condition)))
+        os.replace(temp_path, file_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+def export_submission(form_id, output, output_format='xlsx'):
+    """
+    Rebuild the file a submission was generated in from the database, in any format
+
+    A submission saved to OUTPUT_DIR exports its whole generation (every
+    FormID of the file, with the same row IDs); a streamed one, whose
+    generation is not recorded, exports its own rows.
+
+    Args:
+        form_id: FormID of the submission
+        output: Writable binary file object
+        output_format: Output format name (see output_formats.available_formats)
+
+    Returns:
+        String filename of the export, or None if there is no such submission
+
+    Raises:
+        ValueError: If the format is unknown, or the rows were saved before
+            every column was stored
+    """
+    output_format = output_formats.get_format(output_format)
+    submission = FormSubmission.query.filter_by(form_id=form_id).order_by(FormSubmission.id.desc()).first()
+    if submission is None:
+        return None
+
+    submissions = FormSubmission.__table__
+    if submission.generated_file_path:
+        condition = submissions.c.generated_file_path == submission.generated_file_path
+        filename = os.path.basename(submission.generated_file_path)
+        stem = filename[:-len(output_formats.format_for_filename(filename).extension) - 1]
+    else:
+        condition = submissions.c.id == submission.id
+        stem = f"Pre-DTCT_{submission.programme_code}_{submission.timestamp}"
+
+    rows = GeneratedRow.__table__
+    incomplete = db.session.execute(
+        select(rows.c.id)
+        .join(submissions, rows.c.submission_id == submissions.c.id)
+        .where(condition, rows.c.course_group_seq.is_(None))
+        .limit(1)
+    ).first()
+    if incomplete:
+        raise ValueError(f'FormID {form_id} was generated before complete rows were stored and cannot be exported')
+
+    output_format.write(output, (_sheet_values(*item) for item in _stored_records(condition)))
+    return f"{stem}.{output_format.extension}"
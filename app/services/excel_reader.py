@@ -1,98 +1,380 @@
+import csv
+import gzip
+import hashlib
 import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from flask import current_app, has_app_context
 from openpyxl import load_workbook
+from sqlalchemy import bindparam, delete, insert, select, update
 from app import db
 from app.models import GlossaryCache, GlossaryMeta
+from app.services import glossary_changes, glossary_snapshot, xlsx_stream_reader
 
-def load_glossary(file_path, glossary_type):
+# Maximum number of codes per DELETE ... IN (...) statement
+_DIFF_CHUNK_SIZE = 500
+
+# Delimited text glossary formats (optionally gzip-compressed) and their delimiters
+_TEXT_DELIMITERS = {'csv': ',', 'tsv': '\t'}
+
+def _row_values(row, glossary_type):
+    """
+    Apply the per-type column rules to one spreadsheet row
+
+    Args:
+        row: Tuple of cell values (header row excluded)
+        glossary_type: Type of glossary
+
+    Returns:
+        Tuple of (code, description, commencement_week_1, commencement_week_2),
+        or None if the row has no code. Week columns are None for every type
+        except academicsession.
+    """
+    if not row or not row[0]:
+        return None
+
+    # Activity glossary has columns swapped: Activity Name (col 0), Activity Code (col 1)
+    if glossary_type == 'activity':
+        code = str(row[1]).strip() if len(row) > 1 and row[1] else ''
+        description = str(row[0]).strip() if row[0] else ''
+        week1 = week2 = None
+    elif glossary_type == 'academicsession':
+        # Academic session has additional columns: Commencement Week 1 (col 2), Week 2 (col 3)
+        code = str(row[0]).strip() if row[0] else ''
+        description = str(row[1]).strip() if len(row) > 1 and row[1] else ''
+        week1 = str(row[2]).strip() if len(row) > 2 and row[2] else ''
+        week2 = str(row[3]).strip() if len(row) > 3 and row[3] else ''
+    else:
+        code = str(row[0]).strip() if row[0] else ''
+        description = str(row[1]).strip() if len(row) > 1 and row[1] else ''
+        week1 = week2 = None
+
+    if not code:
+        return None
+    return (code, description, week1, week2)
+
+def _collect_rows(sheet_rows, glossary_type):
+    """Apply the column rules to an iterable of sheet rows, dropping rows without a code"""
+    rows = []
+    for row in sheet_rows:
+        values = _row_values(row, glossary_type)
+        if values:
+            rows.append(values)
+    return rows
+
+def glossary_file_extension(filename):
+    """Return the lowercase extension of a glossary file, keeping a trailing gz (e.g. 'csv.gz')"""
+    parts = os.path.basename(filename).lower().split('.')
+    if len(parts) > 2 and parts[-1] == 'gz':
+        return '.'.join(parts[-2:])
+    return parts[-1] if len(parts) > 1 else ''
+
+def glossary_file_stem(filename):
+    """Return a glossary filename without its extension (including any .gz)"""
+    extension = glossary_file_extension(filename)
+    return filename[:-(len(extension) + 1)] if extension else filename
+
+def find_glossary_files(glossary_dir, filename, extensions):
+    """
+    List the files on disk holding a glossary, in any of the given formats
+
+    GLOSSARY_FILES names each glossary's xlsx file; a CSV or TSV export saved
+    under the same stem (e.g. glossary_sgcm_coursecode.csv.gz) is the same
+    glossary in another format.
+
+    Args:
+        glossary_dir: Glossary directory
+        filename: Configured glossary filename
+        extensions: Allowed extensions (ALLOWED_EXTENSIONS)
+
+    Returns:
+        List of existing paths, most recently modified first
+    """
+    stem = glossary_file_stem(filename)
+    paths = [
+        os.path.join(glossary_dir, f"{stem}.{extension}")
+        for extension in sorted(extensions)
+    ]
+    return sorted((path for path in paths if os.path.exists(path)), key=os.path.getmtime, reverse=True)
+
+def _iter_text_rows(file_path, extension):
+    """Stream the data rows of a CSV/TSV file (optionally gzip-compressed), skipping the header"""
+    delimiter = _TEXT_DELIMITERS[extension.split('.')[0]]
+    opener = gzip.open if extension.endswith('.gz') else open
+    with opener(file_path, 'rt', encoding='utf-8-sig', newline='') as f:
+        reader = csv.reader(f, delimiter=delimiter)
+        next(reader, None)
+        yield from reader
+
+def read_glossary_rows(file_path, glossary_type, engine='openpyxl'):
+    """
+    Read a glossary file (Excel, CSV or TSV) into plain row tuples
+
+    Runs in worker processes when parallel parsing is enabled, so it only
+    returns picklable tuples and never touches the database.
+
+    Args:
+        file_path: Path to glossary file
+        glossary_type: Type of glossary
+        engine: For xlsx files, 'stream' to read the XML directly (falls back
+            to openpyxl for files it cannot read), or 'openpyxl'
+
+    Returns:
+        List of (code, description, commencement_week_1, commencement_week_2) tuples
+
+    Raises:
+        Exception: If the file cannot be read
+    """
+    extension = glossary_file_extension(file_path)
+    if extension.split('.')[0] in _TEXT_DELIMITERS:
+        return _collect_rows(_iter_text_rows(file_path, extension), glossary_type)
+
+    if engine == 'stream':
+        try:
+            return _collect_rows(xlsx_stream_reader.iter_rows(file_path, min_row=2, max_col=4), glossary_type)
+        except Exception as e:
+            print(f"Streaming parser could not read {file_path} ({e}); falling back to openpyxl")
+
+    wb = load_workbook(file_path, read_only=True)
+    try:
+        return _collect_rows(wb.active.iter_rows(min_row=2, values_only=True), glossary_type)
+    finally:
+        wb.close()
+
+def parse_glossary_rows(file_path, glossary_type, engine='openpyxl'):
+    """
+    Read a glossary file into plain row tuples, or none if it cannot be read
+
+    Args:
+        file_path: Path to glossary file
+        glossary_type: Type of glossary
+        engine: Parser engine, as for read_glossary_rows
+
+    Returns:
+        List of (code, description, commencement_week_1, commencement_week_2) tuples
+    """
+    try:
+        return read_glossary_rows(file_path, glossary_type, engine)
+    except Exception as e:
+        print(f"Error loading glossary {file_path}: {e}")
+        return []
+
+def _rows_to_items(rows, glossary_type):
+    """Convert row tuples from parse_glossary_rows into glossary dicts"""
+    if glossary_type == 'academicsession':
+        return [
+            {'code': code, 'description': description,
+             'commencement_week_1': week1, 'commencement_week_2': week2}
+            for code, description, week1, week2 in rows
+        ]
+    return [{'code': code, 'description': description} for code, description, _, _ in rows]
+
+def load_glossary(file_path, glossary_type, engine=None):
     """
     Read a glossary Excel file and return data as list of dicts
 
     Args:
         file_path: Path to Excel file
         glossary_type: Type of glossary (academicsession, programme, etc.)
+        engine: Parser engine; defaults to the GLOSSARY_PARSER config value
 
     Returns:
         List of dicts with 'code' and 'description' keys
         For academicsession type, also includes 'commencement_week_1' and 'commencement_week_2'
     """
+    if engine is None:
+        engine = current_app.config.get('GLOSSARY_PARSER', 'openpyxl') if has_app_context() else 'openpyxl'
+    return _rows_to_items(parse_glossary_rows(file_path, glossary_type, engine), glossary_type)
+
+def _timed_parse(file_path, glossary_type, engine):
+    """
+    Parse a glossary file; used as a pool task
+
+    Returns:
+        Tuple of (rows, seconds, error): rows is None and error the message
+        if the file could not be read
+    """
+    started = time.perf_counter()
     try:
-        wb = load_workbook(file_path, read_only=True)
-        ws = wb.active
-        data = []
-
-        for row in ws.iter_rows(min_row=2, values_only=True):
-            if not row or not row[0]:
-                continue
-
-            # Activity glossary has columns swapped: Activity Name (col 0), Activity Code (col 1)
-            if glossary_type == 'activity':
-                code = str(row[1]).strip() if len(row) > 1 and row[1] else ''
-                description = str(row[0]).strip() if row[0] else ''
-                item = {'code': code, 'description': description}
-            elif glossary_type == 'academicsession':
-                # Academic session has additional columns: Commencement Week 1 (col 2), Week 2 (col 3)
-                code = str(row[0]).strip() if row[0] else ''
-                description = str(row[1]).strip() if len(row) > 1 and row[1] else ''
-                week1 = str(row[2]).strip() if len(row) > 2 and row[2] else ''
-                week2 = str(row[3]).strip() if len(row) > 3 and row[3] else ''
-                item = {
-                    'code': code,
-                    'description': description,
-                    'commencement_week_1': week1,
-                    'commencement_week_2': week2
-                }
-            else:
-                code = str(row[0]).strip() if row[0] else ''
-                description = str(row[1]).strip() if len(row) > 1 and row[1] else ''
-                item = {'code': code, 'description': description}
-
-            if code:
-                data.append(item)
+        rows = read_glossary_rows(file_path, glossary_type, engine)
+    except Exception as e:
+        return None, time.perf_counter() - started, str(e)
+    return rows, time.perf_counter() - started, None
 
-        wb.close()
-        return data
+def _collect_result(future):
+    """Result of a _timed_parse future, with a failed worker reported as a parse failure"""
+    try:
+        return future.result()
     except Exception as e:
-        print(f"Error loading glossary {file_path}: {e}")
-        return []
+        return None, 0.0, str(e)
+
+def _parse_worker_count(app, file_count):
+    """Number of parse processes to use, or 0 for serial parsing"""
+    workers = app.config.get('GLOSSARY_PARSE_WORKERS', 0)
+    # PyInstaller builds cannot safely spawn child interpreters
+    if getattr(sys, 'frozen', False) or file_count < 2 or workers < 2:
+        return 0
+    return min(workers, file_count)
+
+def _parse_all(app, pending):
+    """
+    Parse the pending glossary files, in a process pool when configured
+
+    Args:
+        app: Flask application instance
+        pending: List of (glossary_type, file_path) tuples
+
+    Returns:
+        Dict of glossary_type -> (rows, parse seconds, error) as returned by _timed_parse
+    """
+    workers = _parse_worker_count(app, len(pending))
+    engine = app.config.get('GLOSSARY_PARSER', 'openpyxl')
+    started = time.perf_counter()
+
+    if workers:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                glossary_type: executor.submit(_timed_parse, file_path, glossary_type, engine)
+                for glossary_type, file_path in pending
+            }
+            results = {glossary_type: _collect_result(future) for glossary_type, future in futures.items()}
+    else:
+        results = {
+            glossary_type: _timed_parse(file_path, glossary_type, engine)
+            for glossary_type, file_path in pending
+        }
+
+    if pending:
+        wall_seconds = time.perf_counter() - started
+        summed_seconds = sum(seconds for _, seconds, _ in results.values())
+        mode = f"{engine} parser, " + (f"{workers} worker processes" if workers else "serial")
+        print(f"Parsed {len(pending)} glossary files in {wall_seconds:.2f}s ({mode}; "
+              f"{summed_seconds:.2f}s summed per-file parse time)")
+
+    return results
+
+def _hash_file(file_path):
+    """Return the SHA-256 hex digest of a file's content"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _fingerprint_matches(meta, file_path):
+    """
+    Check whether a glossary file is unchanged since it was last loaded.
+
+    Size and mtime are compared first; the content hash is only computed when
+    the size matches but the mtime moved (e.g. the file was copied or touched).
+
+    Args:
+        meta: GlossaryMeta row for the type, or None
+        file_path: Path to the glossary file
+
+    Returns:
+        Tuple of (unchanged (bool), content hash if it was computed, else None)
+    """
+    if not meta or not meta.content_hash:
+        return False, None
+
+    stat = os.stat(file_path)
+    if meta.file_size != stat.st_size:
+        return False, None
+    if meta.file_mtime == stat.st_mtime:
+        return True, meta.content_hash
+
+    content_hash = _hash_file(file_path)
+    if content_hash != meta.content_hash:
+        return False, content_hash
+
+    # Same content under a new mtime: remember it so the next check is cheap
+    meta.file_mtime = stat.st_mtime
+    return True, content_hash
+
+def record_fingerprint(glossary_type, file_path, content_hash=None):
+    """
+    Store the size, mtime and content hash of the file loaded for a type.
+
+    The caller is responsible for committing.
+
+    Args:
+        glossary_type: Type of glossary
+        file_path: Path to the glossary file that was loaded
+        content_hash: Precomputed SHA-256 digest, if already known
+    """
+    meta = GlossaryMeta.query.filter_by(glossary_type=glossary_type).first()
+    if not meta:
+        meta = GlossaryMeta(glossary_type=glossary_type, entry_count=0)
+        db.session.add(meta)
+
+    stat = os.stat(file_path)
+    meta.file_size = stat.st_size
+    meta.file_mtime = stat.st_mtime
+    meta.content_hash = content_hash or _hash_file(file_path)
 
 def load_all_glossaries(app):
     """
     Load all glossary files into database cache
 
+    Each glossary may be an xlsx file or a CSV/TSV export (optionally
+    gzipped) saved under the configured filename's stem. Files whose fingerprint matches the one stored in GlossaryMeta are skipped.
+
     Args:
         app: Flask application instance
     """
     glossary_dir = app.config['GLOSSARY_DIR']
     glossary_files = app.config['GLOSSARY_FILES']
+    extensions = app.config.get('ALLOWED_EXTENSIONS', set())
 
     print("Loading glossary files into database cache...")
 
+    # Work out which files changed since they were last loaded
+    pending = []
+    content_hashes = {}
     for glossary_type, filename in glossary_files.items():
-        file_path = os.path.join(glossary_dir, filename)
+        candidates = find_glossary_files(glossary_dir, filename, extensions)
 
-        if not os.path.exists(file_path):
-            print(f"Warning: Glossary file not found: {file_path}")
+        if not candidates:
+            print(f"Warning: Glossary file not found: {os.path.join(glossary_dir, filename)}")
             continue
 
-        data = load_glossary(file_path, glossary_type)
+        # If the same glossary exists in several formats, the newest file wins
+        file_path = candidates[0]
 
-        # Clear existing entries for this glossary type before reloading
-        deleted_count = GlossaryCache.query.filter_by(glossary_type=glossary_type).delete()
-        if deleted_count > 0:
-            print(f"Cleared {deleted_count} existing entries for {glossary_type}")
-
-        # Insert fresh data from Excel file
-        for item in data:
-            entry = GlossaryCache(
-                glossary_type=glossary_type,
-                code=item['code'],
-                description=item['description'],
-                commencement_week_1=item.get('commencement_week_1'),
-                commencement_week_2=item.get('commencement_week_2')
-            )
-            db.session.add(entry)
+        # Skip files whose content is unchanged since they were last loaded
+        meta = GlossaryMeta.query.filter_by(glossary_type=glossary_type).first()
+        unchanged, content_hashes[glossary_type] = _fingerprint_matches(meta, file_path)
+        if unchanged:
+            print(f"Skipped {glossary_type}: unchanged since last load")
+            continue
+
+        pending.append((glossary_type, file_path))
 
-        print(f"Loaded {len(data)} entries for {glossary_type}")
+    parsed = _parse_all(app, pending)
+
+    for glossary_type, file_path in pending:
+        rows, parse_seconds, error = parsed[glossary_type]
+        if rows is None:
+            print(f"Warning: Could not parse {file_path} ({error}); keeping cached {glossary_type} entries")
+            continue
+        data = _rows_to_items(rows, glossary_type)
+
+        # An unreadable or half-written file parses to nothing: keep the
+        # cached entries and leave the fingerprint so the next load retries
+        if not data:
+            print(f"Warning: No valid entries found in {file_path}; keeping cached {glossary_type} entries")
+            continue
+
+        # Apply only the rows that differ from the current cache
+        counts = apply_glossary_diff(glossary_type, data)
+        if counts['inserted'] or counts['updated'] or counts['deleted']:
+            _publish_changes(glossary_type, counts)
+        record_fingerprint(glossary_type, file_path, content_hashes[glossary_type])
+
+        print(f"Loaded {counts['count']} entries for {glossary_type} (parsed in {parse_seconds:.2f}s; "
+              f"{counts['inserted']} inserted, {counts['updated']} updated, {counts['deleted']} deleted)")
 
     try:
         db.session.commit()
@@ -117,53 +399,144 @@ def load_all_glossaries(app):
         db.session.rollback()
         print(f"Error seeding glossary metadata: {e}")
 
-def reload_single_glossary(glossary_type, file_path):
+def _upsert_statement(table, value_columns):
     """
-    Reload a single glossary from an Excel file into the database cache.
+    Build a set-based upsert for glossary_cache keyed on (glossary_type, code)
 
-    Parses the file first for validation, then replaces cache entries.
+    Returns:
+        Insert statement with ON CONFLICT DO UPDATE, or None if the dialect
+        has no native upsert
+    """
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        return None
+
+    stmt = dialect_insert(table)
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.glossary_type, table.c.code],
+        set_={column: stmt.excluded[column] for column in value_columns}
+    )
+
+def apply_glossary_diff(glossary_type, data):
+    """
+    Bring the cache for one glossary type in line with freshly parsed data.
+
+    Compares the parsed entries with the current cache rows and only writes
+    the differences, using set-based Core statements (executemany) inside the
+    caller's transaction. The caller is responsible for committing.
 
     Args:
-        glossary_type: Type of glossary (e.g. 'course', 'group')
-        file_path: Path to the Excel file
+        glossary_type: Type of glossary
+        data: List of dicts as returned by load_glossary
 
     Returns:
-        dict with 'success' (bool), 'count' (int), and optionally 'error' (str)
+        dict with 'count' (distinct codes now cached), 'inserted', 'updated'
+        and 'deleted' counts, plus 'changed_codes' (inserted or updated) and
+        'removed_codes' lists
     """
-    try:
-        data = load_glossary(file_path, glossary_type)
-        if not data:
-            return {'success': False, 'count': 0, 'error': 'No valid entries found in the uploaded file'}
+    table = GlossaryCache.__table__
+    value_columns = ('description', 'commencement_week_1', 'commencement_week_2')
+
+    existing = {
+        row.code: (row.description, row.commencement_week_1, row.commencement_week_2)
+        for row in db.session.execute(
+            select(table.c.code, *[table.c[column] for column in value_columns])
+            .where(table.c.glossary_type == glossary_type)
+        )
+    }
+
+    # Later duplicates of a code win, matching the order of the file
+    incoming = {}
+    for item in data:
+        incoming[item['code']] = (
+            item['description'],
+            item.get('commencement_week_1'),
+            item.get('commencement_week_2')
+        )
 
-        # Delete old cache entries and insert new ones
-        GlossaryCache.query.filter_by(glossary_type=glossary_type).delete()
+    inserted = [code for code in incoming if code not in existing]
+    updated = [code for code, values in incoming.items() if code in existing and existing[code] != values]
+    deleted = [code for code in existing if code not in incoming]
 
-        for item in data:
-            entry = GlossaryCache(
-                glossary_type=glossary_type,
-                code=item['code'],
-                description=item['description'],
-                commencement_week_1=item.get('commencement_week_1'),
-                commencement_week_2=item.get('commencement_week_2')
+    for start in range(0, len(deleted), _DIFF_CHUNK_SIZE):
+        db.session.execute(
+            delete(table).where(
+                table.c.glossary_type == glossary_type,
+                table.c.code.in_(deleted[start:start + _DIFF_CHUNK_SIZE])
             )
-            db.session.add(entry)
+        )
 
-        db.session.commit()
-        return {'success': True, 'count': len(data)}
+    def params(codes):
+        return [
+            {'glossary_type': glossary_type, 'code': code, **dict(zip(value_columns, incoming[code]))}
+            for code in codes
+        ]
 
-    except Exception as e:
-        db.session.rollback()
-        return {'success': False, 'count': 0, 'error': str(e)}
+    upsert = _upsert_statement(table, value_columns)
+    if upsert is not None:
+        if inserted or updated:
+            db.session.execute(upsert, params(inserted + updated))
+    else:
+        if inserted:
+            db.session.execute(insert(table), params(inserted))
+        if updated:
+            db.session.execute(
+                update(table)
+                .where(table.c.glossary_type == glossary_type, table.c.code == bindparam('b_code'))
+                .values({column: bindparam(column) for column in value_columns}),
+                [{'b_code': code, **dict(zip(value_columns, incoming[code]))} for code in updated]
+            )
+
+    return {
+        'count': len(incoming),
+        'inserted': len(inserted),
+        'updated': len(updated),
+        'deleted': len(deleted),
+        'changed_codes': inserted + updated,
+        'removed_codes': deleted
+    }
+
+def _publish_changes(glossary_type, diff):
+    """Bump the glossary version and log the changed codes for delta sync"""
+    revision = glossary_snapshot.bump_version(glossary_type)
+    glossary_changes.record_changes(glossary_type, revision, diff['changed_codes'], diff['removed_codes'])
 
-def get_glossary_data(glossary_type):
+def reload_single_glossary(glossary_type, file_path):
     """
-    Get glossary data from database cache
+    Reload a single glossary from an Excel, CSV or TSV file into the database cache.
+
+    Parses the file first for validation, then applies only the changed
+    cache entries.
 
     Args:
-        glossary_type: Type of glossary to retrieve
+        glossary_type: Type of glossary (e.g. 'course', 'group')
+        file_path: Path to the glossary file
 
     Returns:
-        List of dicts with 'code' and 'description' keys
+        dict with 'success' (bool), 'count' (int), 'inserted'/'updated'/'deleted'
+        counts (int), and optionally 'error' (str)
     """
-    entries = GlossaryCache.query.filter_by(glossary_type=glossary_type).all()
-    return [entry.to_dict() for entry in entries]
+    try:
+        data = load_glossary(file_path, glossary_type)
+        if not data:
+            return {'success': False, 'count': 0, 'error': 'No valid entries found in the uploaded file'}
+
+        counts = apply_glossary_diff(glossary_type, data)
+        _publish_changes(glossary_type, counts)
+        record_fingerprint(glossary_type, file_path)
+        db.session.commit()
+        return {
+            'success': True,
+            'count': counts['count'],
+            'inserted': counts['inserted'],
+            'updated': counts['updated'],
+            'deleted': counts['deleted']
+        }
+
+    except Exception as e:
+        db.session.rollback()
+        return {'success': False, 'count': 0, 'error': str(e)}
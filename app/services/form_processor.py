@@ -1,6 +1,7 @@
 import math
 from itertools import product
-from datetime import datetime, timedelta
+from app.services import academic_calendar
+from app.services.row_batch import RowBatch
 
 
 def calculate_recurring_dates(start_date_str, week_count, excluded_dates):
@@ -14,6 +15,9 @@ def calculate_recurring_dates(start_date_str, week_count, excluded_dates):
     If a date is excluded without a replacement, that week is skipped entirely
     (no additional week is added to compensate).
 
+    Results are memoised by academic_calendar, so entries sharing a start
+    date, week count and exclusions are only computed once per process.
+
     Args:
         start_date_str: Start date in YYYY-MM-DD format
         week_count: Number of weeks to iterate through
@@ -24,43 +28,9 @@ def calculate_recurring_dates(start_date_str, week_count, excluded_dates):
     Returns:
         List of date strings in YYYY-MM-DD format (using replacement dates where specified)
     """
-    result = []
-
-    if not start_date_str or week_count < 1:
-        return result
-
-    # Build lookup for excluded dates and their replacements
-    # Handle both old format (list of strings) and new format (list of objects)
-    excluded_map = {}
-    for item in (excluded_dates or []):
-        if isinstance(item, str):
-            # Old format: just a date string, no replacement
-            excluded_map[item] = None
-        elif isinstance(item, dict) and 'date' in item:
-            # New format: object with date and replacement
-            excluded_map[item['date']] = item.get('replacement')
-
-    start_date = datetime.strptime(start_date_str, '%Y-%m-%d')
-    current_date = start_date
-
-    # Iterate through exactly week_count weeks
-    for _ in range(week_count):
-        date_str = current_date.strftime('%Y-%m-%d')
-
-        if date_str in excluded_map:
-            # This date is excluded
-            replacement = excluded_map[date_str]
-            if replacement:
-                # Use replacement date instead
-                result.append(replacement)
-            # If no replacement, skip this week entirely (don't add to result)
-        else:
-            result.append(date_str)
-
-        # Move to next week
-        current_date += timedelta(days=7)
-
-    return result
+    return list(academic_calendar.recurring_dates(
+        start_date_str, week_count, academic_calendar.exclusion_key(excluded_dates)
+    ))
 
 
 def normalise_week_venue_details(details):
@@ -87,16 +57,17 @@ def normalise_week_venue_details(details):
     return normalised
 
 
-def expand_rows(form_data):
+def _prepare_expansion(form_data):
     """
-    Expand multi-select fields into separate rows using Cartesian product.
-    Expands by recurring weeks, sessions, and venues.
+    Resolve everything row expansion needs from the form data
+
+    Done eagerly, so invalid form data raises before any row is produced.
 
     Args:
         form_data: Dictionary containing form fields including multi-select arrays
 
     Returns:
-        List of row dictionaries with expanded combinations
+        Dict of the expansion inputs, used by _build_batch and count_rows
     """
     courses = form_data.get('course_codes', [])
     groups = form_data.get('group_codes', [])
@@ -140,16 +111,8 @@ def expand_rows(form_data):
         # Extract just the date strings if full objects passed
         recurring_dates = [d['date'] if isinstance(d, dict) else d for d in recurring_dates]
 
-    # Create Cartesian product of courses, groups, AND dates
-    combinations = list(product(courses, groups, recurring_dates))
-
-    # Build rows with all combinations
-    rows = []
     group_capacities = form_data.get('group_capacities', {})
 
-    # Calculate total capacity across all groups
-    total_capacity = sum(group_capacities.values())
-
     # Generate CourseGroupID mapping for unique course-group combinations
     course_group_map = {}
     course_group_counter = 1
@@ -159,26 +122,53 @@ def expand_rows(form_data):
             course_group_map[key] = course_group_counter
             course_group_counter += 1
 
-    for course, group, date_str in combinations:
-        # Get capacity for this specific group
-        group_capacity = group_capacities.get(group, 0)
-
-        # Get session/venue details for this date
-        date_detail = week_venue_details.get(date_str, {})
-        sessions = date_detail.get('sessions', [{'venues': [{}]}])
-
-        for session in sessions:
+    return {
+        'courses': courses,
+        'groups': groups,
+        'recurring_dates': recurring_dates,
+        'course_name_map': course_name_map,
+        'week_venue_details': week_venue_details,
+        'group_capacities': group_capacities,
+        # Calculate total capacity across all groups
+        'total_capacity': sum(group_capacities.values()),
+        'course_group_map': course_group_map,
+        'academic_session_code': form_data['academic_session_code'],
+        'programme_code': form_data.get('programme_code', ''),
+        'class_commencement': form_data['class_commencement'],
+        'duration': int(form_data['duration']),
+        'activity_code': form_data['activity_code'],
+        'recurring_until_week': int(form_data['recurring_until_week'])
+    }
+
+
+def _date_sessions(week_venue_details, date_str):
+    """Get the session/venue details for a date"""
+    date_detail = week_venue_details.get(date_str, {})
+    return date_detail.get('sessions', [{'venues': [{}]}])
+
+
+def _build_batch(expansion):
+    """Build the RowBatch of a prepared expansion"""
+    total_capacity = expansion['total_capacity']
+    group_capacities = expansion['group_capacities']
+    course_name_map = expansion['course_name_map']
+    courses = expansion['courses']
+    groups = expansion['groups']
+    recurring_dates = expansion['recurring_dates']
+
+    # One slot per session venue of each date, with TotalCapacity split across
+    # the session's venues: first `remainder` venues get one extra
+    slots = []
+    date_slots = []
+    for date_str in recurring_dates:
+        slot_indexes = []
+        for session in _date_sessions(expansion['week_venue_details'], date_str):
             start_time = session.get('start_time', '')
             end_time = session.get('end_time', '')
             venues = session.get('venues', [{}])
             num_venues = len(venues)
 
             for v_idx, venue in enumerate(venues):
-                faculty_code = venue.get('faculty_code', '')
-                faculty_code2 = venue.get('faculty_code2', '')
-                special_room_code = venue.get('special_room_code', '')
-
-                # TotalCapacity split across venues: first `remainder` venues get one extra
                 if num_venues > 1:
                     base = total_capacity // num_venues
                     remainder = total_capacity % num_venues
@@ -186,39 +176,174 @@ def expand_rows(form_data):
                 else:
                     split_total = total_capacity
 
-                row = {
-                    'academic_session_code': form_data['academic_session_code'],
-                    'programme_code': form_data.get('programme_code', ''),
-                    'class_commencement': form_data['class_commencement'],
-                    'scheduled_date': date_str,
-                    'start_time': start_time,
-                    'end_time': end_time,
-                    'duration': int(form_data['duration']),
-                    'activity_code': form_data['activity_code'],
-                    'group_code_capacity': int(group_capacity),
-                    'total_capacity': int(split_total),
-                    'course_code': course,
-                    'course_name': course_name_map.get(course, ''),
-                    'group_code': group,
-                    'faculty_code': faculty_code,
-                    'faculty_code2': faculty_code2,
-                    'request_special_room_code': special_room_code,
-                    'recurring_until_week': int(form_data['recurring_until_week']),
-                    'course_group_seq': course_group_map[(course, group)]
+                slot_indexes.append(len(slots))
+                slots.append((
+                    start_time,
+                    end_time,
+                    venue.get('faculty_code', ''),
+                    venue.get('faculty_code2', ''),
+                    venue.get('special_room_code', ''),
+                    int(split_total)
+                ))
+        date_slots.append(slot_indexes)
+
+    course_group_map = expansion['course_group_map']
+    batch = RowBatch(
+        expansion,
+        [(course, course_name_map.get(course, '')) for course in courses],
+        [(group, int(group_capacities.get(group, 0))) for group in groups],
+        recurring_dates,
+        slots,
+        len(course_group_map)
+    )
+
+    # Cartesian product of courses, groups, AND dates, then each date's slots
+    for course_idx, course in enumerate(courses):
+        for group_idx, group in enumerate(groups):
+            course_group_seq = course_group_map[(course, group)]
+            for date_idx, slot_indexes in enumerate(date_slots):
+                for slot_idx in slot_indexes:
+                    batch.append(course_idx, group_idx, date_idx, slot_idx, course_group_seq)
+
+    return batch
+
+
+def expand_batch(form_data):
+    """
+    Expand multi-select fields into a compact columnar RowBatch
+
+    Rows are the Cartesian product of courses, groups and recurring dates,
+    expanded by each date's sessions and venues.
+
+    Args:
+        form_data: Dictionary containing form fields including multi-select arrays
+
+    Returns:
+        RowBatch of the entry's rows
+    """
+    return _build_batch(_prepare_expansion(form_data))
+
+
+def measure_expansion(form_data):
+    """
+    Work out the dimensions of an entry's expansion without building any rows
+
+    Rows = courses x groups x (session venues summed over the recurring dates).
+
+    Args:
+        form_data: Dictionary containing form fields including multi-select arrays
+
+    Returns:
+        Dict with 'courses', 'groups', 'dates', 'sessions' and 'venues'
+        (summed over all dates) and the resulting 'rows'
+    """
+    expansion = _prepare_expansion(form_data)
+
+    sessions = 0
+    venues = 0
+    for date_str in expansion['recurring_dates']:
+        for session in _date_sessions(expansion['week_venue_details'], date_str):
+            sessions += 1
+            venues += len(session.get('venues', [{}]))
+
+    courses = len(expansion['courses'])
+    groups = len(expansion['groups'])
+    return {
+        'courses': courses,
+        'groups': groups,
+        'dates': len(expansion['recurring_dates']),
+        'sessions': sessions,
+        'venues': venues,
+        'rows': courses * groups * venues
+    }
+
+
+def iter_bookings(form_data):
+    """
+    Yield the faculty/room bookings of an entry: one per session venue of each date
+
+    Every course and group of the entry shares these bookings, so they are
+    what can clash with other classes, not the individual rows.
+
+    Args:
+        form_data: Dictionary containing form fields including multi-select arrays
+
+    Yields:
+        Dict with 'date', 'start_time', 'end_time', 'faculty_code',
+        'faculty_code2', 'special_room_code' and 'path' (of the venue in
+        week_venue_details)
+    """
+    expansion = _prepare_expansion(form_data)
+
+    for date_str in expansion['recurring_dates']:
+        for s_idx, session in enumerate(_date_sessions(expansion['week_venue_details'], date_str)):
+            for v_idx, venue in enumerate(session.get('venues', [{}])):
+                yield {
+                    'date': date_str,
+                    'start_time': session.get('start_time', ''),
+                    'end_time': session.get('end_time', ''),
+                    'faculty_code': venue.get('faculty_code', ''),
+                    'faculty_code2': venue.get('faculty_code2', ''),
+                    'special_room_code': venue.get('special_room_code', ''),
+                    'path': f'week_venue_details[{date_str}].sessions[{s_idx}].venues[{v_idx}]'
                 }
-                rows.append(row)
 
-    return rows
 
+def canonical_expansion(form_data):
+    """
+    Reduce an entry to exactly what decides its rows, in a JSON-serialisable form
+
+    Week venue details are normalised and the recurring dates resolved, so
+    entries that produce the same rows (in the same order) give equal
+    results however they were submitted; details of dates that are not
+    taught and fields the rows do not use are left out.
+
+    Args:
+        form_data: Dictionary containing form fields including multi-select arrays
 
-def process_form(form_data):
+    Returns:
+        Dict of the entry's expansion inputs
+    """
+    expansion = _prepare_expansion(form_data)
+    course_name_map = expansion['course_name_map']
+    group_capacities = expansion['group_capacities']
+
+    dates = []
+    for date_str in expansion['recurring_dates']:
+        sessions = []
+        for session in _date_sessions(expansion['week_venue_details'], date_str):
+            sessions.append([
+                session.get('start_time', ''),
+                session.get('end_time', ''),
+                [
+                    [venue.get('faculty_code', ''), venue.get('faculty_code2', ''), venue.get('special_room_code', '')]
+                    for venue in session.get('venues', [{}])
+                ]
+            ])
+        dates.append([date_str, sessions])
+
+    return {
+        'courses': [[course, course_name_map.get(course, '')] for course in expansion['courses']],
+        'groups': [[group, int(group_capacities.get(group, 0))] for group in expansion['groups']],
+        'total_capacity': expansion['total_capacity'],
+        'dates': dates,
+        'academic_session_code': expansion['academic_session_code'],
+        'programme_code': expansion['programme_code'],
+        'class_commencement': expansion['class_commencement'],
+        'duration': expansion['duration'],
+        'activity_code': expansion['activity_code'],
+        'recurring_until_week': expansion['recurring_until_week']
+    }
+
+
+def count_rows(form_data):
     """
-    Main form processing function
+    Count the rows of an entry's expansion, without building them
 
     Args:
-        form_data: Dictionary containing all form fields
+        form_data: Dictionary containing form fields including multi-select arrays
 
     Returns:
-        List of expanded row dictionaries ready for Excel generation
+        Integer row count
     """
-    return expand_rows(form_data)
+    return measure_expansion(form_data)['rows']
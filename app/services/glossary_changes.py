@@ -0,0 +1,89 @@
+from flask import current_app
+from sqlalchemy import delete, insert
+from app import db
+from app.models import GlossaryChange, GlossaryMeta
+from app.services import glossary_snapshot
+
+
+def record_changes(glossary_type, revision, changed_codes, removed_codes):
+    """
+    Record the codes changed by a reload so clients can sync deltas.
+
+    Called after the version bump, in the same transaction; the caller is
+    responsible for committing. Reloads touching more rows than
+    GLOSSARY_CHANGE_LOG_MAX_ROWS are not logged: the log is reset instead and
+    clients older than this revision are told to refresh in full. The log
+    keeps the last GLOSSARY_CHANGE_LOG_REVISIONS revisions.
+
+    Args:
+        glossary_type: Type of glossary
+        revision: New GlossaryMeta.version for the type
+        changed_codes: Codes inserted or updated in this revision
+        removed_codes: Codes deleted in this revision
+    """
+    meta = GlossaryMeta.query.filter_by(glossary_type=glossary_type).first()
+    table = GlossaryChange.__table__
+
+    max_rows = current_app.config.get('GLOSSARY_CHANGE_LOG_MAX_ROWS', 5000)
+    if len(changed_codes) + len(removed_codes) > max_rows:
+        db.session.execute(delete(table).where(table.c.glossary_type == glossary_type))
+        meta.changes_since = revision
+        return
+
+    rows = [
+        {'glossary_type': glossary_type, 'revision': revision, 'code': code, 'removed': False}
+        for code in changed_codes
+    ] + [
+        {'glossary_type': glossary_type, 'revision': revision, 'code': code, 'removed': True}
+        for code in removed_codes
+    ]
+    if rows:
+        db.session.execute(insert(table), rows)
+
+    # Compact: drop revisions that fell out of the retention window
+    keep = current_app.config.get('GLOSSARY_CHANGE_LOG_REVISIONS', 50)
+    if revision - (meta.changes_since or 0) > keep:
+        meta.changes_since = revision - keep
+        db.session.execute(
+            delete(table).where(
+                table.c.glossary_type == glossary_type,
+                table.c.revision <= meta.changes_since
+            )
+        )
+
+
+def get_changes(glossary_type, since):
+    """
+    Get the delta for a glossary type since a client's revision
+
+    Args:
+        glossary_type: Type of glossary
+        since: Revision the client already holds (None if it holds nothing)
+
+    Returns:
+        dict with 'revision' and 'full_refresh'; unless a full refresh is
+        needed, also 'upserted' (list of entry dicts) and 'removed' (list of codes)
+    """
+    meta = GlossaryMeta.query.filter_by(glossary_type=glossary_type).first()
+    revision = (meta.version or 0) if meta else 0
+    changes_since = (meta.changes_since or 0) if meta else 0
+
+    if since is None or since <= 0 or since < changes_since or since > revision:
+        return {'revision': revision, 'full_refresh': True}
+
+    # Later revisions win when a code changed more than once
+    latest = {}
+    for code, removed in db.session.query(GlossaryChange.code, GlossaryChange.removed).filter(
+        GlossaryChange.glossary_type == glossary_type,
+        GlossaryChange.revision > since
+    ).order_by(GlossaryChange.revision, GlossaryChange.id):
+        latest[code] = removed
+
+    entries_by_code = glossary_snapshot.get_snapshot(glossary_type, revision).entries_by_code
+    upserted = [
+        entries_by_code[code] for code, removed in latest.items()
+        if not removed and code in entries_by_code
+    ]
+    removed = [code for code, is_removed in latest.items() if is_removed]
+
+    return {'revision': revision, 'full_refresh': False, 'upserted': upserted, 'removed': removed}
@@ -0,0 +1,91 @@
+import re
+from bisect import bisect_left
+
+_TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+
+def _tokenise(text):
+    """Split text into lowercase alphanumeric tokens"""
+    return _TOKEN_PATTERN.findall((text or '').lower())
+
+
+def _prefix_range(sorted_keys, prefix):
+    """Return (lo, hi) bounds of the keys in sorted_keys that start with prefix"""
+    lo = bisect_left(sorted_keys, prefix)
+    hi = bisect_left(sorted_keys, prefix + '\uffff')
+    return lo, hi
+
+
+class GlossarySearchIndex:
+    """
+    In-memory search index over one glossary snapshot.
+
+    Code prefixes are matched with bisect over a sorted array of lowercase
+    codes. Description words go through an inverted index whose vocabulary is
+    also sorted, so each query token matches every word it is a prefix of.
+    Code-prefix matches rank first (in code order), then description matches
+    (in glossary order).
+    """
+
+    def __init__(self, entries):
+        self.entries = entries
+
+        keyed_codes = sorted((entry['code'].lower(), pos) for pos, entry in enumerate(entries))
+        self._codes = [code for code, _ in keyed_codes]
+        self._code_positions = [pos for _, pos in keyed_codes]
+
+        postings = {}
+        for pos, entry in enumerate(entries):
+            for token in set(_tokenise(entry.get('description'))):
+                postings.setdefault(token, []).append(pos)
+        self._vocabulary = sorted(postings)
+        self._postings = [postings[token] for token in self._vocabulary]
+
+    def _description_matches(self, tokens):
+        """Positions whose description has a word starting with every token"""
+        matches = None
+        for token in tokens:
+            lo, hi = _prefix_range(self._vocabulary, token)
+            token_matches = set()
+            for postings in self._postings[lo:hi]:
+                token_matches.update(postings)
+            matches = token_matches if matches is None else matches & token_matches
+            if not matches:
+                return []
+        return sorted(matches)
+
+    def search(self, query, page=1, page_size=50):
+        """
+        Search the glossary and return one page of matching entries
+
+        Args:
+            query: Free-text query (code prefix or description words)
+            page: 1-based page number
+            page_size: Number of entries per page
+
+        Returns:
+            Tuple of (list of entry dicts, bool whether more pages exist)
+        """
+        start = max(page - 1, 0) * page_size
+        end = start + page_size
+        query = (query or '').strip().lower()
+
+        if not query:
+            return self.entries[start:end], end < len(self.entries)
+
+        lo, hi = _prefix_range(self._codes, query)
+        code_positions = self._code_positions[lo:hi]
+
+        # Only resolve description matches once the page runs past the code matches
+        if end < len(code_positions):
+            positions = code_positions[start:end]
+            more = True
+        else:
+            code_set = set(code_positions)
+            tokens = _tokenise(query)
+            extra = [pos for pos in self._description_matches(tokens) if pos not in code_set] if tokens else []
+            combined = code_positions + extra
+            positions = combined[start:end]
+            more = end < len(combined)
+
+        return [self.entries[pos] for pos in positions], more
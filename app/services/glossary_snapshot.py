@@ -0,0 +1,176 @@
+import gzip
+import hashlib
+import threading
+from flask import current_app
+from app import db
+from app.models import GlossaryCache, GlossaryMeta
+from app.services.glossary_search import GlossarySearchIndex
+
+# Process-local snapshots keyed by glossary type. Each snapshot remembers the
+# GlossaryMeta.version it was built from, so a reload in any worker (which
+# bumps the shared version column) invalidates the snapshots in every worker.
+_snapshots = {}
+_snapshots_lock = threading.Lock()
+
+# Combined multi-type responses keyed by the tuple of requested types
+_bundles = {}
+
+
+class GlossarySnapshot:
+    """Immutable, pre-serialised view of one glossary type at a given version"""
+
+    __slots__ = ('glossary_type', 'version', 'entries', 'body', 'etag', '_search_index', '_entries_by_code', '_codes')
+
+    def __init__(self, glossary_type, version, entries):
+        self.glossary_type = glossary_type
+        self.version = version
+        self.entries = entries
+        self.body = current_app.json.dumps(entries, separators=(',', ':')).encode('utf-8')
+        self.etag = hashlib.sha1(self.body).hexdigest()
+        self._search_index = None
+        self._entries_by_code = None
+        self._codes = None
+
+    @property
+    def entries_by_code(self):
+        """Entries keyed by code, built on first use"""
+        if self._entries_by_code is None:
+            self._entries_by_code = {entry['code']: entry for entry in self.entries}
+        return self._entries_by_code
+
+    @property
+    def codes(self):
+        """Frozenset of this snapshot's codes, built on first use"""
+        if self._codes is None:
+            self._codes = frozenset(entry['code'] for entry in self.entries)
+        return self._codes
+
+    @property
+    def search_index(self):
+        """Search index over this snapshot, built on first use"""
+        if self._search_index is None:
+            with _snapshots_lock:
+                if self._search_index is None:
+                    self._search_index = GlossarySearchIndex(self.entries)
+        return self._search_index
+
+
+class GlossaryBundle:
+    """Pre-serialised JSON object of several snapshots, plain and gzip-compressed"""
+
+    __slots__ = ('key', 'revisions', 'body', 'gzip_body', 'etag')
+
+    def __init__(self, snapshots):
+        # The per-type versions (and content ETags) identify the bundle
+        self.key = tuple((s.glossary_type, s.version, s.etag) for s in snapshots)
+        self.revisions = ','.join(f'{s.glossary_type}:{s.version}' for s in snapshots)
+        self.body = b'{' + b','.join(
+            b'"' + s.glossary_type.encode('utf-8') + b'":' + s.body for s in snapshots
+        ) + b'}'
+        self.gzip_body = gzip.compress(self.body, mtime=0)
+        self.etag = hashlib.sha1(repr(self.key).encode('utf-8')).hexdigest()
+
+
+def get_version(glossary_type):
+    """
+    Get the current shared version of a glossary type
+
+    Args:
+        glossary_type: Type of glossary
+
+    Returns:
+        Integer version, or 0 if the type has never been loaded
+    """
+    version = db.session.query(GlossaryMeta.version).filter_by(
+        glossary_type=glossary_type
+    ).scalar()
+    return version or 0
+
+
+def bump_version(glossary_type):
+    """
+    Increment the shared version of a glossary type.
+
+    Must be called in the same transaction that changes the cache entries;
+    the caller is responsible for committing.
+
+    Args:
+        glossary_type: Type of glossary that was reloaded
+
+    Returns:
+        Integer new version
+    """
+    meta = GlossaryMeta.query.filter_by(glossary_type=glossary_type).first()
+    if not meta:
+        meta = GlossaryMeta(glossary_type=glossary_type, entry_count=0)
+        db.session.add(meta)
+    meta.version = (meta.version or 0) + 1
+
+    # Drop the local snapshot straight away; other workers notice the new version
+    _snapshots.pop(glossary_type, None)
+    return meta.version
+
+
+def get_versions(glossary_types):
+    """
+    Get the current shared versions of several glossary types in one query
+
+    Args:
+        glossary_types: Iterable of glossary types
+
+    Returns:
+        Dict of glossary_type -> version (0 if never loaded)
+    """
+    glossary_types = list(glossary_types)
+    rows = db.session.query(GlossaryMeta.glossary_type, GlossaryMeta.version).filter(
+        GlossaryMeta.glossary_type.in_(glossary_types)
+    ).all()
+    versions = {glossary_type: version or 0 for glossary_type, version in rows}
+    return {glossary_type: versions.get(glossary_type, 0) for glossary_type in glossary_types}
+
+
+def get_snapshot(glossary_type, version=None):
+    """
+    Get the snapshot for a glossary type, rebuilding it if the version moved
+
+    Args:
+        glossary_type: Type of glossary
+        version: Current version if the caller already looked it up
+
+    Returns:
+        GlossarySnapshot for the current version
+    """
+    if version is None:
+        version = get_version(glossary_type)
+    snapshot = _snapshots.get(glossary_type)
+    if snapshot is not None and snapshot.version == version:
+        return snapshot
+
+    with _snapshots_lock:
+        snapshot = _snapshots.get(glossary_type)
+        if snapshot is None or snapshot.version != version:
+            entries = GlossaryCache.query.filter_by(glossary_type=glossary_type).all()
+            snapshot = GlossarySnapshot(glossary_type, version, [entry.to_dict() for entry in entries])
+            _snapshots[glossary_type] = snapshot
+    return snapshot
+
+
+def get_bundle(glossary_types):
+    """
+    Get a combined response body for several glossary types
+
+    Args:
+        glossary_types: List of glossary types, in response order
+
+    Returns:
+        GlossaryBundle for the current versions of those types
+    """
+    versions = get_versions(glossary_types)
+    snapshots = [get_snapshot(glossary_type, versions[glossary_type]) for glossary_type in glossary_types]
+    key = tuple((s.glossary_type, s.version, s.etag) for s in snapshots)
+
+    bundle = _bundles.get(tuple(glossary_types))
+    if bundle is None or bundle.key != key:
+        bundle = GlossaryBundle(snapshots)
+        _bundles[tuple(glossary_types)] = bundle
+    return bundle
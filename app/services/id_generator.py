@@ -1,6 +1,17 @@
-from datetime import datetime
+import threading
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
 from app import db
-from app.models import FormSubmission, GeneratedRow
+from app.models import FormSubmission, GeneratedRow, IdSequence
+
+# Blocks reserved ahead of need by this process: sequence name -> [next value, end (exclusive)]
+_blocks = {}
+_blocks_lock = threading.Lock()
+
+# How long a row ID sequence is kept after its minute
+_ROW_SEQUENCE_RETENTION = timedelta(hours=1)
 
 def generate_id_prefix():
     """
@@ -16,11 +27,14 @@ def get_last_running_number(prefix):
     """
     Get the last running number used for a specific prefix
 
+    Only used to seed the first row ID sequence, so that IDs issued before
+    sequences existed are never handed out again.
+
     Args:
         prefix: Date-time prefix (YYYYMMDD-HHMM)
 
     Returns:
-        Integer of last running number, or 0 if none exist
+        Integer of last running number, or 100000 if none exist
     """
     # Query for rows with this prefix
     last_row = GeneratedRow.query.filter(
@@ -37,25 +51,36 @@ def get_last_running_number(prefix):
 
     return 100000
 
-def generate_row_ids(num_rows):
+def _seed_row_sequence(prefix):
     """
-    Generate unique row IDs with running numbers
+    Last running number in use for a new row ID sequence
+
+    Once any earlier minute has had a sequence, every row ID since was
+    issued from one, so a new minute starts afresh. Only the first row
+    sequence ever created (or one after the clock went back) looks at
+    generated_rows, whose row_id is not indexed.
 
     Args:
-        num_rows: Number of IDs to generate
+        prefix: Date-time prefix (YYYYMMDD-HHMM)
 
     Returns:
-        List of row ID strings
+        Integer of last running number in use
     """
-    prefix = generate_id_prefix()
-    start_num = get_last_running_number(prefix) + 1
+    earlier = db.session.query(IdSequence.name).filter(
+        IdSequence.name.like('row:%'),
+        IdSequence.name < f'row:{prefix}'
+    ).first()
+    if earlier:
+        return 100000
 
-    return [f"{prefix}-{i:06d}" for i in range(start_num, start_num + num_rows)]
+    return get_last_running_number(prefix)
 
 def get_last_form_id():
     """
     Get the last FormID used
 
+    Only used to seed the FormID sequence.
+
     Returns:
         Integer of last FormID number, or 900000 if none exist
     """
@@ -71,6 +96,123 @@ def get_last_form_id():
 
     return 900000
 
+def _reserve_from_database(name, count, seed_fn):
+    """
+    Atomically reserve count consecutive values from a named sequence
+
+    Runs in its own short transaction, committed before returning, so the
+    reservation is visible to every other worker straight away and does not
+    depend on the caller's session. The UPDATE takes the row (or, on SQLite,
+    database) write lock, so concurrent reservations serialise and never
+    overlap. A missing sequence is created from seed_fn(), the last value
+    already in use; if two workers race to create it, the loser retries.
+
+    Returns:
+        First reserved value
+    """
+    sequences = IdSequence.__table__
+
+    for attempt in range(2):
+        try:
+            with db.engine.begin() as conn:
+                result = conn.execute(
+                    update(sequences)
+                    .where(sequences.c.name == name)
+                    .values(last_value=sequences.c.last_value + count)
+                )
+                if result.rowcount:
+                    last_value = conn.execute(
+                        select(sequences.c.last_value).where(sequences.c.name == name)
+                    ).scalar_one()
+                    return last_value - count + 1
+
+                first_value = seed_fn() + 1
+                conn.execute(insert(sequences).values(name=name, last_value=first_value + count - 1))
+
+                # Row ID sequences are per minute. A request that took its prefix
+                # just before the minute turned may still reserve from the last
+                # one, so only sequences well past their minute are pruned.
+                if name.startswith('row:'):
+                    cutoff = datetime.strptime(name[4:], '%Y%m%d-%H%M') - _ROW_SEQUENCE_RETENTION
+                    conn.execute(
+                        delete(sequences).where(
+                            sequences.c.name.like('row:%'),
+                            sequences.c.name < f"row:{cutoff.strftime('%Y%m%d-%H%M')}"
+                        )
+                    )
+                return first_value
+        except IntegrityError:
+            if attempt:
+                raise
+
+def reserve_ids(name, count, seed_fn):
+    """
+    Reserve count consecutive values from a named ID sequence
+
+    With ID_RESERVE_BLOCK_SIZE > 0, blocks of at least that size are reserved
+    from the database and requests are served from this process's block in
+    memory; a request that does not fit in what is left starts a new block.
+
+    Args:
+        name: Sequence name
+        count: Number of values needed
+        seed_fn: Callable returning the last value in use, for a new sequence
+
+    Returns:
+        First value of a contiguous range of count values
+    """
+    block_size = current_app.config.get('ID_RESERVE_BLOCK_SIZE', 0)
+    if count > block_size:
+        return _reserve_from_database(name, count, seed_fn)
+
+    with _blocks_lock:
+        block = _blocks.get(name)
+        if block is None or block[1] - block[0] < count:
+            if name.startswith('row:'):
+                for stale in [key for key in _blocks if key.startswith('row:')]:
+                    del _blocks[stale]
+            start = _reserve_from_database(name, block_size, seed_fn)
+            block = _blocks[name] = [start, start + block_size]
+
+        start = block[0]
+        block[0] += count
+        return start
+
+def reserve_row_id_range(num_rows):
+    """
+    Reserve a contiguous range of row running numbers under the current prefix
+
+    Lets callers format row IDs as they need them instead of holding a list.
+
+    Args:
+        num_rows: Number of IDs to reserve
+
+    Returns:
+        Tuple of (prefix, first running number)
+    """
+    prefix = generate_id_prefix()
+    if num_rows <= 0:
+        return prefix, 0
+
+    start_num = reserve_ids(f'row:{prefix}', num_rows, lambda: _seed_row_sequence(prefix))
+    return prefix, start_num
+
+def generate_form_ids(count):
+    """
+    Reserve consecutive FormIDs (900001, 900002, etc.)
+
+    Args:
+        count: Number of FormIDs to reserve
+
+    Returns:
+        List of FormID strings
+    """
+    if count <= 0:
+        return []
+
+    start_id = reserve_ids('form', count, get_last_form_id)
+    return [f"{form_id:06d}" for form_id in range(start_id, start_id + count)]
+
 def generate_form_id():
     """
     Generate next FormID in sequence (900001, 900002, etc.)
@@ -78,6 +220,4 @@ def generate_form_id():
     Returns:
         String FormID
     """
-    last_id = get_last_form_id()
-    next_id = last_id + 1
-    return f"{next_id:06d}"
+    return generate_form_ids(1)[0]
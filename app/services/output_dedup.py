@@ -0,0 +1,90 @@
+import hashlib
+import json
+import os
+from datetime import datetime, timedelta
+from sqlalchemy import func, select
+from app import db
+from app.models import FormSubmission, GeneratedRow
+from app.services import form_processor, output_retention
+
+
+def payload_hash(entries, output_format):
+    """
+    Content hash of a generate request: what it would write, not how it was sent
+
+    Each entry is reduced by form_processor.canonical_expansion (normalised
+    venue details, resolved recurring dates) and serialised with sorted keys,
+    so resubmitting the same entries gives the same hash.
+
+    Args:
+        entries: List of validated generate entry dicts, in request order
+        output_format: Output format name
+
+    Returns:
+        Hex SHA-256 string
+    """
+    canonical = {
+        'format': output_format,
+        'entries': [form_processor.canonical_expansion(entry) for entry in entries]
+    }
+    encoded = json.dumps(canonical, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+def find_previous(payload_hash, entry_count, window_seconds):
+    """
+    Find the latest generation of the same payload that can still be served
+
+    Only completed generations saved to OUTPUT_DIR qualify; streamed ones (no
+    stored path), ones still being written (no file size yet) and ones whose
+    file is gone and cannot be rebuilt are passed over. A
+    generation is the last entry_count submissions with the hash and path
+    (an identical payload has as many entries), which also tells apart two
+    generations that were written to the same file name within one second.
+
+    Args:
+        payload_hash: Hash from payload_hash
+        entry_count: Number of entries in the payload
+        window_seconds: How far back to look
+
+    Returns:
+        Dict with 'file_path' (filename), 'path', 'form_ids' (in entry order),
+        'row_count' and 'created_at', or None if there is no such generation
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=window_seconds)
+    candidates = db.session.execute(
+        select(FormSubmission.generated_file_path, FormSubmission.created_at)
+        .where(
+            FormSubmission.payload_hash == payload_hash,
+            FormSubmission.created_at >= cutoff,
+            FormSubmission.generated_file_path.isnot(None),
+            FormSubmission.file_size.isnot(None)
+        )
+        .order_by(FormSubmission.id.desc())
+    ).all()
+
+    checked = set()
+    for path, created_at in candidates:
+        if path in checked:
+            continue
+        checked.add(path)
+        if not os.path.isfile(path) and not output_retention.restorable(path):
+            continue
+        submissions = db.session.execute(
+            select(FormSubmission.id, FormSubmission.form_id)
+            .where(FormSubmission.payload_hash == payload_hash, FormSubmission.generated_file_path == path)
+            .order_by(FormSubmission.id.desc())
+            .limit(entry_count)
+        ).all()[::-1]
+        row_count = db.session.execute(
+            select(func.count(GeneratedRow.id))
+            .where(GeneratedRow.submission_id.in_([submission_id for submission_id, _ in submissions]))
+        ).scalar()
+        return {
+            'file_path': os.path.basename(path),
+            'path': path,
+            'form_ids': [form_id for _, form_id in submissions],
+            'row_count': row_count,
+            'created_at': created_at
+        }
+    return None
@@ -0,0 +1,203 @@
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import func, select, update
+from app import db
+from app.models import FormSubmission
+from app.services import entry_pool, excel_generator
+
+# PID of the process whose sweeper thread is running (threads do not survive fork)
+_sweeper_pid = None
+_sweeper_lock = threading.Lock()
+
+# When this process last swept in-line (processes that fork worker pools)
+_last_sweep = None
+
+
+def restorable(file_path):
+    """
+    Check whether a generated file can be rebuilt from the database
+
+    Only generations whose every submission recorded a file size stored
+    their rows completely; older ones (and unknown paths) cannot be rebuilt.
+
+    Returns:
+        True if the file's rows are all saved
+    """
+    submissions = FormSubmission.__table__
+    total, sized = db.session.execute(
+        select(func.count(submissions.c.id), func.count(submissions.c.file_size))
+        .where(submissions.c.generated_file_path == file_path)
+    ).one()
+    return total > 0 and total == sized
+
+
+def open_file(file_path):
+    """
+    Open a generated file for sending, rebuilding it first if it was evicted
+
+    The file is opened here rather than by the caller, so a sweep that
+    deletes it in the meantime cannot make the download fail: the open
+    handle keeps reading the deleted file.
+
+    Args:
+        file_path: Path of the file in OUTPUT_DIR
+
+    Returns:
+        Binary file object, or None if the file is gone and cannot be rebuilt
+    """
+    try:
+        return open(file_path, 'rb')
+    except FileNotFoundError:
+        if not restorable(file_path):
+            return None
+
+    # A sweep may evict the rebuilt file again before it is opened; rebuild once more
+    for attempt in range(2):
+        started = time.perf_counter()
+        excel_generator.rebuild_file(file_path)
+        print(f"Rebuilt evicted file {os.path.basename(file_path)} in {time.perf_counter() - started:.2f}s")
+        try:
+            return open(file_path, 'rb')
+        except FileNotFoundError:
+            if attempt:
+                raise
+
+
+def record_download(file_path):
+    """Mark a generated file as just downloaded (the caller commits)"""
+    db.session.execute(
+        update(FormSubmission.__table__)
+        .where(FormSubmission.__table__.c.generated_file_path == file_path)
+        .values(last_downloaded_at=datetime.utcnow())
+    )
+
+
+def sweep(max_bytes, max_age_days):
+    """
+    Delete generated files past the age limit, then least recently used ones over the size cap
+
+    A file was last used when it was last downloaded, or generated if it
+    never was. Only files that can be rebuilt are deleted; files of older
+    generations still count towards the size cap. Files in OUTPUT_DIR that
+    no submission refers to are left alone.
+
+    Args:
+        max_bytes: Size cap for the generated files on disk (0 = none)
+        max_age_days: Delete files not used for this many days (0 = never)
+
+    Returns:
+        Dict with 'files', 'bytes' (on disk before the sweep), 'evicted' and
+        'evicted_bytes'
+    """
+    submissions = FormSubmission.__table__
+    last_used = func.max(func.coalesce(submissions.c.last_downloaded_at, submissions.c.created_at))
+    statement = (
+        select(
+            submissions.c.generated_file_path, last_used,
+            func.count(submissions.c.id), func.count(submissions.c.file_size)
+        )
+        .where(submissions.c.generated_file_path.isnot(None))
+        .group_by(submissions.c.generated_file_path)
+    )
+
+    total_bytes = 0
+    file_count = 0
+    candidates = []
+    for file_path, used_at, total, sized in db.session.execute(statement):
+        try:
+            size = os.path.getsize(file_path)
+        except OSError:  # Already evicted (or removed by hand)
+            continue
+        total_bytes += size
+        file_count += 1
+        if total == sized:
+            candidates.append((used_at, file_path, size))
+
+    # Least recently used first: expired files are all at the front
+    candidates.sort()
+    cutoff = datetime.utcnow() - timedelta(days=max_age_days) if max_age_days else None
+    remaining = total_bytes
+    evicted = 0
+    evicted_bytes = 0
+    for used_at, file_path, size in candidates:
+        expired = cutoff is not None and used_at < cutoff
+        if not expired and not (max_bytes and remaining > max_bytes):
+            break
+        try:
+            os.remove(file_path)
+        except FileNotFoundError:  # Another worker's sweeper got there first
+            pass
+        except OSError:  # Open for a download on Windows; left for the next sweep
+            continue
+        remaining -= size
+        evicted += 1
+        evicted_bytes += size
+
+    return {'files': file_count, 'bytes': total_bytes, 'evicted': evicted, 'evicted_bytes': evicted_bytes}
+
+
+def _run_sweep(app):
+    """Sweep with the app's limits, logging evictions and failures"""
+    try:
+        with app.app_context():
+            try:
+                result = sweep(app.config.get('OUTPUT_MAX_BYTES', 0), app.config.get('OUTPUT_MAX_AGE_DAYS', 0))
+            finally:
+                db.session.remove()
+        if result['evicted']:
+            print(f"Evicted {result['evicted']} generated file(s), {result['evicted_bytes'] / 1048576:.1f} MB "
+                  f"of {result['bytes'] / 1048576:.1f} MB")
+    except Exception as e:
+        print(f"Output sweep failed: {e}")
+
+
+def _sweep_loop(app, interval):
+    """Run sweep every interval seconds for the life of the process"""
+    while True:
+        _run_sweep(app)
+        time.sleep(interval)
+
+
+def _sweep_if_due(app, interval):
+    """Sweep in the calling thread if this process has not swept for interval seconds"""
+    global _last_sweep
+    with _sweeper_lock:
+        now = time.monotonic()
+        if _last_sweep is not None and now - _last_sweep < interval:
+            return
+        _last_sweep = now
+    _run_sweep(app)
+
+
+def start_sweeper(app, response):
+    """
+    Keep this process sweeping OUTPUT_DIR every OUTPUT_SWEEP_INTERVAL_SECONDS
+
+    Called after every request. Normally that starts a background sweeper
+    thread, once per process (a worker forked from a process that already
+    had one starts its own). A process that forks worker pools gets no
+    thread, since every pool worker would inherit a copy of it mid-sweep;
+    it sweeps in-line instead, once the response has been sent, when the
+    interval has passed.
+
+    Args:
+        app: Flask app (OUTPUT_SWEEP_INTERVAL_SECONDS of 0 disables the sweeper)
+        response: The request's response
+    """
+    global _sweeper_pid
+    interval = app.config.get('OUTPUT_SWEEP_INTERVAL_SECONDS', 0)
+    if not interval:
+        return
+    if entry_pool.forks_workers(app.config):
+        if _last_sweep is None or time.monotonic() - _last_sweep >= interval:
+            response.call_on_close(lambda: _sweep_if_due(app, interval))
+        return
+    if _sweeper_pid == os.getpid():
+        return
+    with _sweeper_lock:
+        if _sweeper_pid == os.getpid():
+            return
+        _sweeper_pid = os.getpid()
+        threading.Thread(target=_sweep_loop, args=(app, interval), name='output-sweeper', daemon=True).start()
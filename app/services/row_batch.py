@@ -0,0 +1,107 @@
+from array import array
+
+# Field order of the records yielded by RowBatch.records()
+FIELDS = (
+    'academic_session_code', 'programme_code', 'class_commencement', 'scheduled_date',
+    'start_time', 'end_time', 'duration', 'activity_code', 'group_code_capacity',
+    'total_capacity', 'course_code', 'course_name', 'group_code', 'faculty_code',
+    'faculty_code2', 'request_special_room_code', 'recurring_until_week', 'course_group_seq'
+)
+
+
+def _index_array(size):
+    """Smallest unsigned array able to hold indexes (or values) up to size"""
+    if size < 2 ** 8:
+        return array('B')
+    if size < 2 ** 16:
+        return array('H')
+    return array('L')
+
+
+class RowBatch:
+    """
+    Expanded rows of one entry, stored column-wise.
+
+    Values shared by every row of the entry (session, programme, activity,
+    duration, ...) are stored once. Courses, groups, dates and venue slots
+    are stored once each as small lookup tables, and every row is just an
+    index into each of them plus its CourseGroupID sequence number, kept in
+    compact unsigned arrays. A row costs a few bytes instead of a dict.
+    """
+
+    __slots__ = (
+        'academic_session_code', 'programme_code', 'class_commencement',
+        'duration', 'activity_code', 'recurring_until_week',
+        'courses', 'groups', 'dates', 'slots',
+        'course_index', 'group_index', 'date_index', 'slot_index', 'course_group_seq'
+    )
+
+    def __init__(self, constants, courses, groups, dates, slots, course_group_count):
+        """
+        Args:
+            constants: Dict with the per-entry values (academic_session_code,
+                programme_code, class_commencement, duration, activity_code,
+                recurring_until_week)
+            courses: List of (course_code, course_name)
+            groups: List of (group_code, group_code_capacity)
+            dates: List of scheduled date strings
+            slots: List of (start_time, end_time, faculty_code, faculty_code2,
+                request_special_room_code, total_capacity), one per session venue
+            course_group_count: Highest CourseGroupID sequence number used
+        """
+        self.academic_session_code = constants['academic_session_code']
+        self.programme_code = constants['programme_code']
+        self.class_commencement = constants['class_commencement']
+        self.duration = constants['duration']
+        self.activity_code = constants['activity_code']
+        self.recurring_until_week = constants['recurring_until_week']
+
+        self.courses = courses
+        self.groups = groups
+        self.dates = dates
+        self.slots = slots
+
+        self.course_index = _index_array(len(courses))
+        self.group_index = _index_array(len(groups))
+        self.date_index = _index_array(len(dates))
+        self.slot_index = _index_array(len(slots))
+        self.course_group_seq = _index_array(course_group_count + 1)
+
+    def append(self, course, group, date, slot, course_group_seq):
+        """Add a row given its course, group, date and slot indexes"""
+        self.course_index.append(course)
+        self.group_index.append(group)
+        self.date_index.append(date)
+        self.slot_index.append(slot)
+        self.course_group_seq.append(course_group_seq)
+
+    def __len__(self):
+        return len(self.course_index)
+
+    def records(self):
+        """
+        Yield each row as a tuple of values in FIELDS order
+
+        Yields:
+            Tuple of row values
+        """
+        courses, groups, dates, slots = self.courses, self.groups, self.dates, self.slots
+        academic_session_code = self.academic_session_code
+        programme_code = self.programme_code
+        class_commencement = self.class_commencement
+        duration = self.duration
+        activity_code = self.activity_code
+        recurring_until_week = self.recurring_until_week
+
+        for course, group, date, slot, course_group_seq in zip(
+            self.course_index, self.group_index, self.date_index, self.slot_index, self.course_group_seq
+        ):
+            course_code, course_name = courses[course]
+            group_code, group_code_capacity = groups[group]
+            start_time, end_time, faculty_code, faculty_code2, special_room_code, total_capacity = slots[slot]
+            yield (
+                academic_session_code, programme_code, class_commencement, dates[date],
+                start_time, end_time, duration, activity_code, group_code_capacity,
+                total_capacity, course_code, course_name, group_code, faculty_code,
+                faculty_code2, special_room_code, recurring_until_week, course_group_seq
+            )
@@ -0,0 +1,126 @@
+from datetime import datetime
+from sqlalchemy import insert, select, text, update
+from sqlalchemy.exc import SQLAlchemyError
+from app import db
+from app.models import StartupState
+
+try:
+    import fcntl
+except ImportError:  # Windows desktop build runs a single process
+    fcntl = None
+
+# Application-wide key for pg_advisory_lock (any constant shared by all workers)
+_ADVISORY_LOCK_KEY = 7_372_018_301
+
+# Id of the StartupState row counting completed startups; a waiter that sees
+# the count unchanged once it gets the lock knows the leader failed
+_STATE_ID = 1
+
+
+def _startup_marker():
+    """Number of completed startups, or None before the schema exists"""
+    state = StartupState.__table__
+    try:
+        with db.engine.connect() as conn:
+            return conn.execute(
+                select(state.c.completed_count).where(state.c.id == _STATE_ID)
+            ).scalar()
+    except SQLAlchemyError:
+        return None
+
+
+def _run_startup(startup_fn):
+    """Run startup_fn and count its success in StartupState"""
+    startup_fn()
+    state = StartupState.__table__
+    now = datetime.utcnow()
+    with db.engine.begin() as conn:
+        bumped = conn.execute(
+            update(state)
+            .where(state.c.id == _STATE_ID)
+            .values(completed_count=state.c.completed_count + 1, completed_at=now)
+        ).rowcount
+        if not bumped:
+            conn.execute(insert(state).values(id=_STATE_ID, completed_count=1, completed_at=now))
+
+
+def _run_as_waiter(startup_fn, marker_before):
+    """Once the leader released the lock, redo its work if it did not complete"""
+    if _startup_marker() == marker_before:
+        print("Startup did not complete in another worker; running it here")
+        _run_startup(startup_fn)
+        return True
+    return False
+
+
+def _run_with_advisory_lock(startup_fn):
+    """Coordinate through a Postgres session-level advisory lock"""
+    marker_before = _startup_marker()
+    with db.engine.connect() as conn:
+        params = {'key': _ADVISORY_LOCK_KEY}
+        is_leader = conn.execute(text('SELECT pg_try_advisory_lock(:key)'), params).scalar()
+        if not is_leader:
+            print("Waiting for another worker to finish startup...")
+            conn.execute(text('SELECT pg_advisory_lock(:key)'), params)
+        try:
+            if is_leader:
+                _run_startup(startup_fn)
+            else:
+                is_leader = _run_as_waiter(startup_fn, marker_before)
+        finally:
+            conn.execute(text('SELECT pg_advisory_unlock(:key)'), params)
+            conn.commit()
+    return is_leader
+
+
+def _run_with_file_lock(startup_fn, lock_path):
+    """Coordinate through an exclusive flock on a file next to the SQLite DB"""
+    marker_before = _startup_marker()
+    with open(lock_path, 'a') as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            is_leader = True
+        except BlockingIOError:
+            print("Waiting for another worker to finish startup...")
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            is_leader = False
+        try:
+            if is_leader:
+                _run_startup(startup_fn)
+            else:
+                is_leader = _run_as_waiter(startup_fn, marker_before)
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+    return is_leader
+
+
+def run_startup_once(app, startup_fn):
+    """
+    Run database startup work in one process while the others wait.
+
+    Gunicorn workers import the app concurrently, so schema creation and the
+    glossary load would otherwise run once per worker and race each other.
+    The first process to take the lock runs startup_fn. Processes that find
+    the lock held block until it is released, at which point the leader has
+    committed, and skip startup_fn. The leader bumps the StartupState count
+    once startup_fn succeeds; a waiter that finds it unchanged (the leader
+    raised or died) runs startup_fn itself. A process that boots later takes the
+    free lock and runs startup_fn itself; that is cheap because unchanged
+    glossary files are skipped by fingerprint.
+
+    Args:
+        app: Flask application instance
+        startup_fn: Callable doing the schema and glossary work
+
+    Returns:
+        True if this process ran startup_fn, False if another one completed it
+    """
+    if db.engine.dialect.name == 'postgresql':
+        return _run_with_advisory_lock(startup_fn)
+
+    database_path = app.config.get('DATABASE_PATH')
+    if database_path and fcntl is not None:
+        return _run_with_file_lock(startup_fn, f"{database_path}.lock")
+
+    startup_fn()
+    return True
@@ -0,0 +1,182 @@
+import posixpath
+import zipfile
+from xml.etree.ElementTree import iterparse, fromstring
+from openpyxl.styles.numbers import BUILTIN_FORMATS, is_date_format
+
+_NS_MAIN = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+_NS_DOC_REL = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+_NS_PKG_REL = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+_ROW_TAG = f'{_NS_MAIN}row'
+_CELL_TAG = f'{_NS_MAIN}c'
+_SHEET_DATA_TAG = f'{_NS_MAIN}sheetData'
+
+# Column letters -> 0-based index, filled as references are seen
+_column_indexes = {}
+
+
+class UnsupportedWorkbook(Exception):
+    """Raised for content the streaming reader cannot convert like openpyxl does"""
+
+
+def _column_index(reference):
+    """Convert a cell reference (A1, B7, AA10) to a 0-based column index"""
+    letters = reference.rstrip('0123456789')
+    index = _column_indexes.get(letters)
+    if index is None:
+        index = 0
+        for letter in letters:
+            index = index * 26 + (ord(letter) - 64)
+        index = _column_indexes[letters] = index - 1
+    return index
+
+
+def _active_sheet_path(zf):
+    """Resolve the zip member path of the workbook's active sheet"""
+    workbook = fromstring(zf.read('xl/workbook.xml'))
+
+    active_tab = 0
+    view = workbook.find(f'{_NS_MAIN}bookViews/{_NS_MAIN}workbookView')
+    if view is not None:
+        active_tab = int(view.get('activeTab', 0))
+
+    sheets = workbook.findall(f'{_NS_MAIN}sheets/{_NS_MAIN}sheet')
+    if not sheets:
+        raise UnsupportedWorkbook('workbook has no sheets')
+    relationship_id = sheets[min(active_tab, len(sheets) - 1)].get(f'{_NS_DOC_REL}id')
+
+    relationships = fromstring(zf.read('xl/_rels/workbook.xml.rels'))
+    for relationship in relationships.iter(f'{_NS_PKG_REL}Relationship'):
+        if relationship.get('Id') == relationship_id:
+            target = relationship.get('Target')
+            if target.startswith('/'):
+                return target.lstrip('/')
+            return posixpath.normpath(posixpath.join('xl', target))
+    raise UnsupportedWorkbook('active sheet relationship not found')
+
+
+def _text_content(elem):
+    """Text of an <si> or <is> element: plain <t>, or rich text runs joined (phonetics skipped)"""
+    text = elem.find(f'{_NS_MAIN}t')
+    if text is not None:
+        return text.text or ''
+    return ''.join(run.text or '' for run in elem.iterfind(f'{_NS_MAIN}r/{_NS_MAIN}t'))
+
+
+def _shared_strings(zf):
+    """Load the shared strings table"""
+    if 'xl/sharedStrings.xml' not in zf.namelist():
+        return []
+
+    strings = []
+    with zf.open('xl/sharedStrings.xml') as f:
+        for _, elem in iterparse(f):
+            if elem.tag == f'{_NS_MAIN}si':
+                strings.append(_text_content(elem))
+                elem.clear()
+    return strings
+
+
+def _date_style_ids(zf):
+    """Return the set of cell style indexes whose number format is a date"""
+    if 'xl/styles.xml' not in zf.namelist():
+        return set()
+
+    styles = fromstring(zf.read('xl/styles.xml'))
+    formats = dict(BUILTIN_FORMATS)
+    for num_fmt in styles.iterfind(f'{_NS_MAIN}numFmts/{_NS_MAIN}numFmt'):
+        formats[int(num_fmt.get('numFmtId'))] = num_fmt.get('formatCode', '')
+
+    date_ids = set()
+    for index, xf in enumerate(styles.iterfind(f'{_NS_MAIN}cellXfs/{_NS_MAIN}xf')):
+        if is_date_format(formats.get(int(xf.get('numFmtId', 0)), '')):
+            date_ids.add(index)
+    return date_ids
+
+
+def _cell_value(cell, shared_strings, date_style_ids):
+    """Convert a <c> element to the value openpyxl would return"""
+    cell_type = cell.get('t', 'n')
+
+    if cell_type == 'inlineStr':
+        inline = cell.find(f'{_NS_MAIN}is')
+        return _text_content(inline) if inline is not None else None
+
+    # openpyxl returns formulas, not their cached results
+    formula = cell.find(f'{_NS_MAIN}f')
+    if formula is not None:
+        if formula.get('t') or formula.text is None:
+            raise UnsupportedWorkbook('shared or array formulas')
+        return f'={formula.text}'
+
+    value = cell.findtext(f'{_NS_MAIN}v')
+    if not value:
+        return None
+
+    if cell_type == 's':
+        return shared_strings[int(value)]
+    if cell_type in ('str', 'e'):
+        return value
+    if cell_type == 'b':
+        return bool(int(value))
+    if cell_type == 'n':
+        if int(cell.get('s', 0)) in date_style_ids:
+            raise UnsupportedWorkbook('date-formatted cells')
+        if '.' in value or 'E' in value or 'e' in value:
+            return float(value)
+        return int(value)
+    raise UnsupportedWorkbook(f'cell type {cell_type!r}')
+
+
+def iter_rows(file_path, min_row=1, max_col=4):
+    """
+    Stream the active sheet of an xlsx file as row tuples.
+
+    Only the zip members that are needed are opened, and the sheet is read
+    with iterparse, clearing each row once it is yielded, so memory stays
+    constant regardless of row count.
+
+    Args:
+        file_path: Path to the xlsx file
+        min_row: First (1-based) row number to yield
+        max_col: Number of leading columns to keep in each tuple
+
+    Yields:
+        Tuple of max_col cell values (None for empty cells)
+
+    Raises:
+        UnsupportedWorkbook: If the file uses content the caller should hand to openpyxl
+    """
+    with zipfile.ZipFile(file_path) as zf:
+        sheet_path = _active_sheet_path(zf)
+        shared_strings = _shared_strings(zf)
+        date_style_ids = _date_style_ids(zf)
+
+        with zf.open(sheet_path) as f:
+            sheet_data = None
+            row_number = 0
+            for event, elem in iterparse(f, events=('start', 'end')):
+                if event == 'start':
+                    if elem.tag == _SHEET_DATA_TAG:
+                        sheet_data = elem
+                    continue
+                if elem.tag != _ROW_TAG:
+                    continue
+
+                row_number = int(elem.get('r', row_number + 1))
+                if row_number >= min_row:
+                    values = [None] * max_col
+                    position = 0
+                    for cell in elem.iterfind(_CELL_TAG):
+                        reference = cell.get('r')
+                        if reference:
+                            position = _column_index(reference)
+                        if position < max_col:
+                            values[position] = _cell_value(cell, shared_strings, date_style_ids)
+                        position += 1
+                    yield tuple(values)
+
+                # Drop the finished row so the tree never grows
+                elem.clear()
+                if sheet_data is not None:
+                    sheet_data.remove(elem)
@@ -0,0 +1,242 @@
+import io
+import os
+import sys
+import tempfile
+import zipfile
+from functools import lru_cache
+from itertools import islice
+from openpyxl import Workbook
+from openpyxl.cell.cell import ERROR_CODES, ILLEGAL_CHARACTERS_RE
+from openpyxl.packaging.core import DocumentProperties
+from openpyxl.utils import get_column_letter
+from openpyxl.utils.exceptions import IllegalCharacterError
+from openpyxl.xml.functions import tostring
+from app.services import entry_pool
+
+_SHEET_PART = 'xl/worksheets/sheet1.xml'
+_CORE_PART = 'docProps/core.xml'
+
+# Worksheet XML around the rows, as openpyxl writes it for a write-only sheet
+_SHEET_HEAD = (
+    b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    b'<sheetPr><outlinePr summaryBelow="1" summaryRight="1" /><pageSetUpPr /></sheetPr>'
+    b'<sheetViews><sheetView workbookViewId="0"><selection activeCell="A1" sqref="A1" /></sheetView></sheetViews>'
+    b'<sheetFormatPr baseColWidth="8" defaultRowHeight="15" /><sheetData>'
+)
+_SHEET_TAIL = (
+    b'</sheetData><pageMargins left="0.75" right="0.75" top="1" bottom="1" header="0.5" footer="0.5" /></worksheet>'
+)
+
+# Excel's cell text limit; openpyxl truncates longer strings
+_MAX_STRING_LENGTH = 32767
+
+# Ints below this magnitude print the same with str() as with openpyxl's %.16g
+_EXACT_INT = 10 ** 16
+
+# First characters that make openpyxl treat a string as a formula or an error code
+_SPECIAL_FIRST = frozenset('=#')
+
+# Column letters by 0-based index, extended as wider rows are seen
+_column_letters = []
+
+
+def _letters(count):
+    """Column letters of the first count columns"""
+    while len(_column_letters) < count:
+        _column_letters.append(get_column_letter(len(_column_letters) + 1))
+    return _column_letters
+
+
+def _escape(text):
+    """Escape text content the way ElementTree does (&, < and > only)"""
+    if '&' in text:
+        text = text.replace('&', '&amp;')
+    if '<' in text:
+        text = text.replace('<', '&lt;')
+    if '>' in text:
+        text = text.replace('>', '&gt;')
+    return text
+
+
+def _string_cell(ref, value):
+    """Serialise a str cell: inline string, or formula/error like openpyxl infers them"""
+    value = value[:_MAX_STRING_LENGTH]
+    if not value:
+        return f'<c r="{ref}" t="inlineStr" />'
+    if len(value) > 1 and value[0] == '=':
+        return f'<c r="{ref}"><f>{_escape(value[1:])}</f><v /></c>'
+    if value in ERROR_CODES:
+        return f'<c r="{ref}" t="e"><v>{_escape(value)}</v></c>'
+
+    stripped = value.strip()
+    if stripped and stripped != value:
+        return f'<c r="{ref}" t="inlineStr"><is><t xml:space="preserve">{_escape(value)}</t></is></c>'
+    return f'<c r="{ref}" t="inlineStr"><is><t>{_escape(value)}</t></is></c>'
+
+
+def _check_strings(rows):
+    """Raise IllegalCharacterError for the first string openpyxl would reject"""
+    for values in rows:
+        for value in values:
+            if isinstance(value, str) and ILLEGAL_CHARACTERS_RE.search(value[:_MAX_STRING_LENGTH]):
+                raise IllegalCharacterError(f"{value[:_MAX_STRING_LENGTH]} cannot be used in worksheets.")
+
+
+def _number_cell(ref, value, data_type):
+    """Serialise an int, float or bool cell"""
+    if value != value or value in (float('inf'), float('-inf')):
+        return f'<c r="{ref}" t="{data_type}"><v /></c>'
+    return f'<c r="{ref}" t="{data_type}"><v>{"%.16g" % value}</v></c>'
+
+
+def _serialize_rows(first_row, rows):
+    """
+    Serialise rows of plain values into worksheet <row> elements
+
+    Strings, ints, floats, bools and None (an empty, omitted cell) are
+    supported: everything the generated files contain. Plain strings (the
+    bulk of every file) are written in-line; anything openpyxl would treat
+    specially goes through _string_cell. Control characters are looked for
+    once in the finished XML, which contains no others.
+
+    Args:
+        first_row: 1-based sheet row number of the first row
+        rows: Lists of cell values
+
+    Returns:
+        String of XML
+
+    Raises:
+        IllegalCharacterError: If a string holds a control character
+        ValueError: If a value has an unsupported type
+    """
+    parts = []
+    append = parts.append
+    for row_number, values in enumerate(rows, start=first_row):
+        letters = _letters(len(values))
+        append(f'<row r="{row_number}">')
+        for letter, value in zip(letters, values):
+            value_type = type(value)
+            if value_type is str:
+                if (value and value[0] not in _SPECIAL_FIRST and len(value) <= _MAX_STRING_LENGTH
+                        and not value[0].isspace() and not value[-1].isspace()):
+                    if '&' in value or '<' in value or '>' in value:
+                        value = _escape(value)
+                    append(f'<c r="{letter}{row_number}" t="inlineStr"><is><t>{value}</t></is></c>')
+                else:
+                    append(_string_cell(f'{letter}{row_number}', value))
+            elif value is None:
+                continue
+            elif value_type is int and -_EXACT_INT < value < _EXACT_INT:
+                append(f'<c r="{letter}{row_number}" t="n"><v>{value}</v></c>')
+            elif value_type is bool:
+                append(_number_cell(f'{letter}{row_number}', value, 'b'))
+            elif isinstance(value, (int, float)):
+                append(_number_cell(f'{letter}{row_number}', value, 'n'))
+            elif isinstance(value, str):
+                append(_string_cell(f'{letter}{row_number}', str(value)))
+            else:
+                raise ValueError(f"Cannot convert {value!r} to Excel")
+        append('</row>')
+
+    xml = ''.join(parts)
+    if ILLEGAL_CHARACTERS_RE.search(xml):
+        _check_strings(rows)
+    return xml
+
+
+def _serialize_chunk(chunk):
+    """Serialise a (first row number, rows) chunk to UTF-8 XML; used as a pool task"""
+    first_row, rows = chunk
+    return _serialize_rows(first_row, rows).encode('utf-8')
+
+
+def _chunks(rows, first_row, chunk_rows):
+    """Split an iterable of rows into (first row number, list of rows) chunks"""
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, chunk_rows))
+        if not chunk:
+            return
+        yield first_row, chunk
+        first_row += len(chunk)
+
+
+@lru_cache(maxsize=8)
+def _package_parts(sheet_title):
+    """
+    The parts of a one-sheet workbook other than its worksheet, in zip order
+
+    Taken once from an empty write-only openpyxl workbook, so styles, theme,
+    relationships and content types match openpyxl's exactly. The worksheet
+    and docProps/core.xml (which holds the save time) are None placeholders.
+
+    Returns:
+        Tuple of (part name, bytes or None) pairs
+    """
+    wb = Workbook(write_only=True)
+    wb.create_sheet(sheet_title)
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    wb.close()
+
+    with zipfile.ZipFile(buffer) as zf:
+        return tuple(
+            (name, None if name in (_SHEET_PART, _CORE_PART) else zf.read(name))
+            for name in zf.namelist()
+        )
+
+
+def _write_sheet_xml(out, header, rows, workers, chunk_rows):
+    """Write the worksheet XML of header + rows to a binary file, serialising rows in chunks"""
+    out.write(_SHEET_HEAD)
+    out.write(_serialize_chunk((1, [header])))
+
+    chunks = _chunks(rows, 2, chunk_rows)
+    if workers >= 2 and not getattr(sys, 'frozen', False):
+        with entry_pool.EntryPool(workers) as pool:
+            for data in pool.map(_serialize_chunk, chunks, workers):
+                out.write(data)
+    else:
+        for chunk in chunks:
+            out.write(_serialize_chunk(chunk))
+
+    out.write(_SHEET_TAIL)
+
+
+def write_workbook(target, sheet_title, header, rows, workers=0, chunk_rows=10000):
+    """
+    Write a one-sheet xlsx workbook without building openpyxl cells
+
+    The worksheet XML is written straight from the values with inline
+    strings, to a temporary file that is then deflated into the package like
+    openpyxl's write-only mode does. The resulting parts are the ones openpyxl
+    writes for the same rows (apart from the save time in docProps/core.xml).
+
+    Args:
+        target: File path or writable binary file object
+        sheet_title: Worksheet title
+        header: List of header cell values (row 1)
+        rows: Iterable of lists of cell values (strings, numbers or None)
+        workers: Serialise row chunks in this many worker processes (0 or 1 = serial)
+        chunk_rows: Rows per serialisation chunk
+
+    Raises:
+        IllegalCharacterError: If a string holds a control character
+        ValueError: If a value has an unsupported type
+    """
+    fd, sheet_path = tempfile.mkstemp(suffix='.xml')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            _write_sheet_xml(out, header, rows, workers, max(1, chunk_rows))
+
+        with zipfile.ZipFile(target, 'w', zipfile.ZIP_DEFLATED, allowZip64=True) as zf:
+            for name, data in _package_parts(sheet_title):
+                if name == _SHEET_PART:
+                    zf.write(sheet_path, name)
+                elif name == _CORE_PART:
+                    zf.writestr(name, tostring(DocumentProperties().to_tree()))
+                else:
+                    zf.writestr(name, data)
+    finally:
+        os.remove(sheet_path)
@@ -17,6 +17,15 @@ let weekDetailsConfigured = false; // Tracks whether week details have been set
 // V4.1: Global cache for academic session commencement weeks
 let academicSessionData = {}; // { "EXMS-2026-268": { week1: "09.02.2026", week2: "16.02.2026" }, ... }
 
+// Faculty and special room glossaries cached from the page-load bundle
+let cachedFacultyData = null;
+let cachedRoomData = null;
+
+// Teaching weeks of the current commencement date from /api/calendar/<session>/weeks
+let teachingWeeks = { key: null, weeks: [] };
+// Session holiday dates already applied to this commencement date (so unticked ones stay unticked)
+let seededHolidayDates = new Set();
+
 // Track which entry is being edited (null = adding new, index = editing existing)
 let editingEntryIndex = null;
 
@@ -80,12 +89,15 @@ $(document).ready(function() {
 
     // V4: Trigger updates when relevant fields change
     $('#class_commencement').on('change', function() {
+        seededHolidayDates = new Set();
         updateExcludeDatesButtonState();
         updateWeekVenueButtonState();
+        loadTeachingWeeks().then(applySessionHolidays);
     });
     $('#recurring_until_week').on('change input', function() {
         updateExcludeDatesButtonState();
         updateWeekVenueButtonState();
+        loadTeachingWeeks().then(applySessionHolidays);
     });
 });
 
@@ -106,67 +118,220 @@ function initializeSelect2() {
         width: '100%',
         closeOnSelect: false
     });
+
+    // Large glossaries are searched server-side instead of shipped whole
+    initRemoteSelect('course_codes', 'course');
+}
+
+function initRemoteSelect(elementId, glossaryType) {
+    /**
+     * Switch a multi-select to Select2 remote data backed by
+     * /api/glossary/<type>/search (paged, filtered on the server).
+     */
+    const select = $(`#${elementId}`);
+    if (select.hasClass('select2-hidden-accessible')) select.select2('destroy');
+
+    select.select2({
+        theme: 'bootstrap-5',
+        placeholder: 'Type to search',
+        allowClear: true,
+        width: '100%',
+        closeOnSelect: false,
+        ajax: {
+            url: `/api/glossary/${glossaryType}/search`,
+            dataType: 'json',
+            delay: 250,
+            data: function(params) {
+                return { q: params.term || '', page: params.page || 1 };
+            }
+        }
+    });
+}
+
+function ensureSelectOptions(elementId, codes, texts) {
+    /**
+     * Remote-data selects only hold options the user picked, so add any
+     * missing options before setting values programmatically (e.g. on edit).
+     */
+    const select = $(`#${elementId}`);
+    (codes || []).forEach((code, index) => {
+        if (!select.find('option').filter((i, el) => el.value === code).length) {
+            const text = texts && texts[index] ? texts[index] : code;
+            select.append(new Option(text, code, false, false));
+        }
+    });
 }
 
 function loadGlossaries() {
-    // Load all glossary types
+    // Load all glossary types: deltas for locally cached ones, one bundle for the rest
     const glossaryTypes = [
         { type: 'academicsession', elementId: 'academic_session_code' },
         { type: 'programme', elementId: 'programme_code' },
         { type: 'activity', elementId: 'activity_code' },
         { type: 'specialroom', elementId: 'request_special_room_code' },
-        { type: 'course', elementId: 'course_codes' },
         { type: 'group', elementId: 'group_codes' },
         { type: 'faculty', elementId: 'faculty_code' }
     ];
 
+    // Glossaries cached in localStorage only need the changes since their revision
+    const cached = {};
     glossaryTypes.forEach(glossary => {
-        loadGlossaryData(glossary.type, glossary.elementId);
+        const entry = readCachedGlossary(glossary.type);
+        if (entry) cached[glossary.type] = entry;
+    });
+    const cachedTypes = Object.keys(cached);
+
+    const deltaRequest = cachedTypes.length
+        ? $.ajax({
+            url: '/api/glossaries/changes',
+            method: 'GET',
+            data: { since: cachedTypes.map(type => `${type}:${cached[type].revision}`).join(',') }
+        })
+        : $.Deferred().resolve({}).promise();
+
+    deltaRequest.then(function(deltas) {
+        const glossaries = {};
+        const missingTypes = [];
+
+        glossaryTypes.forEach(glossary => {
+            const delta = deltas[glossary.type];
+            if (cached[glossary.type] && delta && !delta.full_refresh) {
+                glossaries[glossary.type] = applyGlossaryDelta(cached[glossary.type].entries, delta);
+                if (delta.revision !== cached[glossary.type].revision) {
+                    writeCachedGlossary(glossary.type, delta.revision, glossaries[glossary.type]);
+                }
+            } else {
+                missingTypes.push(glossary.type);
+            }
+        });
+
+        if (missingTypes.length === 0) {
+            return glossaries;
+        }
+
+        // Everything else comes from a single bundled request
+        return $.ajax({
+            url: '/api/glossaries/bundle',
+            method: 'GET',
+            data: { types: missingTypes.join(',') }
+        }).then(function(bundle, status, xhr) {
+            const revisions = parseGlossaryRevisions(xhr.getResponseHeader('X-Glossary-Revisions'));
+            missingTypes.forEach(type => {
+                glossaries[type] = bundle[type] || [];
+                writeCachedGlossary(type, revisions[type], glossaries[type]);
+            });
+            return glossaries;
+        });
+    }).done(function(glossaries) {
+        glossaryTypes.forEach(glossary => {
+            populateGlossarySelect(glossary.type, glossary.elementId, glossaries[glossary.type] || []);
+        });
+
+        // Reused by the week venue modal without re-fetching
+        cachedFacultyData = glossaries.faculty || [];
+        cachedRoomData = glossaries.specialroom || [];
+    }).fail(function(error) {
+        console.error('Error loading glossaries:', error);
+        showError('Failed to load glossary data. Please refresh the page.');
     });
 }
 
-function loadGlossaryData(glossaryType, elementId) {
-    $.ajax({
-        url: `/api/glossary/${glossaryType}`,
-        method: 'GET',
-        success: function(data) {
-            const select = $(`#${elementId}`);
+// ===== Glossary delta sync (localStorage cache) =====
 
-            // Keep the first option (placeholder) if it exists
-            const hasPlaceholder = select.find('option:first').val() === '';
+const GLOSSARY_CACHE_PREFIX = 'preDtctGlossary:';
 
-            // Clear existing options except placeholder
-            if (hasPlaceholder) {
-                select.find('option:not(:first)').remove();
-            } else {
-                select.empty();
-            }
+function readCachedGlossary(glossaryType) {
+    try {
+        const entry = JSON.parse(localStorage.getItem(GLOSSARY_CACHE_PREFIX + glossaryType));
+        return entry && entry.revision > 0 && Array.isArray(entry.entries) ? entry : null;
+    } catch (e) {
+        return null;
+    }
+}
 
-            // Add new options
-            data.forEach(item => {
-                const optionText = item.description
-                    ? `${item.code} - ${item.description}`
-                    : item.code;
+function writeCachedGlossary(glossaryType, revision, entries) {
+    if (!revision) return;
+    try {
+        localStorage.setItem(GLOSSARY_CACHE_PREFIX + glossaryType, JSON.stringify({ revision: revision, entries: entries }));
+    } catch (e) {
+        // Storage full or unavailable: the next page load just downloads it again
+        console.warn(`Could not cache ${glossaryType} glossary:`, e);
+    }
+}
 
-                select.append(new Option(optionText, item.code, false, false));
+function parseGlossaryRevisions(header) {
+    // "faculty:3,specialroom:1" -> { faculty: 3, specialroom: 1 }
+    const revisions = {};
+    (header || '').split(',').forEach(pair => {
+        const [type, revision] = pair.split(':');
+        if (type && revision) revisions[type.trim()] = parseInt(revision, 10);
+    });
+    return revisions;
+}
 
-                // V4.1: Cache academic session commencement weeks
-                if (glossaryType === 'academicsession') {
-                    academicSessionData[item.code] = {
-                        week1: item.commencement_week_1 || '',
-                        week2: item.commencement_week_2 || ''
-                    };
-                }
-            });
+function applyGlossaryDelta(entries, delta) {
+    /**
+     * Apply a delta from /api/glossaries/changes to cached entries.
+     * Updated codes keep their position; new codes are appended.
+     */
+    if (!delta.upserted.length && !delta.removed.length) return entries;
 
-            // Refresh Select2
-            select.trigger('change');
-        },
-        error: function(error) {
-            console.error(`Error loading ${glossaryType} glossary:`, error);
-            showError(`Failed to load ${glossaryType} data. Please refresh the page.`);
+    const byCode = new Map(entries.map(item => [item.code, item]));
+    delta.removed.forEach(code => byCode.delete(code));
+    delta.upserted.forEach(item => byCode.set(item.code, item));
+    return Array.from(byCode.values());
+}
+
+function populateGlossarySelect(glossaryType, elementId, data) {
+    const select = $(`#${elementId}`);
+
+    // Keep the first option (placeholder) if it exists
+    const hasPlaceholder = select.find('option:first').val() === '';
+
+    // Clear existing options except placeholder
+    if (hasPlaceholder) {
+        select.find('option:not(:first)').remove();
+    } else {
+        select.empty();
+    }
+
+    // Add new options
+    data.forEach(item => {
+        const optionText = item.description
+            ? `${item.code} - ${item.description}`
+            : item.code;
+
+        select.append(new Option(optionText, item.code, false, false));
+
+        // V4.1: Cache academic session commencement weeks
+        if (glossaryType === 'academicsession') {
+            academicSessionData[item.code] = {
+                week1: item.commencement_week_1 || '',
+                week2: item.commencement_week_2 || ''
+            };
         }
     });
+
+    // Refresh Select2
+    select.trigger('change');
+}
+
+function loadWeekVenueGlossaries() {
+    /**
+     * Resolve once faculty and special room data are cached. They normally
+     * arrive with the page-load bundle; fetch them only if that failed.
+     */
+    if (cachedFacultyData && cachedRoomData) {
+        return $.Deferred().resolve().promise();
+    }
+    return $.ajax({
+        url: '/api/glossaries/bundle',
+        method: 'GET',
+        data: { types: 'faculty,specialroom' }
+    }).done(function(bundle) {
+        cachedFacultyData = bundle.faculty || [];
+        cachedRoomData = bundle.specialroom || [];
+    });
 }
 
 function updateClassCommencementOptions() {
@@ -405,6 +570,7 @@ function editEntry(index) {
     $('#class_commencement').val(entry.class_commencement).trigger('change');
     $('#duration').val(entry.duration);
     $('#activity_code').val(entry.activity_code).trigger('change');
+    ensureSelectOptions('course_codes', entry.course_codes, entry.course_texts);
     $('#course_codes').val(entry.course_codes).trigger('change');
     $('#group_codes').val(entry.group_codes).trigger('change');
     $('#recurring_until_week').val(entry.recurring_until_week);
@@ -501,10 +667,17 @@ function handleGenerateAll() {
         data: JSON.stringify({ entries: entries }),
         success: function(response) {
             showGenerateLoading(false);
+            let noticeText = '';
+            if (response.clashes && response.clashes.count > 0) {
+                noticeText = `<br><strong>Warning:</strong> ${response.clashes.count} faculty/room clash(es) found`;
+            }
+            if (response.deduplicated) {
+                noticeText += `<br>These entries were already generated at ${response.generated_at}; the same file is returned.`;
+            }
             showSuccess(`Excel file generated successfully!<br>
                         Total entries: ${entries.length}<br>
                         Total rows generated: ${response.row_count}<br>
-                        Form IDs: ${response.form_ids.join(', ')}`);
+                        Form IDs: ${response.form_ids.join(', ')}${noticeText}`);
 
             $('#downloadLink').attr('href', `/download/${response.file_path}`);
 
@@ -909,6 +1082,66 @@ function updateExcludeDatesButtonState() {
     }
 }
 
+function teachingWeeksKey() {
+    const sessionCode = $('#academic_session_code').val();
+    const commencementDate = $('#class_commencement').val();
+    const recurringWeeks = parseInt($('#recurring_until_week').val()) || 0;
+    if (!sessionCode || !commencementDate || recurringWeeks < 1) return null;
+    return `${sessionCode}|${commencementDate}|${recurringWeeks}`;
+}
+
+function loadTeachingWeeks() {
+    /**
+     * Fetch the teaching weeks of the current session, commencement date and
+     * week count from the server calendar (which knows the session's shared
+     * holidays). Resolves with the cached weeks if they are already loaded,
+     * or with null if the form is incomplete or the request fails.
+     */
+    const key = teachingWeeksKey();
+    if (!key) return $.Deferred().resolve(null).promise();
+    if (teachingWeeks.key === key) return $.Deferred().resolve(teachingWeeks).promise();
+
+    const [sessionCode, start, weeks] = key.split('|');
+    return $.ajax({
+        url: `/api/calendar/${encodeURIComponent(sessionCode)}/weeks`,
+        method: 'GET',
+        data: { start: start, weeks: weeks }
+    }).then(function(response) {
+        // Ignore responses for a form state that has since changed
+        if (teachingWeeksKey() !== key) return null;
+        teachingWeeks = { key: key, weeks: response.weeks };
+        return teachingWeeks;
+    }, function() {
+        return $.Deferred().resolve(null).promise();
+    });
+}
+
+function applySessionHolidays(loaded) {
+    /**
+     * Pre-exclude the weeks that fall on the academic session's shared
+     * holidays, with their replacement dates. Each holiday is applied once per
+     * commencement date, so the user can still untick it; entries being
+     * edited keep their saved exclusions.
+     */
+    if (!loaded) return;
+
+    let changed = false;
+    loaded.weeks.forEach(week => {
+        if (!week.excluded) return;
+        if (seededHolidayDates.has(week.date)) return;
+        seededHolidayDates.add(week.date);
+
+        if (editingEntryIndex !== null || excludedDates.some(e => e.date === week.date)) return;
+        excludedDates.push({ date: week.date, replacement: week.replacement || null });
+        changed = true;
+    });
+
+    if (changed) {
+        updateExcludeDatesButtonState();
+        updateWeekVenueButtonState();
+    }
+}
+
 function openExcludeDatesModal() {
     const commencementDate = $('#class_commencement').val();
     const recurringWeeks = parseInt($('#recurring_until_week').val()) || 0;
@@ -918,20 +1151,24 @@ function openExcludeDatesModal() {
         return;
     }
 
-    // Generate all possible recurring dates (without exclusions applied)
-    const allDates = calculateAllRecurringDates(commencementDate, recurringWeeks);
+    loadTeachingWeeks().always(function() {
+        // Generate all possible recurring dates (without exclusions applied)
+        const allDates = calculateAllRecurringDates(commencementDate, recurringWeeks);
 
-    // Render checkboxes
-    renderExcludeDatesCheckboxes(allDates);
+        // Render checkboxes
+        renderExcludeDatesCheckboxes(allDates);
 
-    const modal = new bootstrap.Modal(document.getElementById('excludeDatesModal'));
-    modal.show();
+        const modal = new bootstrap.Modal(document.getElementById('excludeDatesModal'));
+        modal.show();
+    });
 }
 
 function calculateAllRecurringDates(startDateStr, weekCount) {
     /**
      * Calculate all recurring dates without applying exclusions.
-     * Used for showing checkboxes in the exclude dates modal.
+     * Used for showing checkboxes in the exclude dates modal. Uses the
+     * server's teaching weeks (with session holidays) when they are loaded
+     * for these inputs, and only computes the dates locally otherwise.
      */
     const result = [];
 
@@ -939,6 +1176,15 @@ function calculateAllRecurringDates(startDateStr, weekCount) {
         return result;
     }
 
+    if (teachingWeeks.key === `${$('#academic_session_code').val()}|${startDateStr}|${weekCount}`) {
+        return teachingWeeks.weeks.map(week => ({
+            date: week.date,
+            weekNumber: week.week,
+            displayDate: formatDateForDisplay(week.date),
+            holiday: week.holiday
+        }));
+    }
+
     const [year, month, day] = startDateStr.split('-').map(Number);
     let currentDate = new Date(year, month - 1, day);
 
@@ -1003,7 +1249,7 @@ function renderExcludeDatesCheckboxes(dates) {
                            data-date="${dateObj.date}" ${isExcluded ? 'checked' : ''}>
                 </td>
                 <td class="text-center"><strong>Week ${dateObj.weekNumber}</strong></td>
-                <td>${dateObj.displayDate}</td>
+                <td>${dateObj.displayDate}${dateObj.holiday ? `<br><small class="text-muted">${escapeHtml(dateObj.holiday)}</small>` : ''}</td>
                 <td>
                     <input type="date" class="form-control replacement-date-input"
                            data-date="${dateObj.date}"
@@ -1257,9 +1503,6 @@ function openWeekVenueModal() {
     modal.show();
 }
 
-// Cached glossary data for re-rendering rows without re-fetching
-let _weekVenueFacultyData = null;
-let _weekVenueRoomData = null;
 let _weekVenueDates = []; // current dates array for re-rendering
 
 function normaliseWeekVenueDetails(details) {
@@ -1287,14 +1530,8 @@ function populateWeekVenueTable(dates) {
     const tableBody = $('#weekVenueTableBody');
     tableBody.empty();
 
-    // Fetch glossary data then render all rows
-    const facultyPromise = $.ajax({ url: '/api/glossary/faculty', method: 'GET' });
-    const roomPromise = $.ajax({ url: '/api/glossary/specialroom', method: 'GET' });
-
-    $.when(facultyPromise, roomPromise).done(function(facResult, roomResult) {
-        _weekVenueFacultyData = facResult[0];
-        _weekVenueRoomData = roomResult[0];
-
+    // Render all rows once the cached glossary data is available
+    loadWeekVenueGlossaries().done(function() {
         dates.forEach((dateObj, index) => {
             renderDateRows(dateObj.date, dateObj, index);
         });
@@ -1471,10 +1708,10 @@ function initSelectsForRow(date, sIdx, vIdx, existingVenue) {
     const $room = $row.find('.week-special-room-select');
 
     // Populate faculty options
-    if (_weekVenueFacultyData) {
+    if (cachedFacultyData) {
         $faculty.find('option:not(:first)').remove();
         $faculty2.find('option:not(:first)').remove();
-        _weekVenueFacultyData.forEach(item => {
+        cachedFacultyData.forEach(item => {
             const optionText = item.description ? `${item.code} - ${item.description}` : item.code;
             $faculty.append(new Option(optionText, item.code));
             $faculty2.append(new Option(optionText, item.code));
@@ -1488,9 +1725,9 @@ function initSelectsForRow(date, sIdx, vIdx, existingVenue) {
     }
 
     // Populate room options
-    if (_weekVenueRoomData) {
+    if (cachedRoomData) {
         $room.find('option:not(:first)').remove();
-        _weekVenueRoomData.forEach(item => {
+        cachedRoomData.forEach(item => {
             const optionText = item.description ? `${item.code} - ${item.description}` : item.code;
             $room.append(new Option(optionText, item.code));
         });
@@ -1649,73 +1886,63 @@ function findDateInfo(date) {
 }
 
 function populateApplyAllDropdowns() {
-    // Faculty dropdown
-    $.ajax({
-        url: '/api/glossary/faculty',
-        method: 'GET',
-        success: function(data) {
-            const select = $('#applyAllFaculty');
-            select.find('option:not(:first)').remove();
-            data.forEach(item => {
-                const optionText = item.description
-                    ? `${item.code} - ${item.description}`
-                    : item.code;
-                select.append(new Option(optionText, item.code));
-            });
+    loadWeekVenueGlossaries().done(function() {
+        // Faculty dropdown
+        const select = $('#applyAllFaculty');
+        select.find('option:not(:first)').remove();
+        cachedFacultyData.forEach(item => {
+            const optionText = item.description
+                ? `${item.code} - ${item.description}`
+                : item.code;
+            select.append(new Option(optionText, item.code));
+        });
 
-            // Initialize Select2
-            select.select2({
-                theme: 'bootstrap-5',
-                placeholder: 'Select Faculty',
-                allowClear: true,
-                width: '100%',
-                dropdownParent: $('#weekVenueModal')
-            });
+        // Initialize Select2
+        select.select2({
+            theme: 'bootstrap-5',
+            placeholder: 'Select Faculty',
+            allowClear: true,
+            width: '100%',
+            dropdownParent: $('#weekVenueModal')
+        });
 
-            // Also populate Faculty Code 2 dropdown
-            const select2 = $('#applyAllFaculty2');
-            select2.find('option:not(:first)').remove();
-            data.forEach(item => {
-                const optionText = item.description
-                    ? `${item.code} - ${item.description}`
-                    : item.code;
-                select2.append(new Option(optionText, item.code));
-            });
+        // Also populate Faculty Code 2 dropdown
+        const select2 = $('#applyAllFaculty2');
+        select2.find('option:not(:first)').remove();
+        cachedFacultyData.forEach(item => {
+            const optionText = item.description
+                ? `${item.code} - ${item.description}`
+                : item.code;
+            select2.append(new Option(optionText, item.code));
+        });
 
-            // Initialize Select2 for Faculty Code 2
-            select2.select2({
-                theme: 'bootstrap-5',
-                placeholder: 'None (Optional)',
-                allowClear: true,
-                width: '100%',
-                dropdownParent: $('#weekVenueModal')
-            });
-        }
-    });
+        // Initialize Select2 for Faculty Code 2
+        select2.select2({
+            theme: 'bootstrap-5',
+            placeholder: 'None (Optional)',
+            allowClear: true,
+            width: '100%',
+            dropdownParent: $('#weekVenueModal')
+        });
 
-    // Special room dropdown
-    $.ajax({
-        url: '/api/glossary/specialroom',
-        method: 'GET',
-        success: function(data) {
-            const select = $('#applyAllSpecialRoom');
-            select.find('option:not(:first)').remove();
-            data.forEach(item => {
-                const optionText = item.description
-                    ? `${item.code} - ${item.description}`
-                    : item.code;
-                select.append(new Option(optionText, item.code));
-            });
+        // Special room dropdown
+        const roomSelect = $('#applyAllSpecialRoom');
+        roomSelect.find('option:not(:first)').remove();
+        cachedRoomData.forEach(item => {
+            const optionText = item.description
+                ? `${item.code} - ${item.description}`
+                : item.code;
+            roomSelect.append(new Option(optionText, item.code));
+        });
 
-            // Initialize Select2
-            select.select2({
-                theme: 'bootstrap-5',
-                placeholder: 'None (Optional)',
-                allowClear: true,
-                width: '100%',
-                dropdownParent: $('#weekVenueModal')
-            });
-        }
+        // Initialize Select2
+        roomSelect.select2({
+            theme: 'bootstrap-5',
+            placeholder: 'None (Optional)',
+            allowClear: true,
+            width: '100%',
+            dropdownParent: $('#weekVenueModal')
+        });
     });
 }
 
@@ -42,7 +42,8 @@ $(document).ready(function() {
                     );
                 }
 
-                showStatus(statusEl, 'success', 'Updated successfully — ' + data.count + ' entries loaded.');
+                showStatus(statusEl, 'success', 'Updated successfully — ' + data.count + ' entries loaded (' +
+                    data.inserted + ' added, ' + data.updated + ' changed, ' + data.deleted + ' removed).');
                 fileInput.val('');
 
                 // Auto-hide success message after 5 seconds
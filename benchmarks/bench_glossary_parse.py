@@ -0,0 +1,74 @@
+"""
+Time the stream and openpyxl glossary parsers on a large course glossary
+
+Writes a ROWS-row workbook (inline strings, as openpyxl saves it) and a
+copy with a shared strings table (as Excel saves it). Each is parsed with
+both engines, checking they return the same rows. The time is that of
+read_glossary_rows; the peak memory is traced in a separate pass that
+walks the sheet rows without keeping them, so it is the parser's own.
+
+Usage: python benchmarks/bench_glossary_parse.py [ROWS]
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from openpyxl import Workbook, load_workbook
+from tests import support
+from app.services import excel_reader, xlsx_stream_reader
+
+
+def write_workbook(path, rows):
+    """Write a course glossary of rows entries"""
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet('Courses')
+    ws.append(['Code', 'Description'])
+    for i in range(rows):
+        ws.append([f'CRS{i:06d}', f'Course title number {i} Advanced'])
+    wb.save(path)
+
+
+def sheet_rows(path, engine):
+    """Iterate the data rows of path the way engine reads them"""
+    if engine == 'stream':
+        return xlsx_stream_reader.iter_rows(path, min_row=2)
+    return load_workbook(path, read_only=True).active.iter_rows(min_row=2, values_only=True)
+
+
+def measure(path, engine):
+    """Parse path with engine; returns (rows, seconds, peak traced bytes)"""
+    started = time.perf_counter()
+    rows = excel_reader.read_glossary_rows(path, 'course', engine)
+    seconds = time.perf_counter() - started
+
+    tracemalloc.start()
+    for _ in sheet_rows(path, engine):
+        pass
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return rows, seconds, peak
+
+
+def main():
+    row_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    with tempfile.TemporaryDirectory() as tmp:
+        inline_path = os.path.join(tmp, 'inline.xlsx')
+        write_workbook(inline_path, row_count)
+        shared_path = os.path.join(tmp, 'shared.xlsx')
+        with open(inline_path, 'rb') as src, open(shared_path, 'wb') as dst:
+            dst.write(src.read())
+        support.to_shared_strings(shared_path)
+
+        for label, path in (('inline strings', inline_path), ('shared strings', shared_path)):
+            results = {engine: measure(path, engine) for engine in ('openpyxl', 'stream')}
+            for engine, (rows, seconds, peak) in results.items():
+                print(f"{label:15} {engine:9} {len(rows):>8} rows  {seconds:6.2f}s  peak {peak / 1048576:6.1f} MB")
+            print(f"{label:15} identical rows: {results['openpyxl'][0] == results['stream'][0]}")
+
+
+if __name__ == '__main__':
+    main()
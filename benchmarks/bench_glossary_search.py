@@ -0,0 +1,67 @@
+"""
+Measure glossary search latency through the Flask app
+
+Starts the app on a temporary database with a COURSES-entry course
+glossary, then sends QUERIES mixed code-prefix and description searches
+to /api/glossary/course/search, reporting p50/p95/p99 latency per page,
+and compares with the size of the full glossary list.
+
+Usage: python benchmarks/bench_glossary_search.py [COURSES] [QUERIES]
+"""
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests import support
+
+# What users type: code prefixes, description words (last one a prefix), nothing
+_QUERIES = ('', 'crs', 'CRS0', 'crs123', 'crs99999', 'intro', 'adv cal', 'da', 'clinical ethics', 'x', 'l',
+            'phys biol')
+
+
+def percentile(sorted_values, fraction):
+    """Value at fraction (0-1) of an ascending list"""
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def main():
+    course_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    query_count = int(sys.argv[2]) if len(sys.argv) > 2 else 3000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        support.write_glossaries(os.path.join(tmp, 'glossary'), course_count)
+        with contextlib.redirect_stdout(io.StringIO()):
+            app = support.make_app(tmp)
+        client = app.test_client()
+
+        # The first search builds the snapshot and its index
+        started = time.perf_counter()
+        client.get('/api/glossary/course/search', query_string={'q': 'a'})
+        print(f"{course_count} courses; first search (builds the index) {time.perf_counter() - started:.2f}s")
+
+        rng = random.Random(2)
+        latencies = []
+        for _ in range(query_count):
+            params = {'q': rng.choice(_QUERIES), 'page': rng.choice((1, 1, 1, 2, 5))}
+            started = time.perf_counter()
+            response = client.get('/api/glossary/course/search', query_string=params)
+            latencies.append(time.perf_counter() - started)
+            assert response.status_code == 200, response.get_data(as_text=True)
+
+        latencies.sort()
+        print(f"{query_count} searches: p50 {percentile(latencies, 0.5) * 1e3:.1f} ms, "
+              f"p95 {percentile(latencies, 0.95) * 1e3:.1f} ms, p99 {percentile(latencies, 0.99) * 1e3:.1f} ms")
+
+        started = time.perf_counter()
+        response = client.get('/api/glossary/course')
+        print(f"Full list: {len(response.data) / 1048576:.1f} MB in {(time.perf_counter() - started) * 1e3:.0f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Measure how fast generated rows are saved to the database
+
+Runs the persistence step of a generation on its own (the submissions
+insert and the generated_rows inserts, no output file) for FORMS forms of
+ROWS rows each, on a temporary SQLite file database, and prints rows per
+second for each of RUNS runs. MODE picks the path timed: 'batched' (the
+set-based inserts generation uses now), 'orm' (how rows were saved
+before: one GeneratedRow object added to the session per row, committed
+at the end) or 'both' (the default).
+
+Usage: python benchmarks/bench_row_persistence.py [FORMS] [ROWS] [RUNS] [MODE]
+"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests import support
+from app import db
+from app.models import FormSubmission, GeneratedRow
+from app.services import excel_generator, id_generator
+
+# One generated row, in row_batch.FIELDS order
+_RECORD = (
+    'EXMS-2026-268', 'PRG001', '2026-02-09', '2026-02-09', '09:00', '11:00', 2, 'LEC', 30,
+    55, 'CRS00001', 'Intro Law', 'GRP001', 'FAC0001', '', 'RM001', 3, 1
+)
+
+
+def persist(form_ids, rows_per_form, batch_size):
+    """Save the rows of one generation with batched inserts; returns the number of rows"""
+    row_count = len(form_ids) * rows_per_form
+    prefix, start_num = id_generator.reserve_row_id_range(row_count)
+    submission_ids = excel_generator._insert_submissions(form_ids, 'PRG001', 'bench', None)
+    db.session.commit()
+    tagged_records = ((form_id, _RECORD) for form_id in form_ids for _ in range(rows_per_form))
+    identified_rows = excel_generator._iter_with_ids(tagged_records, row_count, prefix, start_num)
+    for _ in excel_generator._iter_persisted(identified_rows, submission_ids, batch_size):
+        pass
+    return row_count
+
+
+def persist_orm(form_ids, rows_per_form, batch_size):
+    """Save the same rows one ORM object at a time; returns the number of rows"""
+    row_count = len(form_ids) * rows_per_form
+    prefix, start_num = id_generator.reserve_row_id_range(row_count)
+    submission_ids = {}
+    for form_id in form_ids:
+        submission = FormSubmission(form_id=form_id, timestamp='bench', programme_code='PRG001')
+        db.session.add(submission)
+        db.session.flush()
+        submission_ids[form_id] = submission.id
+
+    tagged_records = ((form_id, _RECORD) for form_id in form_ids for _ in range(rows_per_form))
+    for row_id, form_id, record in excel_generator._iter_with_ids(tagged_records, row_count, prefix, start_num):
+        db.session.add(GeneratedRow(**excel_generator._row_params(submission_ids[form_id], row_id, form_id, record)))
+    db.session.commit()
+    return row_count
+
+
+_MODES = {'batched': persist, 'orm': persist_orm}
+
+
+def main():
+    form_count = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    rows_per_form = int(sys.argv[2]) if len(sys.argv) > 2 else 400
+    runs = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+    mode = sys.argv[4] if len(sys.argv) > 4 else 'both'
+    modes = list(_MODES) if mode == 'both' else [mode]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with contextlib.redirect_stdout(io.StringIO()):
+            app = support.make_app(tmp)
+        with app.app_context():
+            batch_size = app.config.get('GENERATE_BATCH_SIZE', 2000)
+            for run in range(runs):
+                for name in modes:
+                    form_ids = id_generator.generate_form_ids(form_count)
+                    started = time.perf_counter()
+                    row_count = _MODES[name](form_ids, rows_per_form, batch_size)
+                    seconds = time.perf_counter() - started
+                    print(f"Run {run + 1} {name:7}: {row_count} rows / {form_count} forms in {seconds:.2f}s "
+                          f"= {row_count / seconds:,.0f} rows/s")
+            print(f"(batched inserts of {batch_size} rows)")
+
+
+if __name__ == '__main__':
+    main()
@@ -34,9 +34,87 @@ GLOSSARY_FILES = {
     'specialroom': 'glossary_dtct_specialroomcode.xlsx'
 }
 
+# Parse glossary files in this many worker processes at startup (0 or 1 = serial)
+GLOSSARY_PARSE_WORKERS = int(os.environ.get('GLOSSARY_PARSE_WORKERS', '0'))
+
+# Glossary xlsx parser: 'stream' reads the sheet XML directly (much faster,
+# falls back to openpyxl for files it cannot read); 'openpyxl' always uses openpyxl
+GLOSSARY_PARSER = os.environ.get('GLOSSARY_PARSER', 'stream')
+
+# Page size for /api/glossary/<type>/search (Select2 remote data)
+GLOSSARY_SEARCH_PAGE_SIZE = 50
+
+# Glossary delta sync: revisions kept in the change log, and the largest single
+# reload that is logged (bigger reloads force clients to refresh in full)
+GLOSSARY_CHANGE_LOG_REVISIONS = 50
+GLOSSARY_CHANGE_LOG_MAX_ROWS = 5000
+
+# Streamed generate responses (/api/generate-multiple with "stream": true) are
+# built in memory up to this size, then spooled to a temporary file
+GENERATE_STREAM_SPOOL_BYTES = 8 * 1024 * 1024
+
+# Limits enforced by /api/generate-multiple before it does any work (0 = no
+# limit). The file size checked is the analytical estimate, calibrated below.
+GENERATE_MAX_ROWS = int(os.environ.get('GENERATE_MAX_ROWS', '500000'))
+GENERATE_MAX_FILE_BYTES = int(os.environ.get('GENERATE_MAX_FILE_BYTES', str(64 * 1024 * 1024)))
+
+# Calibration of the generate preview's estimates: xlsx bytes per generated
+# row, and rows generated (expanded, saved and written) per second
+GENERATE_ESTIMATE_BYTES_PER_ROW = 72
+GENERATE_ESTIMATE_ROWS_PER_SECOND = 10000
+
+# Validate and expand generate entries in this many worker processes (0 or 1 =
+# serial), for requests of at least GENERATE_PARALLEL_MIN_ENTRIES entries or
+# GENERATE_PARALLEL_MIN_ROWS rows
+GENERATE_PARALLEL_WORKERS = int(os.environ.get('GENERATE_PARALLEL_WORKERS', '0'))
+GENERATE_PARALLEL_MIN_ENTRIES = 16
+GENERATE_PARALLEL_MIN_ROWS = 50000
+
+# Faculty/room clash check on generate: 'warn' reports clashes in the
+# response, 'block' refuses to generate (409), 'off' skips the check
+GENERATE_CLASH_CHECK = os.environ.get('GENERATE_CLASH_CHECK', 'warn')
+
+# A generate request identical to one made within this many seconds (same
+# normalised entries and format) gets the earlier file and FormIDs back
+# instead of generating again; "force": true always generates (0 = never reuse)
+GENERATE_DEDUP_WINDOW_SECONDS = int(os.environ.get('GENERATE_DEDUP_WINDOW_SECONDS', '600'))
+
+# Longest class (in weeks) /api/calendar/<session>/weeks will describe
+CALENDAR_MAX_WEEKS = 104
+
+# Generated rows are saved to the database in batches of this many while the
+# workbook is written
+GENERATE_BATCH_SIZE = 2000
+
+# Generated xlsx writer: 'stream' writes the sheet XML directly (much faster,
+# same workbook); 'openpyxl' builds it through openpyxl's write-only mode
+XLSX_WRITER = os.environ.get('XLSX_WRITER', 'stream')
+
+# Serialise xlsx sheet rows in this many worker processes (0 or 1 = serial),
+# XLSX_WRITER_CHUNK_ROWS rows per task
+XLSX_WRITER_WORKERS = int(os.environ.get('XLSX_WRITER_WORKERS', '0'))
+XLSX_WRITER_CHUNK_ROWS = 10000
+
+# FormIDs and row IDs are reserved from the database. With a block size above 0
+# each worker reserves at least this many at a time and hands them out from
+# memory; 0 reserves exactly what each request needs, keeping IDs gapless.
+ID_RESERVE_BLOCK_SIZE = int(os.environ.get('ID_RESERVE_BLOCK_SIZE', '0'))
+
+# Retention of generated files in OUTPUT_DIR. A background sweeper in each
+# worker (or, in workers that fork process pools, a sweep after a request
+# once the interval has passed) deletes the least recently downloaded files while they take more than
+# OUTPUT_MAX_BYTES, and any not downloaded for OUTPUT_MAX_AGE_DAYS; deleted
+# files are rebuilt from the database when next downloaded. Files generated
+# before rows were stored completely cannot be rebuilt and are kept.
+# 0 disables a limit (or, for the interval, the sweeper).
+OUTPUT_MAX_BYTES = int(os.environ.get('OUTPUT_MAX_BYTES', str(2 * 1024 * 1024 * 1024)))
+OUTPUT_MAX_AGE_DAYS = float(os.environ.get('OUTPUT_MAX_AGE_DAYS', '30'))
+OUTPUT_SWEEP_INTERVAL_SECONDS = int(os.environ.get('OUTPUT_SWEEP_INTERVAL_SECONDS', '600'))
+
 # Upload settings
 MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16 MB
-ALLOWED_EXTENSIONS = {'xlsx', 'xls'}
+# Glossaries may also be CSV/TSV exports, optionally gzip-compressed
+ALLOWED_EXTENSIONS = {'xlsx', 'xls', 'csv', 'tsv', 'csv.gz', 'tsv.gz'}
 
 # Glossary descriptions for management page
 GLOSSARY_DESCRIPTIONS = {
@@ -0,0 +1,156 @@
+import os
+import re
+import sys
+import zipfile
+from openpyxl import Workbook
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from app import create_app
+
+# A valid generate entry for the glossaries written by write_glossaries
+ENTRY = {
+    'academic_session_code': 'EXMS-2026-268',
+    'programme_code': 'PRG001',
+    'class_commencement': '2026-02-09',
+    'duration': 2,
+    'activity_code': 'LEC',
+    'group_capacities': {'GRP001': 30, 'GRP002': 25},
+    'course_codes': ['CRS00001', 'CRS00002'],
+    'course_texts': ['CRS00001 - Intro Law', 'CRS00002 - Data Systems'],
+    'group_codes': ['GRP001', 'GRP002'],
+    'recurring_until_week': 3,
+    'excluded_dates': [{'date': '2026-02-16', 'replacement': '2026-02-21'}],
+    'week_venue_details': {
+        '2026-02-09': {'sessions': [{'start_time': '09:00', 'end_time': '11:00', 'venues': [
+            {'faculty_code': 'FAC0001', 'faculty_code2': '', 'special_room_code': 'RM001'},
+            {'faculty_code': 'FAC0002', 'special_room_code': ''}
+        ]}]},
+        '2026-02-21': {'faculty_code': 'FAC0003', 'special_room_code': ''},
+        '2026-02-23': {'sessions': [{'start_time': '14:00', 'end_time': '16:00', 'venues': [
+            {'faculty_code': 'FAC0001'}
+        ]}]}
+    }
+}
+
+
+# Words course descriptions are made of, so description searches have matches
+_COURSE_WORDS = (
+    'Intro', 'Advanced', 'Calculus', 'Physics', 'Anatomy', 'Law',
+    'Design', 'Data', 'Systems', 'Clinical', 'Ethics', 'Biology'
+)
+
+
+def _course_description(i):
+    """Deterministic three-word description of the i-th course"""
+    words = len(_COURSE_WORDS)
+    return ' '.join(_COURSE_WORDS[(i // words ** n + n) % words] for n in range(3))
+
+
+def _write_sheet(path, header, rows):
+    """Write a one-sheet glossary workbook"""
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(header)
+    for row in rows:
+        ws.append(row)
+    wb.save(path)
+
+
+def rewrite_parts(path, rewrite):
+    """Rewrite the members of an xlsx package in place: rewrite(name, data) -> data"""
+    with zipfile.ZipFile(path) as zin:
+        parts = [(item.filename, zin.read(item.filename)) for item in zin.infolist()]
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zout:
+        for name, data in parts:
+            zout.writestr(name, rewrite(name, data))
+
+
+def to_shared_strings(path):
+    """Move a workbook's inline strings into a shared strings table, as Excel saves them"""
+    strings = {}
+
+    def share(match):
+        index = strings.setdefault(match.group(2), len(strings))
+        return match.group(1).replace(b' t="inlineStr"', b' t="s"') + b'<v>%d</v></c>' % index
+
+    def rewrite(name, data):
+        if name.startswith('xl/worksheets/'):
+            return re.sub(rb'(<c [^>]*t="inlineStr"[^>]*>)<is>(.*?)</is></c>', share, data)
+        if name == '[Content_Types].xml':
+            return data.replace(b'</Types>', (
+                b'<Override PartName="/xl/sharedStrings.xml" ContentType="application/'
+                b'vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/></Types>'
+            ))
+        if name == 'xl/_rels/workbook.xml.rels':
+            return data.replace(b'</Relationships>', (
+                b'<Relationship Id="rIdShared" Type="http://schemas.openxmlformats.org/officeDocument/2006/'
+                b'relationships/sharedStrings" Target="sharedStrings.xml"/></Relationships>'
+            ))
+        return data
+
+    rewrite_parts(path, rewrite)
+    with zipfile.ZipFile(path, 'a', zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr('xl/sharedStrings.xml', (
+            b'<sst xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" count="%d" uniqueCount="%d">'
+            % (len(strings), len(strings))
+            + b''.join(b'<si>' + text + b'</si>' for text in strings)
+            + b'</sst>'
+        ))
+
+
+def write_glossaries(glossary_dir, course_count=200):
+    """Write a small set of glossary files covering ENTRY and the generated course codes"""
+    os.makedirs(glossary_dir, exist_ok=True)
+    sheets = {
+        'academicsession': (['Code', 'Description', 'Week 1', 'Week 2'], [
+            ['EXMS-2026-268', 'Semester 1 2026', '09.02.2026', '16.02.2026']
+        ]),
+        'programme': (['Code', 'Description'], [[f'PRG{i:03d}', f'Programme {i}'] for i in range(20)]),
+        'course': (['Code', 'Description'], [[f'CRS{i:05d}', _course_description(i)] for i in range(course_count)]),
+        'group': (['Code', 'Description'], [[f'GRP{i:03d}', None] for i in range(50)]),
+        'faculty': (['Code', 'Description'], [[f'FAC{i:04d}', f'Lecturer {i}'] for i in range(100)]),
+        'activity': (['Name', 'Code'], [['Lecture', 'LEC'], ['Tutorial', 'TUT']]),
+        'specialroom': (['Code', 'Description'], [[f'RM{i:03d}', f'Room {i}'] for i in range(30)])
+    }
+    for glossary_type, (header, rows) in sheets.items():
+        _write_sheet(os.path.join(glossary_dir, config.GLOSSARY_FILES[glossary_type]), header, rows)
+
+
+def make_app(base_dir, **overrides):
+    """
+    Create an app on a SQLite database, glossaries and output directory under base_dir
+
+    Args:
+        base_dir: Empty temporary directory
+        **overrides: Config values to set before the app starts
+
+    Returns:
+        Flask application instance
+    """
+    glossary_dir = os.path.join(base_dir, 'glossary')
+    if not os.path.isdir(glossary_dir):
+        write_glossaries(glossary_dir)
+
+    database_path = os.path.join(base_dir, 'dtct.db')
+    settings = {
+        'DATABASE_PATH': database_path,
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{database_path}',
+        'GLOSSARY_DIR': glossary_dir,
+        'OUTPUT_DIR': os.path.join(base_dir, 'output'),
+        'OUTPUT_SWEEP_INTERVAL_SECONDS': 0
+    }
+    settings.update(overrides)
+
+    saved = {name: getattr(config, name) for name in settings if hasattr(config, name)}
+    for name, value in settings.items():
+        setattr(config, name, value)
+    try:
+        return create_app()
+    finally:
+        for name in settings:
+            if name in saved:
+                setattr(config, name, saved[name])
+            else:
+                delattr(config, name)
@@ -0,0 +1,49 @@
+import contextlib
+import copy
+import io
+import tempfile
+import unittest
+from tests.support import ENTRY, make_app
+
+
+class HistoryClashTest(unittest.TestCase):
+    """Generates are checked against earlier submissions, except their own earlier generations"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.app = make_app(self.tmp.name, GENERATE_CLASH_CHECK='block')
+        self.client = self.app.test_client()
+        response = self._generate(ENTRY)
+        self.assertEqual(response.status_code, 200, response.get_json())
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _generate(self, entry):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return self.client.post('/api/generate-multiple', json={'entries': [entry], 'force': True})
+
+    def test_other_submission_clashes(self):
+        # Another class taught by FAC0001 at the same time on 2026-02-09
+        entry = copy.deepcopy(ENTRY)
+        entry['course_codes'] = ['CRS00003']
+        entry['course_texts'] = ['CRS00003 - Other course']
+        entry['group_codes'] = ['GRP003']
+        entry['group_capacities'] = {'GRP003': 20}
+
+        response = self._generate(entry)
+        self.assertEqual(response.status_code, 409)
+        clashes = response.get_json()['clashes']
+        self.assertTrue(clashes['count'])
+        self.assertIn({'resource': 'faculty', 'code': 'FAC0001', 'date': '2026-02-09'},
+                      [{key: clash[key] for key in ('resource', 'code', 'date')} for clash in clashes['clashes']])
+
+    def test_regenerating_does_not_clash_with_itself(self):
+        response = self._generate(ENTRY)
+        self.assertEqual(response.status_code, 200, response.get_json())
+        self.assertEqual(response.get_json()['clashes']['count'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import copy
+from datetime import date, timedelta
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from tests.support import ENTRY, make_app
+from app.services import excel_generator
+
+
+def _large_entry(course_count=100, group_count=20):
+    """ENTRY widened to tens of thousands of rows"""
+    entry = copy.deepcopy(ENTRY)
+    entry['course_codes'] = [f'CRS{i:05d}' for i in range(course_count)]
+    entry['course_texts'] = [f'CRS{i:05d} - Course {i}' for i in range(course_count)]
+    entry['group_codes'] = [f'GRP{i:03d}' for i in range(group_count)]
+    entry['group_capacities'] = {code: 20 for code in entry['group_codes']}
+    entry['recurring_until_week'] = 14
+    entry['excluded_dates'] = []
+    entry['week_venue_details'] = {
+        (date(2026, 2, 9) + timedelta(weeks=week)).isoformat(): {'sessions': [{
+            'start_time': '09:00', 'end_time': '11:00', 'venues': [{'faculty_code': 'FAC0001'}]
+        }]}
+        for week in range(14)
+    }
+    return entry
+
+
+class ConcurrentGenerateTest(unittest.TestCase):
+    """A small generate must not fail while a large one is writing its file"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        # A short lock wait: the small request may only queue behind one row batch
+        self.app = make_app(
+            self.tmp.name,
+            GENERATE_CLASH_CHECK='off',
+            GENERATE_BATCH_SIZE=500,
+            SQLALCHEMY_ENGINE_OPTIONS={'connect_args': {'timeout': 1}}
+        )
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _generate(self, entries, results, key):
+        with self.app.test_client() as client:
+            response = client.post('/api/generate-multiple', json={'entries': entries, 'force': True})
+            results[key] = (response.status_code, response.get_json())
+
+    def test_small_generate_during_large_one(self):
+        first_batch_saved = threading.Event()
+        small_done = threading.Event()
+        iter_persisted = excel_generator._iter_persisted
+
+        def pause_after_first_batch(identified_rows, submission_ids, batch_size):
+            # The batch is committed before the row that filled it is passed on
+            for count, row in enumerate(iter_persisted(identified_rows, submission_ids, batch_size), 1):
+                yield row
+                if count == batch_size and not first_batch_saved.is_set():
+                    first_batch_saved.set()
+                    small_done.wait(30)
+
+        results = {}
+        with mock.patch.object(excel_generator, '_iter_persisted', pause_after_first_batch):
+            large = threading.Thread(target=self._generate, args=([_large_entry()], results, 'large'))
+            large.start()
+            try:
+                self.assertTrue(first_batch_saved.wait(30))
+                self._generate([ENTRY], results, 'small')
+                self.assertTrue(large.is_alive())
+            finally:
+                small_done.set()
+                large.join()
+
+        status, body = results['small']
+        self.assertEqual(status, 200, body)
+        self.assertEqual(body['row_count'], 16)
+
+        status, body = results['large']
+        self.assertEqual(status, 200, body)
+        self.assertEqual(body['row_count'], 100 * 20 * 14)
+
+
+if __name__ == '__main__':
+    unittest.main()
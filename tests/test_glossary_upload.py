@@ -0,0 +1,37 @@
+import contextlib
+import io
+import tempfile
+import unittest
+from tests.support import make_app
+from app.models import GlossaryCache, GlossaryMeta
+
+
+class GlossaryUploadTest(unittest.TestCase):
+    """An upload reports and records the number of distinct codes it cached"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.app = make_app(self.tmp.name)
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_duplicate_codes_counted_once(self):
+        lines = ['Code,Description'] + [f'PRG{i:03d},Programme {i}' for i in range(100)] + ['PRG007,Renamed']
+        upload = {'file': (io.BytesIO('\n'.join(lines).encode('utf-8')), 'programmes.csv')}
+        response = self.client.post('/api/glossary/programme/upload', data=upload,
+                                    content_type='multipart/form-data')
+        self.assertEqual(response.status_code, 200, response.get_json())
+        self.assertEqual(response.get_json()['count'], 100)
+
+        with self.app.app_context():
+            self.assertEqual(GlossaryCache.query.filter_by(glossary_type='programme').count(), 100)
+            self.assertEqual(GlossaryMeta.query.filter_by(glossary_type='programme').one().entry_count, 100)
+            renamed = GlossaryCache.query.filter_by(glossary_type='programme', code='PRG007').one()
+            self.assertEqual(renamed.description, 'Renamed')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import contextlib
+import io
+import multiprocessing
+import tempfile
+import unittest
+from unittest import mock
+from tests.support import make_app
+from app import db
+from app.models import FormSubmission, GeneratedRow, IdSequence
+from app.services import id_generator
+
+_PROCESSES = 4
+_REQUESTS = 100
+
+
+def _reserve_many(base_dir, block_size):
+    """One worker process: reserve 3 FormIDs and 5 row IDs per request"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        app = make_app(base_dir, ID_RESERVE_BLOCK_SIZE=block_size)
+    form_ids, row_ids = [], []
+    with app.app_context():
+        for _ in range(_REQUESTS):
+            form_ids.extend(id_generator.generate_form_ids(3))
+            prefix, start_num = id_generator.reserve_row_id_range(5)
+            row_ids.extend(f"{prefix}-{num:06d}" for num in range(start_num, start_num + 5))
+    return form_ids, row_ids
+
+
+class ConcurrentReservationTest(unittest.TestCase):
+    """Processes reserving at the same time never receive the same ID"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        # Startup runs once here, so the workers only reserve
+        with contextlib.redirect_stdout(io.StringIO()):
+            make_app(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _reserve_in_processes(self, block_size):
+        with multiprocessing.get_context('spawn').Pool(_PROCESSES) as pool:
+            results = pool.starmap(_reserve_many, [(self.tmp.name, block_size)] * _PROCESSES)
+        form_ids = [form_id for forms, _ in results for form_id in forms]
+        row_ids = [row_id for _, rows in results for row_id in rows]
+        return form_ids, row_ids
+
+    def test_unique_gapless_form_ids(self):
+        form_ids, row_ids = self._reserve_in_processes(0)
+        self.assertEqual(len(set(row_ids)), _PROCESSES * _REQUESTS * 5)
+        self.assertEqual(sorted(int(form_id) for form_id in form_ids),
+                         list(range(900001, 900001 + _PROCESSES * _REQUESTS * 3)))
+
+    def test_unique_ids_with_blocks(self):
+        form_ids, row_ids = self._reserve_in_processes(50)
+        self.assertEqual(len(set(form_ids)), _PROCESSES * _REQUESTS * 3)
+        self.assertEqual(len(set(row_ids)), _PROCESSES * _REQUESTS * 5)
+
+
+class RowSequenceSeedTest(unittest.TestCase):
+    """Only the first row sequence looks at rows issued before sequences existed"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.app = make_app(self.tmp.name, ID_RESERVE_BLOCK_SIZE=0)
+        self.context = self.app.app_context()
+        self.context.push()
+
+    def tearDown(self):
+        self.context.pop()
+        self.tmp.cleanup()
+
+    def _add_row(self, row_id):
+        submission = FormSubmission(form_id='900001', timestamp='t', programme_code='PRG001')
+        db.session.add(submission)
+        db.session.flush()
+        db.session.add(GeneratedRow(submission_id=submission.id, row_id=row_id, form_id='900001'))
+        db.session.commit()
+
+    def _reserve_at(self, prefix):
+        with mock.patch.object(id_generator, 'generate_id_prefix', return_value=prefix):
+            return id_generator.reserve_row_id_range(1)[1]
+
+    def test_first_sequence_continues_after_existing_rows(self):
+        self._add_row('20260209-0900-100500')
+        self.assertEqual(self._reserve_at('20260209-0900'), 100501)
+
+    def test_later_sequences_do_not_scan_rows(self):
+        self.assertEqual(self._reserve_at('20260209-0900'), 100001)
+        with mock.patch.object(id_generator, 'get_last_running_number') as scan:
+            self.assertEqual(self._reserve_at('20260209-0901'), 100001)
+        scan.assert_not_called()
+
+    def test_previous_minute_continues_after_the_next_starts(self):
+        self.assertEqual(self._reserve_at('20260209-0900'), 100001)
+        self.assertEqual(self._reserve_at('20260209-0901'), 100001)
+        # A request that took its prefix just before the minute turned
+        self.assertEqual(self._reserve_at('20260209-0900'), 100002)
+
+    def test_old_minutes_are_pruned(self):
+        for prefix in ('20260209-0759', '20260209-0830', '20260209-0900'):
+            self._reserve_at(prefix)
+        names = {sequence.name for sequence in IdSequence.query.filter(IdSequence.name.like('row:%'))}
+        self.assertEqual(names, {'row:20260209-0830', 'row:20260209-0900'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+import contextlib
+import io
+import tempfile
+import unittest
+from tests.support import ENTRY, make_app
+from app.models import FormSubmission
+
+
+class DeduplicatedStreamTest(unittest.TestCase):
+    """Streaming the file of an identical earlier request counts as a use of that file"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.app = make_app(self.tmp.name, GENERATE_DEDUP_WINDOW_SECONDS=600)
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _generate(self, stream):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return self.client.post('/api/generate-multiple', json={'entries': [ENTRY], 'stream': stream})
+
+    def _last_downloaded(self):
+        with self.app.app_context():
+            return [submission.last_downloaded_at for submission in FormSubmission.query.all()]
+
+    def test_stream_records_use(self):
+        response = self._generate(False)
+        self.assertEqual(response.status_code, 200, response.get_json())
+        self.assertEqual(self._last_downloaded(), [None])
+
+        response = self._generate(True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['X-Deduplicated'], '1')
+        response.close()
+        self.assertIsNotNone(self._last_downloaded()[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import io
+import unittest
+import zipfile
+from unittest import mock
+from openpyxl.utils.exceptions import IllegalCharacterError
+from app.services import output_formats, xlsx_stream_writer
+
+# Generated rows in HEADERS order; the second has no capacities
+_ROWS = [
+    ['20260209-0900-100001', '900001', '900001-01', 'EXMS-2026-268', 'PRG001', '2026-02-09', '2026-02-09', '09:00', '11:00',
+     2, 'LEC', 30, 55, 'CRS00001', 'Intro Law', 'GRP001', 'FAC0001', '', 'RM001', 3],
+    ['20260209-0900-100002', '900001', '900001-02', 'EXMS-2026-268', 'PRG001', '2026-02-09', '2026-02-21', '', '',
+     2, 'LEC', '', '', 'CRS00002', 'Data Systems', 'GRP002', 'FAC0003', '', '', 3],
+]
+
+# Values openpyxl writes specially: markup, whitespace, formulas, error codes,
+# empty and over-long strings, non-ASCII, bools, floats and ints past 2**53
+_EDGE_VALUES = [
+    '&<>"\'', ' leading', 'trailing ', 'two\nlines', '\ttab', '=SUM(A1:A2)', '=', '#N/A', '#name', '', None,
+    'Ünïcødé 日本 \U0001f600', 'x' * 40000, True, False, 0, -7, 3.14, 1e20, 0.1, float('nan'), 10 ** 17, -(10 ** 16)
+]
+
+
+def _edge_rows(count=60):
+    """Rows of HEADERS width cycling through _EDGE_VALUES"""
+    width = len(output_formats.HEADERS)
+    return [[_EDGE_VALUES[(row * 7 + column) % len(_EDGE_VALUES)] for column in range(width)]
+            for row in range(count)]
+
+
+def _parts(data):
+    """Part names and contents of an xlsx package, without the save time in docProps/core.xml"""
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        return [(name, zf.read(name)) for name in zf.namelist() if name != 'docProps/core.xml']
+
+
+class XlsxStreamWriterTest(unittest.TestCase):
+    """The stream writer must produce the parts openpyxl writes for the same rows"""
+
+    def _openpyxl_parts(self, rows):
+        output = io.BytesIO()
+        output_formats._write_xlsx_openpyxl(output, rows)
+        return _parts(output.getvalue())
+
+    def _stream_parts(self, rows, **options):
+        output = io.BytesIO()
+        xlsx_stream_writer.write_workbook(output, "Pre-DTCT", output_formats.HEADERS, rows, **options)
+        return _parts(output.getvalue())
+
+    def test_parts_match_openpyxl(self):
+        rows = _ROWS + _edge_rows()
+        expected = self._openpyxl_parts(rows)
+        self.assertEqual(self._stream_parts(rows), expected)
+
+    def test_parts_match_openpyxl_in_workers(self):
+        rows = _edge_rows(200)
+        expected = self._openpyxl_parts(rows)
+        self.assertEqual(self._stream_parts(rows, workers=2, chunk_rows=30), expected)
+
+    def test_empty(self):
+        self.assertEqual(self._stream_parts([]), self._openpyxl_parts([]))
+
+    def test_control_characters_raise(self):
+        with self.assertRaises(IllegalCharacterError):
+            self._stream_parts([['bad \x01 value']])
+
+
+class AvailableFormatsTest(unittest.TestCase):
+    """Parquet is only offered when pyarrow can be imported"""
+
+    def test_parquet_needs_pyarrow(self):
+        with mock.patch.object(output_formats, 'pyarrow', None):
+            self.assertEqual(output_formats.available_formats(), ['xlsx', 'csv', 'csv.gz', 'jsonl'])
+            with self.assertRaises(ValueError):
+                output_formats.get_format('parquet')
+
+
+@unittest.skipIf(output_formats.pyarrow is None, 'pyarrow is not installed')
+class ParquetTest(unittest.TestCase):
+
+    def test_rows_round_trip(self):
+        self.assertIn('parquet', output_formats.available_formats())
+        output = io.BytesIO()
+        output_formats.get_format('parquet').write(output, iter(_ROWS))
+        output.seek(0)
+
+        table = output_formats.pyarrow.parquet.read_table(output)
+        self.assertEqual(table.column_names, output_formats.HEADERS)
+        rows = [list(row.values()) for row in table.to_pylist()]
+        # Integer columns are typed; empty integer cells become nulls
+        self.assertEqual(rows[0], [str(value) if name not in output_formats._INTEGER_COLUMNS else value
+                                   for name, value in zip(output_formats.HEADERS, _ROWS[0])])
+        self.assertIsNone(rows[1][output_formats.HEADERS.index('GroupCodeCapacity')])
+        self.assertEqual(rows[1][output_formats.HEADERS.index('CourseName')], 'Data Systems')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import contextlib
+import copy
+import io
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+from tests.support import ENTRY, make_app
+from app.services import id_generator
+
+
+def _entries(count=4):
+    """Variants of ENTRY with their own courses and groups"""
+    entries = []
+    for index in range(count):
+        entry = copy.deepcopy(ENTRY)
+        codes = [f'CRS{index * 2 + 1:05d}', f'CRS{index * 2 + 2:05d}']
+        entry['course_codes'] = codes
+        entry['course_texts'] = [f'{code} - Course {code}' for code in codes]
+        entry['group_codes'] = [f'GRP{index + 1:03d}']
+        entry['group_capacities'] = {f'GRP{index + 1:03d}': 20 + index}
+        entries.append(entry)
+    return entries
+
+
+class ParallelGenerateTest(unittest.TestCase):
+    """Entries expanded in worker processes give exactly the serial output, row IDs included"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _generate(self, name, **overrides):
+        """Generate _entries() as CSV on a fresh database; returns (metrics, form IDs, CSV text)"""
+        with contextlib.redirect_stdout(io.StringIO()):
+            app = make_app(os.path.join(self.tmp.name, name), GENERATE_CLASH_CHECK='off', **overrides)
+            with mock.patch.object(id_generator, 'generate_id_prefix', return_value='20260209-0900'):
+                response = app.test_client().post('/api/generate-multiple', json={
+                    'entries': _entries(), 'format': 'csv', 'stream': True
+                })
+        self.assertEqual(response.status_code, 200, response.get_data(as_text=True))
+        metrics = json.loads(response.headers['X-Generate-Metrics'])
+        return metrics, response.headers['X-Form-IDs'], response.get_data(as_text=True)
+
+    def test_parallel_matches_serial(self):
+        serial_metrics, serial_form_ids, serial_rows = self._generate('serial', GENERATE_PARALLEL_WORKERS=0)
+        parallel_metrics, parallel_form_ids, parallel_rows = self._generate(
+            'parallel', GENERATE_PARALLEL_WORKERS=2, GENERATE_PARALLEL_MIN_ENTRIES=2
+        )
+
+        self.assertEqual(serial_metrics['mode'], 'serial')
+        self.assertEqual(parallel_metrics['mode'], 'parallel')
+        self.assertEqual(parallel_form_ids, serial_form_ids)
+        self.assertEqual(len(serial_rows.splitlines()), 1 + 4 * 8)
+        self.assertEqual(parallel_rows, serial_rows)
+
+
+if __name__ == '__main__':
+    unittest.main()
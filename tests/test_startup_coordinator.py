@@ -0,0 +1,56 @@
+import contextlib
+import io
+import tempfile
+import unittest
+from tests.support import make_app
+from app import db
+from app.models import IdSequence, StartupState
+from app.services import startup_coordinator
+
+
+class StartupStateTest(unittest.TestCase):
+    """Completed startups are counted in their own table, so waiters can tell the leader failed"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.app = make_app(self.tmp.name)
+        self.context = self.app.app_context()
+        self.context.push()
+        self.runs = []
+
+    def tearDown(self):
+        self.context.pop()
+        self.tmp.cleanup()
+
+    def _startup(self):
+        self.runs.append(True)
+
+    def test_app_startup_is_counted(self):
+        self.assertEqual(startup_coordinator._startup_marker(), 1)
+        self.assertEqual(StartupState.query.one().completed_count, 1)
+        self.assertIsNone(db.session.get(IdSequence, 'startup'))
+
+    def test_waiter_skips_after_leader_completed(self):
+        before = startup_coordinator._startup_marker()
+        startup_coordinator._run_startup(self._startup)
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertFalse(startup_coordinator._run_as_waiter(self._startup, before))
+        self.assertEqual(len(self.runs), 1)
+
+    def test_waiter_reruns_after_leader_failed(self):
+        before = startup_coordinator._startup_marker()
+
+        def failing_startup():
+            raise RuntimeError('leader failed')
+
+        with self.assertRaises(RuntimeError):
+            startup_coordinator._run_startup(failing_startup)
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertTrue(startup_coordinator._run_as_waiter(self._startup, before))
+        self.assertEqual(len(self.runs), 1)
+        self.assertEqual(startup_coordinator._startup_marker(), before + 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import datetime
+import os
+import tempfile
+import unittest
+from openpyxl import Workbook
+from tests import support
+from app.services import excel_reader, xlsx_stream_reader
+
+_GLOSSARY_TYPES = ('course', 'activity', 'academicsession')
+
+# Inline-string cell placeholder replaced with rich text (runs plus a phonetic run)
+_RICH_PLACEHOLDER = b'<is><t>RICH_TEXT</t></is>'
+_RICH_TEXT = (
+    b'<is><r><rPr><b/></rPr><t>Bold</t></r><r><t xml:space="preserve"> plain</t></r>'
+    b'<rPh sb="0" eb="1"><t>PHONETIC</t></rPh></is>'
+)
+
+
+def _write_edge_cases(path):
+    """A workbook whose active sheet is not the first, holding every kind of value glossaries meet"""
+    wb = Workbook()
+    wb.active.title = 'Notes'
+    wb.active.append(['WRONG', 'sheet'])
+    ws = wb.create_sheet('Data')
+    wb.active = 1
+
+    ws.append(['Code', 'Description', 'Week 1', 'Week 2', 'Extra'])
+    ws.append([123, 4.5, '09.02.2026', None, 'ignored'])
+    ws.append(['  PADDED  ', 'has & < > "quotes"', None, '16.02.2026'])
+    ws.append([True, False])
+    ws.append([None, 'no code'])
+    ws.append([])
+    ws.append(['RICH', 'RICH_TEXT'])
+    ws['A20'] = 'GAP'
+    ws['C20'] = 'week 1 only'
+    ws.append(['FORMULA', '=CONCAT("a","b")'])
+    ws.append(['UNICODE', 'Ünïcødé 日本'])
+    ws.append([1e20, 0.1])
+    wb.save(path)
+
+    def add_rich_text(name, data):
+        return data.replace(_RICH_PLACEHOLDER, _RICH_TEXT) if name.startswith('xl/worksheets/') else data
+
+    support.rewrite_parts(path, add_rich_text)
+
+
+class StreamReaderParityTest(unittest.TestCase):
+    """The stream parser must return exactly the rows openpyxl does"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'glossary.xlsx')
+        _write_edge_cases(self.path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def assertParity(self, path):
+        for glossary_type in _GLOSSARY_TYPES:
+            with self.subTest(glossary_type=glossary_type):
+                expected = excel_reader.read_glossary_rows(path, glossary_type, 'openpyxl')
+                self.assertTrue(expected)
+                self.assertEqual(excel_reader.read_glossary_rows(path, glossary_type, 'stream'), expected)
+
+    def test_inline_strings(self):
+        self.assertParity(self.path)
+
+    def test_shared_strings(self):
+        support.to_shared_strings(self.path)
+        self.assertParity(self.path)
+
+    def test_rich_text_skips_phonetics(self):
+        rows = excel_reader.read_glossary_rows(self.path, 'course', 'stream')
+        self.assertIn(('RICH', 'Bold plain', None, None), rows)
+
+    def test_date_cells_fall_back_to_openpyxl(self):
+        wb = Workbook()
+        wb.active.append(['Code', 'Description'])
+        wb.active.append(['DATE', datetime.datetime(2026, 2, 9)])
+        wb.save(self.path)
+
+        with self.assertRaises(xlsx_stream_reader.UnsupportedWorkbook):
+            list(xlsx_stream_reader.iter_rows(self.path, min_row=2))
+        self.assertParity(self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()